@@ -11,6 +11,12 @@ sys.path.insert(0, str(PROJECT_ROOT))
 SCRIPTS_DIR = PROJECT_ROOT / "output" / "scripts"
 SCRIPTS_DIR.mkdir(parents=True, exist_ok=True)
 
+# 音频广播方式: inline（消息中附带音频）/ ref（音频按内容哈希写入会话目录，只广播 audio_url）
+AUDIO_BROADCAST_MODE = os.getenv("AUDIO_BROADCAST_MODE", "inline").lower()
+
+# 台词播放期间为队列前 N 条弹幕预生成回应（0 关闭；开启后会多出后台 LLM 调用）
+SPECULATE_DANMAKU = int(os.getenv("SPECULATE_DANMAKU", "0"))
+
 # CORS 配置
 CORS_ORIGINS = ["*"]
 CORS_CREDENTIALS = True
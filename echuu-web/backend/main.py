@@ -1,7 +1,6 @@
 """ECHUU Web 后端主入口"""
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 
 try:
     # 作为包导入时使用相对导入
@@ -14,6 +13,9 @@ except ImportError:
     from routers import api, websocket, auth, characters, models, settings
     from database.database import init_db
 
+# config 已把项目根目录加入 sys.path
+from echuu.live.audio_store import audio_static_files
+
 # 创建 FastAPI 应用
 app = FastAPI(title="ECHUU Web 控制台 API")
 
@@ -43,7 +45,7 @@ app.add_middleware(
 )
 
 # 挂载静态资源
-app.mount("/audio", StaticFiles(directory=str(SCRIPTS_DIR)), name="audio")
+app.mount("/audio", audio_static_files(SCRIPTS_DIR), name="audio")
 
 # 注册路由
 app.include_router(websocket.router)
@@ -87,6 +87,8 @@ class LiveConfig(BaseModel):
     llm_model_id: Optional[str] = None
     voice_config_id: Optional[str] = None
     vtuber_3d_model_id: Optional[str] = None
+    audio_mode: Optional[str] = None  # "inline" / "ref"，留空使用 AUDIO_BROADCAST_MODE
+    speculate_danmaku: Optional[int] = None  # 弹幕回应预生成候选数，留空使用 SPECULATE_DANMAKU
 
 
 class SessionInfo(BaseModel):
@@ -8,16 +8,17 @@ from typing import Callable, Optional
 from datetime import datetime
 from sqlalchemy.orm import Session
 
+from echuu.live.audio_store import AudioStore
 from echuu.live.engine import EchuuLiveEngine
 from echuu.live.state import Danmaku
 
 try:
-    from ..config import SCRIPTS_DIR
+    from ..config import SCRIPTS_DIR, AUDIO_BROADCAST_MODE, SPECULATE_DANMAKU
     from ..models import LiveConfig
     from ..state import state
     from ..database.models import Character, VoiceConfig, LLMModel, LiveSession, SessionStatus
 except ImportError:
-    from config import SCRIPTS_DIR
+    from config import SCRIPTS_DIR, AUDIO_BROADCAST_MODE, SPECULATE_DANMAKU
     from models import LiveConfig
     from state import state
     from database.models import Character, VoiceConfig, LLMModel, LiveSession, SessionStatus
@@ -46,6 +47,11 @@ class LiveService:
         state.is_running = True
         session_dir = SCRIPTS_DIR / session_id
         session_dir.mkdir(parents=True, exist_ok=True)
+        audio_mode = (config.audio_mode or AUDIO_BROADCAST_MODE).lower()
+        speculate_danmaku = (
+            config.speculate_danmaku if config.speculate_danmaku is not None else SPECULATE_DANMAKU
+        )
+        audio_store = AudioStore(SCRIPTS_DIR)
         
         # 创建新的数据库会话（后台任务需要独立会话）
         try:
@@ -119,19 +125,21 @@ class LiveService:
                 if api_key:
                     os.environ["DEFAULT_MODEL"] = llm_model.model_id
             
-            # 初始化引擎
-            engine = EchuuLiveEngine()
+            # 初始化引擎（构造时读取语料文件，放到线程池）
+            engine = await asyncio.to_thread(EchuuLiveEngine)
             state.set_engine(engine)
             
             # Phase 1: 设置与剧本生成
+            loop = asyncio.get_running_loop()
+
             def on_phase(msg: str):
-                """Phase 回调函数"""
+                """Phase 回调函数（在剧本生成的工作线程中调用）"""
                 asyncio.run_coroutine_threadsafe(
                     state.broadcast({"type": "reasoning", "content": msg}),
-                    asyncio.get_event_loop()
+                    loop
                 )
 
-            engine.setup(
+            await engine.asetup(
                 name=character.name,
                 persona=character.persona,
                 background=character.background or "",
@@ -154,13 +162,22 @@ class LiveService:
 
             # Phase 2: 执行
             step_idx = 0
-            for result in engine.run(
+            async for result in engine.arun(
                 max_steps=config.max_steps,
                 play_audio=False,
-                save_audio=True
+                save_audio=True,
+                speculate_danmaku=speculate_danmaku,
+                realtime=True,
             ):
                 audio_data = result.get("audio")
-                if audio_data:
+                if audio_data and audio_mode == "ref":
+                    # 引用模式：按内容哈希写入会话目录，消息中只带 URL 与哈希
+                    ref = await asyncio.to_thread(
+                        audio_store.put, session_id, audio_data, engine.tts.stream_format
+                    )
+                    result.pop("audio", None)
+                    result.update(ref.to_dict())
+                elif audio_data:
                     response_format = os.getenv("TTS_RESPONSE_FORMAT", "pcm").lower()
                     ext = ".wav" if response_format == "pcm" else f".{response_format}"
                     audio_filename = f"step_{step_idx}{ext}"
@@ -171,8 +188,8 @@ class LiveService:
                 # 提取记忆状态推送到前端
                 memory = engine.state.memory
                 result["memory_snapshot"] = {
-                    "story_points": memory.story_points["mentioned"],
-                    "promises": [p for p in memory.promises if not p["fulfilled"]],
+                    "story_points": list(memory.story_points["mentioned"]),
+                    "promises": memory.promises.unfulfilled(),
                     "emotion_trend": [e["level"] for e in memory.emotion_track[-5:]]
                 }
 
@@ -181,7 +198,6 @@ class LiveService:
 
                 await state.broadcast({"type": "step", "data": result})
                 step_idx += 1
-                await asyncio.sleep(0.1)
 
             await state.broadcast({
                 "type": "finish",
@@ -225,5 +241,9 @@ class LiveService:
             raise ValueError("直播未运行")
         
         dm = Danmaku.from_text(text, user=user)
-        state.current_engine.state.danmaku_queue.append(dm)
+        engine = state.current_engine
+        engine.state.danmaku_queue.append(dm)
+        # 台词播放期间就开始为新弹幕预生成回应（SPECULATE_DANMAKU / speculate_danmaku
+        # 为 0 时不预生成；表演步执行中则留到该步结束时统一调度）
+        engine.performer.request_speculation(engine.state)
         return dm
@@ -21,48 +21,106 @@ Example usage:
 
 __version__ = "0.1.0"
 
-# Main engine - the primary entry point
-from .live.engine import EchuuLiveEngine
-
-# Core components for customization
-from .core.story_nucleus import StoryNucleus
-from .core.emotion_mixer import EmotionMixer, EmotionConfig
-from .core.trigger_bank import TriggerBank, TriggerTemplate
-from .core.digression_db import DigressionDB
-from .core.structure_breaker import StructureBreaker
-from .core.pattern_analyzer import PatternAnalyzer
-from .core.drama_amplifier import DramaAmplifier
-
-# PerformerCue - Expression and gesture annotation
-from .core.performer_cue import (
-    PerformerCue,
-    EmotionCue,
-    GestureCue,
-    LookCue,
-    BlinkCue,
-    LipsyncCue,
-    CameraCue,
-    EmotionKey,
-    LookTarget,
-    BlinkMode,
-    infer_emotion_from_text,
-)
-
-# VRM mapping
-from .vrm.mapper import VRMExpressionMapper, VRMVersion
-from .vrm.presets import GESTURE_PRESETS, GestureCategory, get_gesture_by_emotion
-
-# Generators
-from .generators.script_generator_v4 import ScriptGeneratorV4, ScriptGeneratorV4_1, ScriptLineV4
-from .generators.example_sampler import ExampleSampler
-
-# Live performance components
-from .live.state import Danmaku, PerformerMemory, PerformanceState
-from .live.performer import PerformerV3
-from .live.llm_client import LLMClient
-from .live.tts_client import TTSClient
-from .live.danmaku import DanmakuHandler, DanmakuEvaluator
-from .live.response_generator import DanmakuResponseGenerator
+from typing import TYPE_CHECKING
+
+from ._lazy import lazy_exports
+
+# 子模块按需加载（PEP 562）：`import echuu` 不会连带导入引擎、NumPy、dotenv 等，
+# 第一次访问 echuu.EchuuLiveEngine 之类的属性时才导入对应模块。
+_LAZY_IMPORTS = {
+    # Main engine
+    "EchuuLiveEngine": ".live.engine",
+    # Core
+    "StoryNucleus": ".core.story_nucleus",
+    "EmotionMixer": ".core.emotion_mixer",
+    "EmotionConfig": ".core.emotion_mixer",
+    "TriggerBank": ".core.trigger_bank",
+    "TriggerTemplate": ".core.trigger_bank",
+    "DigressionDB": ".core.digression_db",
+    "StructureBreaker": ".core.structure_breaker",
+    "PatternAnalyzer": ".core.pattern_analyzer",
+    "DramaAmplifier": ".core.drama_amplifier",
+    # PerformerCue
+    "PerformerCue": ".core.performer_cue",
+    "EmotionCue": ".core.performer_cue",
+    "GestureCue": ".core.performer_cue",
+    "LookCue": ".core.performer_cue",
+    "BlinkCue": ".core.performer_cue",
+    "LipsyncCue": ".core.performer_cue",
+    "CameraCue": ".core.performer_cue",
+    "EmotionKey": ".core.performer_cue",
+    "LookTarget": ".core.performer_cue",
+    "BlinkMode": ".core.performer_cue",
+    "infer_emotion_from_text": ".core.performer_cue",
+    # VRM
+    "VRMExpressionMapper": ".vrm.mapper",
+    "VRMVersion": ".vrm.mapper",
+    "GESTURE_PRESETS": ".vrm.presets",
+    "GestureCategory": ".vrm.presets",
+    "get_gesture_by_emotion": ".vrm.presets",
+    # Generators
+    "ScriptGeneratorV4": ".generators.script_generator_v4",
+    "ScriptGeneratorV4_1": ".generators.script_generator_v4",
+    "ScriptLineV4": ".generators.script_generator_v4",
+    "ExampleSampler": ".generators.example_sampler",
+    # Live
+    "Danmaku": ".live.state",
+    "PerformerMemory": ".live.state",
+    "PerformanceState": ".live.state",
+    "PerformerV3": ".live.performer",
+    "LLMClient": ".live.llm_client",
+    "TTSClient": ".live.tts_client",
+    "DanmakuHandler": ".live.danmaku",
+    "DanmakuEvaluator": ".live.danmaku",
+    "DanmakuResponseGenerator": ".live.response_generator",
+}
+
+
+__getattr__, __dir__ = lazy_exports(__name__, globals(), _LAZY_IMPORTS)
+
+if TYPE_CHECKING:
+    # Main engine - the primary entry point
+    from .live.engine import EchuuLiveEngine
+
+    # Core components for customization
+    from .core.story_nucleus import StoryNucleus
+    from .core.emotion_mixer import EmotionMixer, EmotionConfig
+    from .core.trigger_bank import TriggerBank, TriggerTemplate
+    from .core.digression_db import DigressionDB
+    from .core.structure_breaker import StructureBreaker
+    from .core.pattern_analyzer import PatternAnalyzer
+    from .core.drama_amplifier import DramaAmplifier
+
+    # PerformerCue - Expression and gesture annotation
+    from .core.performer_cue import (
+        PerformerCue,
+        EmotionCue,
+        GestureCue,
+        LookCue,
+        BlinkCue,
+        LipsyncCue,
+        CameraCue,
+        EmotionKey,
+        LookTarget,
+        BlinkMode,
+        infer_emotion_from_text,
+    )
+
+    # VRM mapping
+    from .vrm.mapper import VRMExpressionMapper, VRMVersion
+    from .vrm.presets import GESTURE_PRESETS, GestureCategory, get_gesture_by_emotion
+
+    # Generators
+    from .generators.script_generator_v4 import ScriptGeneratorV4, ScriptGeneratorV4_1, ScriptLineV4
+    from .generators.example_sampler import ExampleSampler
+
+    # Live performance components
+    from .live.state import Danmaku, PerformerMemory, PerformanceState
+    from .live.performer import PerformerV3
+    from .live.llm_client import LLMClient
+    from .live.tts_client import TTSClient
+    from .live.danmaku import DanmakuHandler, DanmakuEvaluator
+    from .live.response_generator import DanmakuResponseGenerator
 
 __all__ = [
     # Version
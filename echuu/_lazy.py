@@ -0,0 +1,31 @@
+"""
+PEP 562 按需导入。
+
+包的 __init__ 只声明“属性名 -> 子模块”的映射，第一次访问属性时才导入子模块：
+
+    __getattr__, __dir__ = lazy_exports(__name__, globals(), {"EchuuLiveEngine": ".live.engine"})
+"""
+
+from __future__ import annotations
+
+from importlib import import_module
+from typing import Callable, Dict, List, Tuple
+
+
+def lazy_exports(
+    package: str, namespace: Dict, exports: Dict[str, str]
+) -> Tuple[Callable[[str], object], Callable[[], List[str]]]:
+    """生成包级 __getattr__ / __dir__。"""
+
+    def __getattr__(name: str):
+        module_name = exports.get(name)
+        if module_name is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(import_module(module_name, package), name)
+        namespace[name] = value  # 之后直接命中模块字典，不再经过 __getattr__
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(namespace) | set(exports))
+
+    return __getattr__, __dir__
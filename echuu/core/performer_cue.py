@@ -137,15 +137,17 @@ class BlinkCue:
 class LipsyncCue:
     """口型标注 - 预留字段，实际由音频驱动"""
     enabled: bool = True
-    # 以下字段由实时音频分析填充
+    # 以下字段由实时音频分析填充（echuu.live.lipsync，发声帧上的平均权重）
     aa: float = 0.0
     ih: float = 0.0
     ou: float = 0.0
     ee: float = 0.0
     oh: float = 0.0
+    # 逐帧口型轨（VisemeTrack.to_dict()），分析过音频时才有
+    track: Optional[Dict[str, Any]] = None
 
     def to_dict(self) -> Dict[str, Any]:
-        return {
+        result = {
             "enabled": self.enabled,
             "aa": self.aa,
             "ih": self.ih,
@@ -153,6 +155,9 @@ class LipsyncCue:
             "ee": self.ee,
             "oh": self.oh,
         }
+        if self.track is not None:
+            result["track"] = self.track
+        return result
 
 
 @dataclass
@@ -8,8 +8,22 @@ This module contains:
 - ExampleSampler: Few-shot learning from real clips
 """
 
-from .script_generator_v4 import ScriptGeneratorV4, ScriptGeneratorV4_1, ScriptLineV4
-from .example_sampler import ExampleSampler
+from typing import TYPE_CHECKING
+
+from .._lazy import lazy_exports
+
+_LAZY_IMPORTS = {
+    "ScriptGeneratorV4": ".script_generator_v4",
+    "ScriptGeneratorV4_1": ".script_generator_v4",
+    "ScriptLineV4": ".script_generator_v4",
+    "ExampleSampler": ".example_sampler",
+}
+
+__getattr__, __dir__ = lazy_exports(__name__, globals(), _LAZY_IMPORTS)
+
+if TYPE_CHECKING:
+    from .script_generator_v4 import ScriptGeneratorV4, ScriptGeneratorV4_1, ScriptLineV4
+    from .example_sampler import ExampleSampler
 
 __all__ = [
     "ScriptGeneratorV4",
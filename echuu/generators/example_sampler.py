@@ -7,7 +7,7 @@ from __future__ import annotations
 import json
 import random
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Tuple
 
 
 class ExampleSampler:
@@ -81,6 +81,19 @@ class ExampleSampler:
             else:
                 self.by_structure["linear"].append(clip)
 
+        # 按语言预先建好索引，采样时不必每次过滤全部 clips
+        self.by_language: Dict[str, List[Dict]] = {}
+        self._high_emotion_by_language: Dict[str, List[Dict]] = {}
+        self._digressive_by_language: Dict[str, List[Dict]] = {}
+        for clip in self.clips:
+            self.by_language.setdefault(clip.get("language"), []).append(clip)
+        for clip in self.by_emotion["high_emotion"]:
+            self._high_emotion_by_language.setdefault(clip.get("language"), []).append(clip)
+        for clip in self.by_structure["digressive"]:
+            self._digressive_by_language.setdefault(clip.get("language"), []).append(clip)
+        self._clip_ids = {id(clip) for clip in self.clips}
+        self._segments_cache: Dict[Tuple[int, int], str] = {}
+
         print(
             "   情绪分类: 高情绪={}, 日常={}, 叙事={}".format(
                 len(self.by_emotion["high_emotion"]),
@@ -99,13 +112,9 @@ class ExampleSampler:
     def sample_diverse(self, n: int = 3, language: str = None) -> List[Dict]:
         """采样 n 个多样化的 examples。"""
         if language:
-            available = [c for c in self.clips if c.get("language") == language]
-            high_emotion = [
-                c for c in self.by_emotion["high_emotion"] if c.get("language") == language
-            ]
-            digressive = [
-                c for c in self.by_structure["digressive"] if c.get("language") == language
-            ]
+            available = self.by_language.get(language, [])
+            high_emotion = self._high_emotion_by_language.get(language, [])
+            digressive = self._digressive_by_language.get(language, [])
         else:
             available = self.clips
             high_emotion = self.by_emotion["high_emotion"]
@@ -134,7 +143,18 @@ class ExampleSampler:
         return samples
 
     def extract_transcript_segments(self, clip: Dict, max_segments: int = 3) -> str:
-        """从一个 clip 中提取有代表性的 transcript 片段。"""
+        """从一个 clip 中提取有代表性的 transcript 片段（结果按 clip 缓存）。"""
+        # 只缓存自己加载的 clips（只读、生命周期与采样器相同，id 不会被复用）
+        if id(clip) not in self._clip_ids:
+            return self._extract_transcript_segments(clip, max_segments)
+        key = (id(clip), max_segments)
+        result = self._segments_cache.get(key)
+        if result is None:
+            result = self._extract_transcript_segments(clip, max_segments)
+            self._segments_cache[key] = result
+        return result
+
+    def _extract_transcript_segments(self, clip: Dict, max_segments: int) -> str:
         transcript = clip.get("transcript", [])
         if not transcript:
             return ""
@@ -6,27 +6,71 @@ This module contains:
 - PerformerV3: Real-time script execution with danmaku handling
 - LLMClient: Claude API wrapper
 - TTSClient: Text-to-speech synthesis
-- State classes: Danmaku, PerformerMemory, PerformanceState
-- Danmaku handling: DanmakuHandler, DanmakuEvaluator
+- ScriptedLLM / SyntheticTTS: Offline backends for replay and benchmarks
+- TTSPrefetcher: Look-ahead TTS synthesis for upcoming script lines
+- TTSCache: Content-addressed on-disk cache of synthesized audio
+- SpeculativeResponder: Pre-generated danmaku responses during line playback
+- State classes: Danmaku, DanmakuQueue, PerformerMemory, PerformanceState
+- Danmaku handling: DanmakuHandler, DanmakuEvaluator, DanmakuAggregator
 """
 
-from .engine import EchuuLiveEngine
-from .performer import PerformerV3
-from .llm_client import LLMClient
-from .tts_client import TTSClient
-from .state import Danmaku, PerformerMemory, PerformanceState
-from .danmaku import DanmakuHandler, DanmakuEvaluator
-from .response_generator import DanmakuResponseGenerator
+from typing import TYPE_CHECKING
+
+from .._lazy import lazy_exports
+
+# 按需导入：`import echuu.live` 不会加载引擎、NumPy 等，访问属性时才导入对应子模块
+_LAZY_IMPORTS = {
+    "EchuuLiveEngine": ".engine",
+    "PerformerV3": ".performer",
+    "LLMClient": ".llm_client",
+    "TTSClient": ".tts_client",
+    "ScriptedLLM": ".offline",
+    "SyntheticTTS": ".offline",
+    "TTSPrefetcher": ".tts_prefetch",
+    "TTSCache": ".tts_cache",
+    "SpeculativeResponder": ".speculative",
+    "Danmaku": ".state",
+    "DanmakuQueue": ".state",
+    "PerformerMemory": ".state",
+    "PerformanceState": ".state",
+    "DanmakuHandler": ".danmaku",
+    "DanmakuEvaluator": ".danmaku",
+    "DanmakuAggregator": ".aggregator",
+    "DanmakuResponseGenerator": ".response_generator",
+}
+
+__getattr__, __dir__ = lazy_exports(__name__, globals(), _LAZY_IMPORTS)
+
+if TYPE_CHECKING:
+    from .engine import EchuuLiveEngine
+    from .performer import PerformerV3
+    from .llm_client import LLMClient
+    from .tts_client import TTSClient
+    from .offline import ScriptedLLM, SyntheticTTS
+    from .tts_prefetch import TTSPrefetcher
+    from .tts_cache import TTSCache
+    from .speculative import SpeculativeResponder
+    from .state import Danmaku, DanmakuQueue, PerformerMemory, PerformanceState
+    from .danmaku import DanmakuHandler, DanmakuEvaluator
+    from .aggregator import DanmakuAggregator
+    from .response_generator import DanmakuResponseGenerator
 
 __all__ = [
     "EchuuLiveEngine",
     "PerformerV3",
     "LLMClient",
     "TTSClient",
+    "ScriptedLLM",
+    "SyntheticTTS",
+    "TTSPrefetcher",
+    "TTSCache",
+    "SpeculativeResponder",
     "Danmaku",
+    "DanmakuQueue",
     "PerformerMemory",
     "PerformanceState",
     "DanmakuHandler",
     "DanmakuEvaluator",
+    "DanmakuAggregator",
     "DanmakuResponseGenerator",
 ]
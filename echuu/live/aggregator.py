@@ -0,0 +1,187 @@
+"""
+近似重复弹幕聚合。
+
+刷屏（“哈哈哈哈”“真的假的”、复制粘贴的梗）在滑动窗口内合并成一条代表弹幕，
+代表弹幕的 count 记录合并条数，用于优先级加成和“好多人在问…”的复读。
+"""
+
+from __future__ import annotations
+
+import re
+import time
+import unicodedata
+import zlib
+from collections import deque
+from typing import TYPE_CHECKING, Callable, Deque, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    from .state import Danmaku
+
+_NON_WORD_RE = re.compile(r"[\W_]+", re.UNICODE)
+_REPEAT_RE = re.compile(r"(.)\1{2,}")
+
+# MinHash 用的大素数（2^61 - 1）
+_MERSENNE_PRIME = (1 << 61) - 1
+
+
+def normalize_text(text: str) -> str:
+    """归一化：全半角统一、小写、去标点空白，连续重复 3 次以上的字符压成 2 个。"""
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = _NON_WORD_RE.sub("", text)
+    return _REPEAT_RE.sub(r"\1\1", text)
+
+
+class _Cluster:
+    __slots__ = ("danmaku", "norm", "signature", "bands", "last_seen")
+
+    def __init__(
+        self,
+        danmaku: Danmaku,
+        norm: str,
+        signature: np.ndarray,
+        bands: List[Tuple[int, bytes]],
+        now: float,
+    ):
+        self.danmaku = danmaku
+        self.norm = norm
+        self.signature = signature
+        self.bands = bands
+        self.last_seen = now
+
+
+class DanmakuAggregator:
+    """
+    滑动窗口内的近似重复弹幕聚合器。
+
+    - 先按归一化文本精确匹配
+    - 再用字符 shingle 的 MinHash + LSH 分桶找候选，估计 Jaccard 相似度 >= threshold 即合并
+    - 代表弹幕最后一次被刷到之后 window 秒内没有新的重复，就移出窗口
+    - SC 是付费弹幕，永不合并
+    """
+
+    def __init__(
+        self,
+        window: float = 10.0,
+        threshold: float = 0.6,
+        num_perm: int = 32,
+        bands: int = 8,
+        shingle_size: int = 2,
+        clock: Callable[[], float] = time.monotonic,
+        seed: int = 1,
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm 必须能被 bands 整除")
+        self.window = window
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.clock = clock
+        self.seed = seed
+        # MinHash 排列系数在第一次需要签名时才生成（NumPy 按需导入）
+        self._a = self._b = None
+
+        self._by_norm: Dict[str, _Cluster] = {}
+        self._buckets: Dict[Tuple[int, bytes], List[_Cluster]] = {}
+        self._order: Deque[Tuple[float, _Cluster]] = deque()
+        self.stats = {"merged": 0, "clusters": 0}
+
+    def add(self, danmaku: Danmaku, now: Optional[float] = None) -> Danmaku:
+        """
+        放入一条弹幕，返回它所属的代表弹幕。
+
+        返回值就是 danmaku 本身时，说明它是新的代表、需要进入队列；
+        否则它已合并进窗口内的代表弹幕（代表的 count 已加一）。
+        """
+        now = self.clock() if now is None else now
+        self._expire(now)
+        if danmaku.is_sc:
+            return danmaku
+
+        norm = normalize_text(danmaku.text)
+        if not norm:
+            return danmaku
+
+        cluster = self._by_norm.get(norm)
+        signature = None
+        if cluster is None:
+            signature = self._signature(norm)
+            cluster = self._find_similar(signature)
+
+        if cluster is not None:
+            cluster.danmaku.count += 1
+            cluster.last_seen = now
+            self._order.append((now, cluster))
+            self.stats["merged"] += 1
+            return cluster.danmaku
+
+        bands = self._band_keys(signature)
+        cluster = _Cluster(danmaku, norm, signature, bands, now)
+        self._by_norm[norm] = cluster
+        for key in bands:
+            self._buckets.setdefault(key, []).append(cluster)
+        self._order.append((now, cluster))
+        self.stats["clusters"] += 1
+        return danmaku
+
+    def _shingles(self, norm: str) -> List[str]:
+        k = self.shingle_size
+        if len(norm) <= k:
+            return [norm]
+        return [norm[i : i + k] for i in range(len(norm) - k + 1)]
+
+    def _signature(self, norm: str) -> np.ndarray:
+        import numpy as np
+
+        if self._a is None:
+            rng = np.random.default_rng(self.seed)
+            # 系数取 32 位、shingle 哈希也是 32 位，a * x + b 不会超出 uint64
+            self._a = rng.integers(1, 1 << 32, size=self.num_perm, dtype=np.uint64)
+            self._b = rng.integers(0, 1 << 32, size=self.num_perm, dtype=np.uint64)
+
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode("utf-8")) for s in set(self._shingles(norm))), dtype=np.uint64
+        )
+        # (a * x + b) mod p，对每个排列取最小值
+        values = (self._a[:, None] * hashes[None, :] + self._b[:, None]) % np.uint64(_MERSENNE_PRIME)
+        return values.min(axis=1)
+
+    def _band_keys(self, signature: np.ndarray) -> List[Tuple[int, bytes]]:
+        return [
+            (band, signature[band * self.rows : (band + 1) * self.rows].tobytes())
+            for band in range(self.bands)
+        ]
+
+    def _find_similar(self, signature: np.ndarray) -> Optional[_Cluster]:
+        best, best_sim = None, self.threshold
+        seen = set()
+        for key in self._band_keys(signature):
+            for cluster in self._buckets.get(key, ()):
+                if id(cluster) in seen:
+                    continue
+                seen.add(id(cluster))
+                sim = float((cluster.signature == signature).mean())
+                if sim >= best_sim:
+                    best, best_sim = cluster, sim
+        return best
+
+    def _expire(self, now: float):
+        cutoff = now - self.window
+        while self._order and self._order[0][0] <= cutoff:
+            _, cluster = self._order.popleft()
+            if cluster.last_seen > cutoff or self._by_norm.get(cluster.norm) is not cluster:
+                continue
+            # 最后一次出现已经超出窗口
+            del self._by_norm[cluster.norm]
+            for key in cluster.bands:
+                bucket = self._buckets.get(key)
+                if bucket and cluster in bucket:
+                    bucket.remove(cluster)
+                    if not bucket:
+                        del self._buckets[key]
+
+    def __len__(self) -> int:
+        return len(self._by_norm)
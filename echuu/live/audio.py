@@ -0,0 +1,90 @@
+"""
+音频工具函数（PCM/WAV 封装与解析）。
+"""
+
+from __future__ import annotations
+
+import struct
+from typing import List, Tuple
+
+
+def wav_header(data_size: int, sample_rate: int = 24000, channels: int = 1, sample_width: int = 2) -> bytes:
+    """标准 44 字节 PCM WAV 文件头（data_size 为 PCM 字节数）。"""
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF",
+        36 + data_size,
+        b"WAVE",
+        b"fmt ",
+        16,
+        1,
+        channels,
+        sample_rate,
+        sample_rate * channels * sample_width,
+        channels * sample_width,
+        sample_width * 8,
+        b"data",
+        data_size,
+    )
+
+
+def pcm_to_wav(pcm_data: bytes, sample_rate: int = 24000, channels: int = 1, sample_width: int = 2) -> bytes:
+    """将 PCM 数据封装为 WAV。"""
+    return wav_header(len(pcm_data), sample_rate, channels, sample_width) + pcm_data
+
+
+def is_wav(data: bytes) -> bool:
+    """判断是否为 RIFF/WAVE 数据。"""
+    return len(data) >= 12 and data[:4] == b"RIFF" and data[8:12] == b"WAVE"
+
+
+def parse_wav(data: bytes) -> Tuple[bytes, int, int, int]:
+    """
+    解析 WAV，返回 (pcm, sample_rate, channels, sample_width)。
+
+    依次遍历 chunk，兼容带 LIST 等附加 chunk 的文件。
+    """
+    if not is_wav(data):
+        raise ValueError("不是有效的 WAV 数据")
+
+    sample_rate, channels, sample_width = 24000, 1, 2
+    pos = 12
+    while pos + 8 <= len(data):
+        chunk_id, chunk_size = struct.unpack_from("<4sI", data, pos)
+        body = pos + 8
+        if chunk_id == b"fmt ":
+            _, channels, sample_rate, _, _, bits = struct.unpack_from("<HHIIHH", data, body)
+            sample_width = bits // 8
+        elif chunk_id == b"data":
+            end = min(body + chunk_size, len(data))
+            return data[body:end], sample_rate, channels, sample_width
+        pos = body + chunk_size + (chunk_size & 1)
+
+    raise ValueError("WAV 中没有 data chunk")
+
+
+def wav_to_pcm(data: bytes) -> bytes:
+    """取出 WAV 中的 PCM 数据；非 WAV 数据原样返回。"""
+    if not is_wav(data):
+        return data
+    return parse_wav(data)[0]
+
+
+def join_audio(clips: List[bytes]) -> bytes:
+    """拼接多段音频：WAV 合并 PCM 后重新封装，其余格式（如 mp3）直接按帧拼接。"""
+    clips = [c for c in clips if c]
+    if not clips:
+        return b""
+    if all(is_wav(c) for c in clips):
+        _, sample_rate, channels, sample_width = parse_wav(clips[0])
+        pcm = b"".join(wav_to_pcm(c) for c in clips)
+        return pcm_to_wav(pcm, sample_rate=sample_rate, channels=channels, sample_width=sample_width)
+    return b"".join(clips)
+
+
+def wav_duration(data: bytes) -> float:
+    """WAV 音频时长（秒）；非 WAV 数据返回 0。"""
+    if not data or not is_wav(data):
+        return 0.0
+    pcm, sample_rate, channels, sample_width = parse_wav(data)
+    return len(pcm) / float(sample_rate * channels * sample_width)
@@ -0,0 +1,217 @@
+"""
+按内容寻址的音频分发。
+
+推送模式下每步音频都 base64 后塞进 JSON，发给每一个连接：带宽与 音频大小 × 观众数
+成正比。引用模式下服务端只把音频写一次到 output/scripts/<session>/<hash>.wav，
+广播的消息里只带 audio_url 与 audio_hash，观众通过 /audio 静态路由自行拉取。
+
+    store = AudioStore(SCRIPTS_DIR)
+    ref = store.put(session_id, audio, fmt="pcm")
+    await room.broadcast({..., **ref.to_dict()})
+
+    app.mount("/audio", audio_static_files(SCRIPTS_DIR), name="audio")
+
+文件名就是内容哈希，内容永远不变：audio_static_files 为这类文件返回以哈希为值的
+强 ETag 与一年的 immutable 缓存头，并支持单段 Range 请求（<audio> 拖动进度、
+断点续传），浏览器缓存与前置的缓存代理都可以直接复用。其他文件（step_0.wav、
+剧本 JSON 等旧路径）按 mtime + 大小生成 ETag，每次使用前重新校验。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+from urllib.parse import quote
+
+from .audio import is_wav
+
+HASH_LENGTH = 32  # sha256 前 128 位
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+_HASH_NAME = re.compile(rf"^[0-9a-f]{{{HASH_LENGTH}}}$")
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+@dataclass
+class AudioRef:
+    """一段已写入存储的音频。"""
+
+    url: str
+    hash: str
+    path: Path
+    size: int
+
+    def to_dict(self) -> Dict[str, object]:
+        """广播消息中的字段。"""
+        return {"audio_url": self.url, "audio_hash": self.hash, "audio_size": self.size}
+
+
+def audio_extension(audio: bytes, fmt: str = "pcm") -> str:
+    """音频文件扩展名：WAV（含 pcm 封装的 WAV）为 .wav，其余按 TTS 输出格式。"""
+    fmt = (fmt or "pcm").lower()
+    if is_wav(audio) or fmt in ("pcm", "wav"):
+        return ".wav"
+    return f".{fmt}"
+
+
+class AudioStore:
+    """内容寻址的音频存储（线程安全）；同一会话中内容相同的音频只写一次。"""
+
+    def __init__(self, root: Union[str, Path], url_prefix: str = "/audio"):
+        self.root = Path(root)
+        self.url_prefix = url_prefix.rstrip("/")
+        self._lock = threading.Lock()
+        self.stats = {"writes": 0, "reused": 0, "bytes": 0}
+
+    @staticmethod
+    def content_hash(audio: bytes) -> str:
+        return hashlib.sha256(audio).hexdigest()[:HASH_LENGTH]
+
+    def put(self, session: str, audio: bytes, fmt: str = "pcm") -> AudioRef:
+        """
+        写入一段音频并返回引用（已存在时直接复用）。
+
+        Args:
+            session: 会话目录名（output/scripts 下的子目录）
+            audio: 音频数据
+            fmt: TTS 输出格式，决定扩展名
+        """
+        digest = self.content_hash(audio)
+        name = f"{digest}{audio_extension(audio, fmt)}"
+        path = self.root / session / name
+        with self._lock:
+            if path.exists():
+                self.stats["reused"] += 1
+            else:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+                tmp.write_bytes(audio)
+                os.replace(tmp, path)
+                self.stats["writes"] += 1
+                self.stats["bytes"] += len(audio)
+        url = f"{self.url_prefix}/{quote(session)}/{name}"
+        return AudioRef(url=url, hash=digest, path=path, size=len(audio))
+
+
+def is_content_addressed(path: Union[str, Path]) -> bool:
+    """文件名是否为内容哈希（AudioStore 写出的文件）。"""
+    return bool(_HASH_NAME.match(Path(path).stem))
+
+
+def etag_for(path: Union[str, Path], stat_result: os.stat_result) -> str:
+    """强 ETag：内容寻址文件用哈希本身，其余文件用 mtime 与大小。"""
+    if is_content_addressed(path):
+        return f'"{Path(path).stem}"'
+    return f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+
+
+def cache_control_for(path: Union[str, Path]) -> str:
+    return IMMUTABLE_CACHE_CONTROL if is_content_addressed(path) else REVALIDATE_CACHE_CONTROL
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    解析单段 Range 请求头，返回闭区间 (start, end)。
+
+    没有 Range、格式不支持（包括多段）时返回 None，按整份文件响应；
+    区间不可满足时抛出 ValueError（对应 416）。
+    """
+    if not header:
+        return None
+    match = _RANGE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # bytes=-N：最后 N 字节
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError("unsatisfiable range")
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError("unsatisfiable range")
+    return start, end
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    tags = [t.strip() for t in header.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+_static_files_class = None
+
+
+def _build_static_files_class():
+    from starlette.datastructures import Headers
+    from starlette.responses import FileResponse, Response
+    from starlette.staticfiles import StaticFiles
+
+    class AudioStaticFiles(StaticFiles):
+        """带强 ETag、Range 与长缓存的静态音频目录。"""
+
+        def file_response(self, full_path, stat_result, scope, status_code=200):
+            request_headers = Headers(scope=scope)
+            etag = etag_for(full_path, stat_result)
+            headers = {
+                "etag": etag,
+                "cache-control": cache_control_for(full_path),
+                "accept-ranges": "bytes",
+            }
+            if _etag_matches(request_headers.get("if-none-match"), etag):
+                return Response(status_code=304, headers=headers)
+
+            size = stat_result.st_size
+            range_header = request_headers.get("range")
+            if_range = request_headers.get("if-range")
+            if if_range and if_range.strip() != etag:
+                range_header = None  # 文件已变化，返回整份
+            try:
+                byte_range = parse_range(range_header, size)
+            except ValueError:
+                return Response(
+                    status_code=416, headers={**headers, "content-range": f"bytes */{size}"}
+                )
+            if byte_range is not None:
+                start, end = byte_range
+                with open(full_path, "rb") as f:
+                    f.seek(start)
+                    content = f.read(end - start + 1)
+                headers["content-range"] = f"bytes {start}-{end}/{size}"
+                media_type = mimetypes.guess_type(str(full_path))[0] or "application/octet-stream"
+                return Response(
+                    content if scope["method"] != "HEAD" else b"",
+                    status_code=206,
+                    headers={**headers, "content-length": str(len(content))},
+                    media_type=media_type,
+                )
+
+            return FileResponse(
+                full_path,
+                status_code=status_code,
+                stat_result=stat_result,
+                headers=headers,
+                method=scope["method"],
+            )
+
+    return AudioStaticFiles
+
+
+def audio_static_files(directory: Union[str, Path]):
+    """创建挂载到 /audio 的静态文件应用（需要 starlette，即 FastAPI 服务端）。"""
+    global _static_files_class
+    if _static_files_class is None:
+        _static_files_class = _build_static_files_class()
+    return _static_files_class(directory=str(directory))
@@ -0,0 +1,95 @@
+"""
+性能基准。
+
+    python -m echuu.live.benchmark --count 20000
+
+- evaluate: 弹幕逐条评估 vs 批量评估（条/秒）
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from typing import Dict, List, Optional
+
+from .danmaku import DanmakuEvaluator
+from .state import Danmaku, PerformanceState, PerformerMemory
+
+_SAMPLE_TEXTS = [
+    "哈哈哈哈",
+    "真的假的？",
+    "上司 后来怎么样了？",
+    "笑死 这也太离谱了",
+    "主播 年会 抽到什么了",
+    "woc",
+    "前排",
+    "八卦 快说！",
+    "SC ¥50 主播加油",
+    "SC ¥200 想听 上司 的后续",
+    "晚上好",
+    "啊这",
+]
+
+
+def make_danmaku_burst(count: int, seed: int = 0) -> List[Danmaku]:
+    """生成一批模拟弹幕。"""
+    rnd = random.Random(seed)
+    return [
+        Danmaku.from_text(rnd.choice(_SAMPLE_TEXTS), user=f"观众{i}") for i in range(count)
+    ]
+
+
+def make_benchmark_state() -> PerformanceState:
+    memory = PerformerMemory()
+    memory.story_points["mentioned"].extend(["上司 八卦", "公司 年会"])
+    memory.story_points["upcoming"].extend(["上司 后来 辞职", "年会 抽奖"])
+    return PerformanceState(
+        name="六螺",
+        persona="爱吐槽的女主播",
+        background="前上班族",
+        topic="上司 八卦",
+        memory=memory,
+    )
+
+
+def bench_evaluate(count: int = 20000, repeat: int = 3, seed: int = 0) -> Dict[str, float]:
+    """比较逐条评估与批量评估的吞吐（取 repeat 次中最快的一次）。"""
+    state = make_benchmark_state()
+    evaluator = DanmakuEvaluator(seed=seed)
+    burst = make_danmaku_burst(count, seed=seed)
+
+    scalar_best = batch_best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for danmaku in burst:
+            evaluator.evaluate(danmaku, state)
+        scalar_best = min(scalar_best, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        evaluator.evaluate_batch(burst, state)
+        batch_best = min(batch_best, time.perf_counter() - start)
+
+    return {
+        "count": count,
+        "scalar_per_sec": count / scalar_best,
+        "batch_per_sec": count / batch_best,
+        "speedup": scalar_best / batch_best,
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="echuu 性能基准")
+    parser.add_argument("--count", type=int, default=20000, help="每轮弹幕条数")
+    parser.add_argument("--repeat", type=int, default=3, help="重复轮数（取最快）")
+    args = parser.parse_args(argv)
+
+    result = bench_evaluate(count=args.count, repeat=args.repeat)
+    print(f"弹幕评估（{result['count']} 条）")
+    print(f"  逐条: {result['scalar_per_sec']:>12,.0f} 条/秒")
+    print(f"  批量: {result['batch_per_sec']:>12,.0f} 条/秒")
+    print(f"  加速: {result['speedup']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,47 +6,15 @@ from __future__ import annotations
 
 import random
 import re
-from typing import Dict, List
+from typing import AbstractSet, Dict, List, Optional
 
+from .keywords import KeywordExtractor
+from .keywords import extract_keywords  # noqa: F401  保持 danmaku.extract_keywords 的旧导入路径
 from .state import Danmaku, PerformanceState
 
-
-def extract_keywords(text: str) -> List[str]:
-    """提取关键词（简单版）。"""
-    text = re.sub(r"[，。！？、：；\"\"''（）【】《》…~]", " ", text)
-    words = text.split()
-    stopwords = {
-        "的",
-        "了",
-        "在",
-        "是",
-        "我",
-        "你",
-        "他",
-        "她",
-        "它",
-        "们",
-        "这",
-        "那",
-        "有",
-        "和",
-        "就",
-        "不",
-        "也",
-        "都",
-        "说",
-        "很",
-        "吗",
-        "吧",
-        "呢",
-        "啊",
-        "哦",
-        "嗯",
-        "哈",
-        "呀",
-    }
-    keywords = [w for w in words if len(w) >= 2 and w not in stopwords]
-    return keywords[:5]
+# 反应类弹幕关键词
+REACTION_KEYWORDS = ["哈哈", "笑死", "真的假的", "！", "牛", "woc", "啊这", "离谱", "绝了"]
+_REACTION_RE = re.compile("|".join(re.escape(kw) for kw in REACTION_KEYWORDS))
 
 
 class DanmakuEvaluator:
@@ -56,13 +24,31 @@ class DanmakuEvaluator:
     priority = base_score + relevance_bonus + sc_bonus
     """
 
+    # 少于该条数时批量评估直接走逐条路径（NumPy 的固定开销不划算）
+    BATCH_MIN_SIZE = 16
+
+    def __init__(self, seed: Optional[int] = None):
+        self._seed = seed
+        self._rng = None
+
+    @property
+    def rng(self):
+        """批量评估用的随机数生成器（首次使用时才导入 NumPy）。"""
+        if self._rng is None:
+            import numpy as np
+
+            self._rng = np.random.default_rng(self._seed)
+        return self._rng
+
+    @rng.setter
+    def rng(self, value):
+        self._rng = value
+
     def evaluate(self, danmaku: Danmaku, state: PerformanceState) -> Danmaku:
         """评估单条弹幕。"""
         if danmaku.is_question():
             base = 0.5
-        elif any(
-            kw in danmaku.text for kw in ["哈哈", "笑死", "真的假的", "！", "牛", "woc", "啊这", "离谱", "绝了"]
-        ):
+        elif any(kw in danmaku.text for kw in REACTION_KEYWORDS):
             base = 0.35
         else:
             base = 0.25
@@ -92,26 +78,84 @@ class DanmakuEvaluator:
         else:
             sc_bonus = 0.0
 
-        danmaku.priority = base + relevance_bonus + sc_bonus
+        danmaku.priority = base + relevance_bonus + sc_bonus + danmaku.crowd_bonus()
         return danmaku
 
+    def evaluate_batch(self, danmaku_list: List[Danmaku], state: PerformanceState) -> List[Danmaku]:
+        """
+        批量评估弹幕（弹幕高峰时使用）。
+
+        逐条只做文本特征提取（问句、反应词、关键词重合数），
+        打分规则与 evaluate() 一致，用 NumPy 数组一次算出并写回 priority / relevance。
+        """
+        count = len(danmaku_list)
+        if count < self.BATCH_MIN_SIZE:
+            for danmaku in danmaku_list:
+                self.evaluate(danmaku, state)
+            return danmaku_list
+
+        import numpy as np
+
+        texts = [dm.text for dm in danmaku_list]
+        story_keywords = self._story_keywords(state)
+        extractor = state.keywords
+
+        # 高峰期重复文本很多：文本特征按去重后的文本计算一次，再按下标展开
+        unique_texts, inverse = np.unique(np.array(texts, dtype=object), return_inverse=True)
+        features = np.array(
+            [
+                (
+                    "?" in t or "？" in t,
+                    _REACTION_RE.search(t) is not None,
+                    self._keyword_overlap(t, story_keywords, extractor),
+                )
+                for t in unique_texts
+            ],
+            dtype=float,
+        ).reshape(-1, 3)[inverse]
+        is_question = features[:, 0] > 0
+        is_reaction = features[:, 1] > 0
+        overlap = features[:, 2]
+        is_sc = np.fromiter((dm.is_sc for dm in danmaku_list), dtype=bool, count=count)
+        amount = np.fromiter((dm.amount for dm in danmaku_list), dtype=float, count=count)
+        repeats = np.fromiter((max(dm.count, 1) for dm in danmaku_list), dtype=float, count=count)
+
+        base = np.where(is_question, 0.5, np.where(is_reaction, 0.35, 0.25))
+        base += np.where(self.rng.random(count) < 0.2, 0.3, 0.0)
+
+        relevance = np.minimum(overlap / 2, 1.0)
+        relevance_bonus = np.select([relevance > 0.7, relevance > 0.4], [0.4, 0.2], 0.0)
+
+        sc_bonus = np.select(
+            [amount >= 200, amount >= 100, amount >= 50], [0.7, 0.5, 0.3], 0.2
+        )
+        sc_bonus = np.where(is_sc, sc_bonus, 0.0)
+
+        crowd = np.minimum(0.3, 0.1 * np.log2(repeats))
+
+        priority = base + relevance_bonus + sc_bonus + crowd
+        for danmaku, p, r in zip(danmaku_list, priority.tolist(), relevance.tolist()):
+            danmaku.priority = p
+            danmaku.relevance = r
+        return danmaku_list
+
     def _calc_relevance(self, text: str, state: PerformanceState) -> float:
         """计算弹幕与当前上下文的相关性。"""
-        story_keywords = set()
-        for info in state.memory.story_points.get("mentioned", []):
-            story_keywords.update(extract_keywords(info))
-        for info in state.memory.story_points.get("upcoming", []):
-            story_keywords.update(extract_keywords(info))
+        story_keywords = self._story_keywords(state)
+        return min(self._keyword_overlap(text, story_keywords, state.keywords) / 2, 1.0)
 
+    def _story_keywords(self, state: PerformanceState) -> AbstractSet[str]:
+        story_keywords = state.memory.story_keywords(state.keywords)
         if not story_keywords:
-            story_keywords.update(extract_keywords(state.topic))
+            story_keywords = set(state.keywords.extract(state.topic))
+        return story_keywords
 
-        danmaku_keywords = set(extract_keywords(text))
+    def _keyword_overlap(
+        self, text: str, story_keywords: AbstractSet[str], extractor: KeywordExtractor
+    ) -> int:
         if not story_keywords:
-            return 0.0
-
-        overlap = len(danmaku_keywords & story_keywords)
-        return min(overlap / 2, 1.0)
+            return 0
+        return sum(1 for kw in set(extractor.extract(text)) if kw in story_keywords)
 
 
 class DanmakuHandler:
@@ -125,9 +169,12 @@ class DanmakuHandler:
         self.evaluator = evaluator
 
     def handle(self, danmaku: Danmaku, state: PerformanceState) -> Dict:
-        """处理弹幕。"""
+        """处理弹幕（评估 + 决策）。"""
         danmaku = self.evaluator.evaluate(danmaku, state)
+        return self.decide(danmaku, state)
 
+    def decide(self, danmaku: Danmaku, state: PerformanceState) -> Dict:
+        """根据已评估的优先级决定是否打断以及行动策略。"""
         if state.current_line_idx >= len(state.script_lines):
             current_cost = 0.2
         else:
@@ -166,6 +213,10 @@ class DanmakuHandler:
         """决定是否复读弹幕。"""
         if danmaku.is_sc:
             return f"诶有SC！有人说：{danmaku.text}"
+        if danmaku.count >= 3:
+            if danmaku.is_question():
+                return f"有好多人在问{danmaku.text}，"
+            return f"好多人在刷{danmaku.text}，"
         if danmaku.priority > 0.5:
             return f"有人说{danmaku.text}，"
         if danmaku.is_question():
@@ -173,23 +224,21 @@ class DanmakuHandler:
         return ""
 
     def _find_answer(self, question: str, state: PerformanceState) -> Dict:
-        """在剧本中查找问题的答案位置。"""
-        keywords = extract_keywords(question)
+        """在剧本中查找问题的答案位置（查 key_info 倒排索引）。"""
+        keywords = state.keywords.extract(question)
         current_idx = state.current_line_idx
 
-        for i, line in enumerate(state.script_lines):
-            if i < current_idx:
-                continue
-            for info in line.key_info:
-                if any(kw in info for kw in keywords):
-                    return {
-                        "found": True,
-                        "line_idx": i,
-                        "distance": i - current_idx,
-                        "answer_hint": info,
-                    }
-
-        return {"found": False}
+        hit = state.answer_index().find(keywords, current_idx)
+        if hit is None:
+            return {"found": False}
+
+        line_idx, info = hit
+        return {
+            "found": True,
+            "line_idx": line_idx,
+            "distance": line_idx - current_idx,
+            "answer_hint": info,
+        }
 
     def _decide_action(self, danmaku: Danmaku, answer_loc: Dict) -> str:
         """决定叙事动作。"""
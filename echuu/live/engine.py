@@ -4,31 +4,24 @@ echuu 实时引擎（解耦版）。
 
 from __future__ import annotations
 
+import asyncio
 import json
-from collections import defaultdict
+import os
+from collections import defaultdict, deque
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Callable, Deque, Dict, List, Optional, Tuple
 
-from dotenv import load_dotenv
-
-from ..core.pattern_analyzer import PatternAnalyzer
-from ..generators.example_sampler import ExampleSampler
-from ..generators.script_generator_v4 import ScriptGeneratorV4
+from ..generators.script_generator_v4 import ScriptGeneratorV4, ScriptLineV4
 from .danmaku import DanmakuEvaluator, DanmakuHandler
 from .llm_client import LLMClient
 from .performer import PerformerV3
+from .resources import SharedResources, get_resources
+from .scheduler import PlaybackScheduler, audio_duration
 from .state import Danmaku, PerformanceState, PerformerMemory
 from .tts_client import TTSClient
 
 
-def _find_project_root() -> Path:
-    root = Path.cwd()
-    while root.name != "echuu-agent" and root.parent != root:
-        root = root.parent
-    return root
-
-
 class EchuuLiveEngine:
     """
     echuu 实时直播引擎（整合版）。
@@ -37,31 +30,47 @@ class EchuuLiveEngine:
     - Phase 2: 实时表演 + 记忆系统 + 弹幕互动
     """
 
-    def __init__(self, data_path: Optional[str] = None):
-        self.project_root = _find_project_root()
-        load_dotenv(self.project_root / ".env")
-
-        self.llm = LLMClient()
-        self.tts = TTSClient()
+    def __init__(
+        self,
+        data_path: Optional[str] = None,
+        llm: Optional[LLMClient] = None,
+        tts: Optional[TTSClient] = None,
+        resources: Optional[SharedResources] = None,
+    ):
+        """
+        Args:
+            llm / tts: 注入自定义后端（例如 offline.ScriptedLLM / SyntheticTTS），
+                不传时使用真实的 Claude / DashScope 客户端
+            resources: 共享的语料与索引；不传时取进程内缓存（见 resources.get_resources），
+                同一进程中的引擎只在第一次构造时加载语料
+        """
+        self.resources = resources or get_resources(data_path=data_path)
+        self.project_root = self.resources.project_root
 
-        self.analyzer = None
-        data_file = Path(data_path) if data_path else self.project_root / "data" / "annotated_clips.json"
-        if data_file.exists():
-            with data_file.open("r", encoding="utf-8") as f:
-                clips = json.load(f)
-            self.analyzer = PatternAnalyzer(clips)
+        self.llm = llm if llm is not None else LLMClient()
+        self.tts = tts if tts is not None else TTSClient()
 
-        clips_file = self.project_root / "data" / "vtuber_raw_clips_for_notebook_full_30_cleaned.jsonl"
-        self.example_sampler = ExampleSampler(str(clips_file)) if clips_file.exists() else None
+        self.analyzer = self.resources.analyzer
+        self.example_sampler = self.resources.example_sampler
 
         self.script_gen = ScriptGeneratorV4(self.llm, self.example_sampler)
         self.danmaku_handler = DanmakuHandler(DanmakuEvaluator())
-        self.performer = PerformerV3(self.llm, self.tts, self.danmaku_handler)
+        self.performer = PerformerV3(
+            self.llm,
+            self.tts,
+            self.danmaku_handler,
+            # 逐帧口型轨每步有几十 KB，默认关闭，需要服务端口型时再开启
+            lipsync=os.getenv("LIPSYNC_ANALYSIS", "0").lower() in ("1", "true", "yes", "on"),
+        )
 
         self.scripts_dir = self.project_root / "output" / "scripts"
         self.scripts_dir.mkdir(parents=True, exist_ok=True)
 
         self.state: Optional[PerformanceState] = None
+        self.scheduler = PlaybackScheduler(realtime=False)
+        # 录音按此时长（秒）滚动分段，None 表示单个文件
+        segment = os.getenv("RECORD_SEGMENT_SECONDS")
+        self.record_segment_seconds: Optional[float] = float(segment) if segment else None
 
     def setup(
         self,
@@ -72,8 +81,13 @@ class EchuuLiveEngine:
         language: str = "zh",
         character_config: Optional[dict] = None,
         on_phase_callback: Optional[callable] = None,
+        prerender_workers: int = 0,
     ) -> PerformanceState:
-        """设置表演参数并生成剧本。"""
+        """
+        设置表演参数并生成剧本。
+
+        prerender_workers > 0 时，剧本生成后立即用这么多线程预渲染全部台词语音（见 prerender_audio）。
+        """
         # 在这里我们可以捕获推理过程并传给回调
         self.state = self.create_performance(
             name=name,
@@ -86,8 +100,66 @@ class EchuuLiveEngine:
         )
         print(f"\n表演设置完成: {name} - {topic}")
         print(f"剧本行数: {len(self.state.script_lines)}")
+        if prerender_workers > 0:
+            self.prerender_audio(max_workers=prerender_workers, on_phase_callback=on_phase_callback)
         return self.state
 
+    def prerender_audio(
+        self,
+        max_workers: int = 4,
+        rate: Optional[float] = None,
+        output_dir: Optional[str] = None,
+        on_phase_callback: Optional[callable] = None,
+    ) -> Dict[str, float]:
+        """
+        并发预渲染全部剧本台词的语音（见 prerender.ScriptPrerenderer）。
+
+        表演时原样念出的台词直接使用预渲染音频，只有弹幕回应需要实时合成。
+
+        Args:
+            max_workers: 并发合成的线程数
+            rate: 每秒最多发起的合成请求数（None 表示不限）
+            output_dir: 另存每行音频的目录（可选）
+            on_phase_callback: 进度回调，消息格式与剧本生成阶段一致
+        """
+        if not self.state:
+            raise RuntimeError("请先调用 setup() 或 create_performance()")
+        if not self.tts.enabled:
+            return {}
+
+        prerenderer = self.performer.prerenderer
+        prerenderer.max_workers = max(1, max_workers)
+        prerenderer.rate = rate
+        lines = [
+            (idx, line.text, self.performer._emotion_boost(line))
+            for idx, line in enumerate(self.state.script_lines)
+        ]
+
+        def on_progress(done: int, total: int):
+            msg = f"Phase 4: 预渲染台词语音 {done}/{total}"
+            print(msg)
+            if on_phase_callback:
+                on_phase_callback(msg)
+
+        stats = prerenderer.render(lines, output_dir=output_dir, on_progress=on_progress)
+        print(
+            f"[TTS] 预渲染完成: {stats['rendered']} 行"
+            f"（失败 {stats['failed']}），耗时 {stats['seconds']:.1f}s"
+        )
+        return stats
+
+    async def aprerender_audio(
+        self,
+        max_workers: int = 4,
+        rate: Optional[float] = None,
+        output_dir: Optional[str] = None,
+        on_phase_callback: Optional[callable] = None,
+    ) -> Dict[str, float]:
+        """预渲染全部台词语音（asyncio 版本，在线程池执行；on_phase_callback 在工作线程中调用）。"""
+        return await asyncio.to_thread(
+            self.prerender_audio, max_workers, rate, output_dir, on_phase_callback
+        )
+
     def create_performance(
         self,
         name: str,
@@ -115,18 +187,65 @@ class EchuuLiveEngine:
 
         self._save_script(script_lines, name, topic)
         self._print_script_preview(script_lines)
+        return self._build_performance(name, persona, background, topic, script_lines, language)
+
+    def load_script(
+        self,
+        path: str,
+        persona: str = "",
+        background: str = "",
+        language: str = "zh",
+    ) -> PerformanceState:
+        """
+        从 _save_script 保存的 JSON 载入剧本，跳过剧本生成（用于回放 / 基准）。
+
+        表演标注（cue）不会还原。
+        """
+        with Path(path).open("r", encoding="utf-8") as f:
+            data = json.load(f)
+        meta = data.get("metadata", {})
+        script_lines = [
+            ScriptLineV4(
+                id=item.get("id", f"line_{i}"),
+                text=item.get("text", ""),
+                stage=item.get("stage", "Unknown"),
+                interruption_cost=item.get("cost", 0.5),
+                key_info=item.get("key_info") or [],
+                disfluencies=item.get("disfluencies") or [],
+                emotion_break=item.get("emotion_break"),
+            )
+            for i, item in enumerate(data.get("script", []))
+        ]
+        self.state = self._build_performance(
+            name=meta.get("name", "主播"),
+            persona=persona,
+            background=background,
+            topic=meta.get("topic", ""),
+            script_lines=script_lines,
+            language=language,
+        )
+        print(f"剧本已载入: {path}（{len(script_lines)} 行）")
+        return self.state
 
-        catchphrases = []
-        if self.analyzer:
-            catchphrases = [cp for cp, _ in self.analyzer.extract_catchphrases(language)[:5]]
+    def _build_performance(
+        self,
+        name: str,
+        persona: str,
+        background: str,
+        topic: str,
+        script_lines: List[ScriptLineV4],
+        language: str = "zh",
+    ) -> PerformanceState:
+        """由剧本构建表演状态（初始化记忆、关键词词典）。"""
+        self.performer.prerenderer.reset()  # 上一份剧本的预渲染音频作废
+        catchphrases = self.resources.catchphrases(language)
 
         memory = PerformerMemory()
         memory.script_progress["total_lines"] = len(script_lines)
         memory.script_progress["current_stage"] = script_lines[0].stage if script_lines else "Unknown"
         for line in script_lines:
             memory.story_points["upcoming"].extend(line.key_info)
-
-        return PerformanceState(
+        state = PerformanceState(
             name=name,
             persona=persona,
             background=background,
@@ -135,6 +254,38 @@ class EchuuLiveEngine:
             memory=memory,
             catchphrases=catchphrases,
         )
+        # 本场的 key_info 与口癖只进本场的叠加词典，不污染其他房间共用的语料词典
+        state.keywords.add_terms([info for line in script_lines for info in line.key_info] + catchphrases)
+        return state
+
+    async def asetup(
+        self,
+        name: str,
+        persona: str,
+        topic: str,
+        background: str = "",
+        language: str = "zh",
+        character_config: Optional[dict] = None,
+        on_phase_callback: Optional[callable] = None,
+        prerender_workers: int = 0,
+    ) -> PerformanceState:
+        """
+        设置表演参数并生成剧本（asyncio 版本）。
+
+        剧本生成是多轮阻塞式 LLM 调用，放到线程池执行，避免阻塞事件循环。
+        on_phase_callback 会在工作线程中被调用。
+        """
+        return await asyncio.to_thread(
+            self.setup,
+            name=name,
+            persona=persona,
+            topic=topic,
+            background=background,
+            language=language,
+            character_config=character_config,
+            on_phase_callback=on_phase_callback,
+            prerender_workers=prerender_workers,
+        )
 
     def run(
         self,
@@ -142,23 +293,121 @@ class EchuuLiveEngine:
         danmaku_sim: Optional[List[Dict]] = None,
         play_audio: bool = False,
         save_audio: bool = False,
+        prefetch_lines: int = 0,
+        live_danmaku_getter: Optional[Callable[[int], List[Dict]]] = None,
+        on_audio_chunk: Optional[Callable[[Dict], None]] = None,
+        speculate_danmaku: int = 0,
+        realtime: bool = False,
+        lead_time: float = 0.5,
     ):
         """
         运行表演（生成器）。
+
+        Args:
+            danmaku_sim: 模拟弹幕，带 step 的按步投放，带 time（开播后秒数）的按播放时间投放
+            prefetch_lines: TTS 预取行数，>0 时在当前台词播放期间后台合成后续台词
+            live_danmaku_getter: 每步调用一次，返回该步新到达的实时弹幕
+                （可带 received_at：到达时的 time.monotonic()，用于按真实等待时间衰减优先级）
+            on_audio_chunk: 传入时按分句流式合成，音频分片到达即回调
+            speculate_danmaku: 每步结束后为队列中前 N 条弹幕预生成回应，0 表示关闭
+            realtime: 按播放时间调度，下一步在当前音频播完前 lead_time 秒开始（见 PlaybackScheduler）
+        """
+        danmaku_by_step, timed_danmaku = self._prepare_run(
+            danmaku_sim, save_audio, prefetch_lines, speculate_danmaku, realtime, lead_time
+        )
+
+        total_steps = min(max_steps, len(self.state.script_lines))
+        try:
+            for step in range(total_steps):
+                new_danmaku = self._collect_danmaku(
+                    step, danmaku_by_step, live_danmaku_getter, timed_danmaku
+                )
+                result = self.performer.step(self.state, new_danmaku, on_audio_chunk=on_audio_chunk)
+                self._log_step(result, play_audio)
+                self._schedule_playback(result)
+
+                yield result
+
+                if result.get("action", "continue") == "end":
+                    break
+                self.scheduler.wait()
+        finally:
+            # 出错或调用方提前停止迭代时同样关闭线程池、写好录音文件头
+            self._finish_run(save_audio)
+
+    async def arun(
+        self,
+        max_steps: int = 12,
+        danmaku_sim: Optional[List[Dict]] = None,
+        play_audio: bool = False,
+        save_audio: bool = False,
+        prefetch_lines: int = 0,
+        live_danmaku_getter: Optional[Callable[[int], List[Dict]]] = None,
+        on_audio_chunk: Optional[Callable[[Dict], None]] = None,
+        speculate_danmaku: int = 0,
+        realtime: bool = False,
+        lead_time: float = 0.5,
+    ):
         """
+        运行表演（异步生成器）。
+
+        与 run() 参数一致；每步通过 PerformerV3.astep 执行，
+        一个事件循环可以同时驱动多个直播间。on_audio_chunk 在工作线程中回调。
+        """
+        danmaku_by_step, timed_danmaku = self._prepare_run(
+            danmaku_sim, save_audio, prefetch_lines, speculate_danmaku, realtime, lead_time
+        )
+
+        total_steps = min(max_steps, len(self.state.script_lines))
+        try:
+            for step in range(total_steps):
+                new_danmaku = self._collect_danmaku(
+                    step, danmaku_by_step, live_danmaku_getter, timed_danmaku
+                )
+                result = await self.performer.astep(
+                    self.state, new_danmaku, on_audio_chunk=on_audio_chunk
+                )
+                self._log_step(result, play_audio)
+                self._schedule_playback(result)
+
+                yield result
+
+                if result.get("action", "continue") == "end":
+                    break
+                await self.scheduler.await_next()
+        finally:
+            # 任务被取消或调用方提前 aclose() 时同样收尾
+            await asyncio.to_thread(self._finish_run, save_audio)
+
+    def _prepare_run(
+        self,
+        danmaku_sim: Optional[List[Dict]],
+        save_audio: bool,
+        prefetch_lines: int,
+        speculate_danmaku: int = 0,
+        realtime: bool = False,
+        lead_time: float = 0.5,
+    ) -> Tuple[Dict[int, List[Danmaku]], Deque[Tuple[float, Danmaku]]]:
+        """表演开始前的准备：整理模拟弹幕、开始录制、启动预取和播放调度。"""
         if not self.state:
             raise RuntimeError("请先调用 setup() 或 create_performance()")
 
         danmaku_by_step = defaultdict(list)
+        timed = []
         if danmaku_sim:
             for dm in danmaku_sim:
-                step = dm.get("step", 0)
-                text = dm.get("text", "")
-                user = dm.get("user", "观众")
-                danmaku_by_step[step].append(Danmaku.from_text(text, user=user))
+                danmaku = Danmaku.from_text(dm.get("text", ""), user=dm.get("user", "观众"))
+                if dm.get("time") is not None:
+                    timed.append((float(dm["time"]), danmaku))
+                else:
+                    danmaku_by_step[dm.get("step", 0)].append(danmaku)
+        timed.sort(key=lambda item: item[0])
 
         if save_audio and self.tts.enabled:
-            self.tts.start_recording()
+            # 边演边写盘，内存占用不随直播时长增长
+            self.tts.start_recording(
+                str(self._recording_path()), segment_seconds=self.record_segment_seconds
+            )
 
         print(f"\n{'='*60}")
         print("开始实时表演")
@@ -166,77 +415,119 @@ class EchuuLiveEngine:
             print("正在录制...")
         print(f"{'='*60}\n")
 
-        total_steps = min(max_steps, len(self.state.script_lines))
-        for step in range(total_steps):
-            new_danmaku = danmaku_by_step.get(step, [])
-            result = self.performer.step(self.state, new_danmaku)
-
-            step_num = result.get("step", 0)
-            stage = result.get("stage", "?")
-            action = result.get("action", "continue")
-            speech = result.get("speech", "")
-
-            action_icons = {
-                "continue": "[CONT]",
-                "tease": "[TEASE]",
-                "jump": "[JUMP]",
-                "improvise": "[IMPROV]",
-                "end": "[END]",
-            }
-            icon = action_icons.get(action, "[CONT]")
-
-            print(f"[Step {step_num}] {stage} {icon} {action.upper()}")
-            print(f"  Speech: {speech[:100]}{'...' if len(speech) > 100 else ''}")
-
-            if result.get("danmaku"):
-                print(f"  Danmaku: {result['danmaku']}")
-                print(
-                    "  priority={:.2f}, cost={:.2f}, relevance={:.2f}".format(
-                        result.get("priority", 0),
-                        result.get("cost", 0),
-                        result.get("relevance", 0),
-                    )
-                )
+        self.state.answer_index()  # 开演前构建 key_info 索引，避免第一条弹幕时才构建
+        self.performer.set_prefetch(prefetch_lines)
+        self.performer.schedule_prefetch(self.state)
+        self.performer.set_speculation(speculate_danmaku)
 
-            if isinstance(result.get("emotion_break"), dict):
-                level = result["emotion_break"].get("level", 0)
-                level_name = {1: "微破防", 2: "明显破防", 3: "完全破防"}.get(level, f"L{level}")
-                trigger = result["emotion_break"].get("trigger", "")
-                print(f"  情绪断点: {level_name} - {trigger}")
-            if result.get("disfluencies"):
-                print(f"  认知特征: {', '.join(result['disfluencies'])}")
+        self.scheduler.lead = max(0.0, lead_time)
+        self.scheduler.realtime = realtime
+        self.scheduler.reset()
+        return danmaku_by_step, deque(timed)
 
-            if step_num % 3 == 0:
-                print(f"\n{result.get('memory_display', '')}")
+    def _collect_danmaku(
+        self,
+        step: int,
+        danmaku_by_step: Dict[int, List[Danmaku]],
+        live_danmaku_getter: Optional[Callable[[int], List[Dict]]],
+        timed_danmaku: Optional[Deque[Tuple[float, Danmaku]]] = None,
+    ) -> List[Danmaku]:
+        """合并该步的模拟弹幕（按步 / 按播放时间）与实时弹幕。"""
+        new_danmaku = list(danmaku_by_step.get(step, []))
+
+        if timed_danmaku:
+            elapsed = self.scheduler.elapsed()
+            while timed_danmaku and timed_danmaku[0][0] <= elapsed:
+                offset, danmaku = timed_danmaku.popleft()
+                if self.scheduler.realtime:
+                    danmaku.received_at = self.scheduler.started_at + offset
+                new_danmaku.append(danmaku)
+
+        if live_danmaku_getter:
+            for dm in live_danmaku_getter(step) or []:
+                text = dm.get("text", "")
+                if text:
+                    danmaku = Danmaku.from_text(text, user=dm.get("user", "观众"))
+                    danmaku.received_at = dm.get("received_at")
+                    new_danmaku.append(danmaku)
+        return new_danmaku
 
-            if play_audio and result.get("audio"):
-                print("  语音已生成")
+    def _schedule_playback(self, result: Dict):
+        """
+        把本步音频排到播放时间线上，结果中附带时长。
 
-            print()
+        流式下发时客户端收到首个分片就开始播放，时间线从该时刻算起，
+        而不是从整段合成完（本步结束）算起。
+        """
+        duration = audio_duration(
+            result.get("audio"),
+            fmt=self.tts.stream_format,
+            sample_rate=self.tts.sample_rate,
+            text=result.get("speech", ""),
+        )
+        self.scheduler.schedule(duration, started_at=result.pop("_first_audio_at", None))
+        result["audio_duration"] = duration
+
+    def _log_step(self, result: Dict, play_audio: bool = False):
+        """打印单步表演日志。"""
+        step_num = result.get("step", 0)
+        stage = result.get("stage", "?")
+        action = result.get("action", "continue")
+        speech = result.get("speech", "")
+
+        action_icons = {
+            "continue": "[CONT]",
+            "tease": "[TEASE]",
+            "jump": "[JUMP]",
+            "improvise": "[IMPROV]",
+            "end": "[END]",
+        }
+        icon = action_icons.get(action, "[CONT]")
+
+        print(f"[Step {step_num}] {stage} {icon} {action.upper()}")
+        print(f"  Speech: {speech[:100]}{'...' if len(speech) > 100 else ''}")
+
+        if result.get("danmaku"):
+            print(f"  Danmaku: {result['danmaku']}")
+            print(
+                "  priority={:.2f}, cost={:.2f}, relevance={:.2f}".format(
+                    result.get("priority", 0),
+                    result.get("cost", 0),
+                    result.get("relevance", 0),
+                )
+            )
 
-            yield result
+        if isinstance(result.get("emotion_break"), dict):
+            level = result["emotion_break"].get("level", 0)
+            level_name = {1: "微破防", 2: "明显破防", 3: "完全破防"}.get(level, f"L{level}")
+            trigger = result["emotion_break"].get("trigger", "")
+            print(f"  情绪断点: {level_name} - {trigger}")
+        if result.get("disfluencies"):
+            print(f"  认知特征: {', '.join(result['disfluencies'])}")
 
-            if action == "end":
-                break
+        if step_num % 3 == 0:
+            # 只在打印时渲染；客户端通过 memory_patch 增量同步记忆
+            print(f"\n{self.state.memory.to_display()}")
+
+        if play_audio and result.get("audio"):
+            print("  语音已生成")
+
+        print()
+
+    def _finish_run(self, save_audio: bool):
+        """表演结束：停止预取、保存录音、打印最终记忆。"""
+        self.performer.prefetcher.shutdown()
+        self.performer.speculator.shutdown()
 
         if save_audio and self.tts.enabled:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            # 根据TTS实际格式选择扩展名
-            import os
-            response_format = os.getenv("TTS_RESPONSE_FORMAT", "pcm").lower()
-            if response_format == "pcm":
-                ext = ".wav"  # PCM转换为WAV保存
-            elif response_format == "mp3":
-                ext = ".mp3"
-            elif response_format == "wav":
-                ext = ".wav"
-            elif response_format == "opus":
-                ext = ".opus"
-            else:
-                ext = ".wav"  # 默认WAV
-            
-            audio_path = self.scripts_dir / f"{timestamp}_{self.state.name}_{self.state.topic[:20].replace(' ', '_')}_live{ext}"
-            self.tts.save_recording(str(audio_path))
+            self.tts.save_recording()
+
+        cache_stats = getattr(self.tts, "cache_stats", lambda: None)()
+        if cache_stats:
+            print(
+                f"[TTS] 缓存命中 {cache_stats['hits']}/{cache_stats['hits'] + cache_stats['misses']}"
+                f" ({cache_stats['hit_rate']:.0%})，{cache_stats['entries']} 条 / {cache_stats['bytes'] / 1e6:.1f}MB"
+            )
 
         print(f"\n{'='*60}")
         print("表演结束！")
@@ -245,6 +536,22 @@ class EchuuLiveEngine:
         print("最终记忆状态：")
         print(self.state.memory.to_display())
 
+    def _recording_path(self) -> Path:
+        """本场录音的保存路径（扩展名按 TTS 实际输出格式）。"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        response_format = os.getenv("TTS_RESPONSE_FORMAT", "pcm").lower()
+        if response_format == "pcm":
+            ext = ".wav"  # PCM转换为WAV保存
+        elif response_format == "mp3":
+            ext = ".mp3"
+        elif response_format == "wav":
+            ext = ".wav"
+        elif response_format == "opus":
+            ext = ".opus"
+        else:
+            ext = ".wav"  # 默认WAV
+        return self.scripts_dir / f"{timestamp}_{self.state.name}_{self.state.topic[:20].replace(' ', '_')}_live{ext}"
+
     def _save_script(self, script_lines, name: str, topic: str):
         """保存剧本到 JSON 文件。"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -0,0 +1,234 @@
+"""
+关键词提取与剧本关键词索引。
+"""
+
+from __future__ import annotations
+
+import bisect
+import re
+import threading
+import unicodedata
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+# 单字停用词（也用于过滤含虚词的二元组）
+STOPWORDS = frozenset(
+    "的了在是我你他她它们这那有和就不也都说很吗吧呢啊哦嗯哈呀么嘛啦哇诶欸什怎"
+)
+EN_STOPWORDS = frozenset(
+    "a an the is are was were be to of in on at and or but so it this that i you he she we they "
+    "me my your do does did not no yes what why how who lol".split()
+)
+
+_TOKEN_RE = re.compile(
+    r"(?P<cjk>[\u3040-\u30ff\u31f0-\u31ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+)"
+    r"|(?P<word>[a-z0-9][a-z0-9'_-]*)"
+)
+_SCRIPT_RE = re.compile(
+    r"(?P<han>[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+)"
+    r"|(?P<katakana>[\u30a0-\u30ff\u31f0-\u31ff]+)"
+    r"|(?P<hiragana>[\u3040-\u309f]+)"
+)
+
+
+class KeywordExtractor:
+    """
+    中日英关键词提取器。
+
+    - 英文/数字按单词切分（小写，去停用词）
+    - 中日文连续片段先用词典 trie 做正向最大匹配（词典来自剧本 key_info、口癖、切片语料）
+    - 未被词典覆盖的汉字片段切成字二元组（含虚词的丢弃），片假名片段整体作为一个词，平假名忽略
+    - 结果按文本做 LRU 缓存；词典变化时清空缓存并递增 version
+
+    传入 base 时为叠加词典：base（进程共享的切片语料词典）只读，本实例只保存自己
+    加入的词条（某场表演的 key_info、口癖），随表演一起释放，不影响其他房间。
+    """
+
+    def __init__(
+        self,
+        limit: int = 8,
+        cache_size: int = 4096,
+        base: Optional["KeywordExtractor"] = None,
+    ):
+        self.limit = limit
+        self.base = base
+        self._version = 0
+        self._base_version = base.version if base is not None else 0
+        self._trie: Dict[str, dict] = {}
+        self._terms: Set[str] = set()
+        self._lock = threading.Lock()
+        self._cached = lru_cache(maxsize=cache_size)(self._extract)
+
+    @property
+    def version(self) -> int:
+        """词典版本（叠加词典包含 base 的版本，任一方加入词条都会变化）。"""
+        if self.base is None:
+            return self._version
+        return self._version + self.base.version
+
+    def overlay(self, cache_size: int = 1024) -> "KeywordExtractor":
+        """以本词典为只读底层创建叠加词典。"""
+        return KeywordExtractor(limit=self.limit, cache_size=cache_size, base=self)
+
+    def add_terms(self, terms: Iterable[str]) -> int:
+        """加入词典词条，返回新增数量。"""
+        added = 0
+        with self._lock:
+            for term in terms:
+                term = unicodedata.normalize("NFKC", term or "").strip().lower()
+                if len(term) < 2 or term in self:
+                    continue
+                node = self._trie
+                for ch in term:
+                    node = node.setdefault(ch, {})
+                node[""] = term
+                self._terms.add(term)
+                added += 1
+            if added:
+                self._cached.cache_clear()
+                self._version += 1
+        return added
+
+    def __contains__(self, term: str) -> bool:
+        return term in self._terms or (self.base is not None and term in self.base)
+
+    def extract(self, text: str) -> List[str]:
+        """提取关键词（词典词在前，最多 limit 个，去重保序）。"""
+        if self.base is not None and self._base_version != self.base.version:
+            # 底层词典加入了新词条，本实例缓存的切分结果可能已过时
+            self._base_version = self.base.version
+            self._cached.cache_clear()
+        return list(self._cached(text or ""))
+
+    def _extract(self, text: str) -> Tuple[str, ...]:
+        text = unicodedata.normalize("NFKC", text).lower()
+        terms: List[str] = []
+        others: List[str] = []
+        for match in _TOKEN_RE.finditer(text):
+            if match.lastgroup == "word":
+                word = match.group()
+                if len(word) >= 2 and word not in EN_STOPWORDS:
+                    others.append(word)
+            else:
+                self._split_cjk(match.group(), terms, others)
+
+        keywords = list(dict.fromkeys(terms + others))
+        return tuple(keywords[: self.limit])
+
+    def _split_cjk(self, run: str, terms: List[str], others: List[str]):
+        pos, rest_start = 0, 0
+        while pos < len(run):
+            term = self._longest_term(run, pos)
+            if term:
+                self._split_unknown(run[rest_start:pos], others)
+                terms.append(term)
+                pos += len(term)
+                rest_start = pos
+            else:
+                pos += 1
+        self._split_unknown(run[rest_start:], others)
+
+    def _longest_term(self, run: str, start: int) -> Optional[str]:
+        node, found = self._trie, None
+        for ch in run[start:]:
+            node = node.get(ch)
+            if node is None:
+                break
+            found = node.get("", found)
+        if self.base is not None:
+            base_found = self.base._longest_term(run, start)
+            if base_found and (found is None or len(base_found) > len(found)):
+                found = base_found
+        return found
+
+    def _split_unknown(self, segment: str, others: List[str]):
+        for match in _SCRIPT_RE.finditer(segment):
+            part = match.group()
+            if match.lastgroup == "katakana":
+                if len(part) >= 2:
+                    others.append(part)
+            elif match.lastgroup == "han":
+                for i in range(len(part) - 1):
+                    bigram = part[i : i + 2]
+                    if bigram[0] not in STOPWORDS and bigram[1] not in STOPWORDS:
+                        others.append(bigram)
+
+
+default_extractor = KeywordExtractor()
+
+
+def extract_keywords(text: str) -> List[str]:
+    """提取关键词（使用共享的 default_extractor）。"""
+    return default_extractor.extract(text)
+
+
+def add_keyword_terms(terms: Iterable[str]) -> int:
+    """
+    向共享词典加入词条（切片语料的口癖等，所有房间共用）。
+
+    某场表演专属的词条（剧本 key_info 等）请加入 PerformanceState.keywords。
+    """
+    return default_extractor.add_terms(terms)
+
+
+class KeyInfoIndex:
+    """
+    剧本 key_info 的倒排索引（子串 → 出现位置）。
+
+    _find_answer 的匹配规则是“弹幕关键词是某条 key_info 的子串”，
+    这里预先把每条 key_info 的所有子串（长度 >= 2）映射到 (行号, 条目序号, key_info)，
+    查询时每个关键词一次字典查找 + 二分，取行号 >= 当前行的最近一条。
+    超过 MAX_SUBSTR_LEN 的关键词只可能出现在长 key_info 中，单独线性匹配。
+    """
+
+    MAX_SUBSTR_LEN = 24
+
+    def __init__(self, script_lines: List):
+        self.script_lines = script_lines
+        self.size = len(script_lines)
+        self._postings: Dict[str, List[Tuple[int, int, str]]] = {}
+        self._long_infos: List[Tuple[Tuple[int, int, str], str]] = []
+
+        for line_idx, line in enumerate(script_lines):
+            for order, info in enumerate(getattr(line, "key_info", None) or []):
+                posting = (line_idx, order, info)
+                # 与关键词提取一致：NFKC + 小写
+                norm = unicodedata.normalize("NFKC", info).lower()
+                if len(norm) > self.MAX_SUBSTR_LEN:
+                    self._long_infos.append((posting, norm))
+                for sub in self._substrings(norm):
+                    self._postings.setdefault(sub, []).append(posting)
+
+    def _substrings(self, text: str) -> Set[str]:
+        subs = set()
+        for start in range(len(text)):
+            end_max = min(len(text), start + self.MAX_SUBSTR_LEN)
+            for end in range(start + 2, end_max + 1):
+                subs.add(text[start:end])
+        return subs
+
+    def matches(self, script_lines: List) -> bool:
+        """索引是否仍对应这份剧本。"""
+        return self.script_lines is script_lines and self.size == len(script_lines)
+
+    def find(self, keywords: Iterable[str], current_idx: int) -> Optional[Tuple[int, str]]:
+        """返回第一条（行号 >= current_idx）包含任一关键词的 key_info：(行号, key_info)。"""
+        best = None
+        for kw in keywords:
+            if len(kw) > self.MAX_SUBSTR_LEN:
+                candidates = [
+                    p for p, norm in self._long_infos if p[0] >= current_idx and kw in norm
+                ]
+                hit = candidates[0] if candidates else None
+            else:
+                postings = self._postings.get(kw)
+                if not postings:
+                    continue
+                pos = bisect.bisect_left(postings, (current_idx,))
+                hit = postings[pos] if pos < len(postings) else None
+            if hit is not None and (best is None or hit < best):
+                best = hit
+        if best is None:
+            return None
+        return best[0], best[2]
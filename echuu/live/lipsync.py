@@ -0,0 +1,219 @@
+"""
+流式口型分析：从 TTS 的 PCM 分片得到带时间戳的口型（viseme）权重轨。
+
+LipsyncCue 的 aa / ih / ou / ee / oh 字段原本要由前端各自分析音频来填。
+VisemeAnalyzer 在服务端边收 PCM 边分析，每帧（默认 50fps）输出五个口型的权重：
+
+- 开口度：帧 RMS（dBFS）在 silence_db ~ full_db 之间线性映射到 0~1
+- 口型：用 FFT 频带质心近似第一、第二共振峰（F1：200~1000Hz，F2：900~3000Hz），
+  按与各元音典型 (F1, F2) 的距离做 softmax，再乘以开口度
+- 平滑：张嘴快、闭嘴慢的一阶平滑，避免逐帧抖动
+
+分析状态只有上一帧留下的不足一个窗口的采样和五个平滑值，内存与音频长度无关。
+帧 k 以 k / fps 秒为中心（窗口为两个帧间隔）。
+
+    analyzer = VisemeAnalyzer(sample_rate=24000)
+    for chunk in pcm_chunks:
+        weights = analyzer.feed(chunk)   # (n, 5) 新增帧
+    weights = analyzer.flush()
+    track = analyzer.track
+
+这是基于能量与共振峰的启发式，不识别音素；对驱动 VRM 口型来说已足够自然。
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from .audio import is_wav, parse_wav
+
+VISEMES = ("aa", "ih", "ou", "ee", "oh")
+DEFAULT_FPS = 50.0
+
+# 各元音在上述两个频带里的典型质心 (F1, F2)，Hz。F2 较低的元音（ou / oh）有能量
+# 落进 F1 频带，质心比真实 F1 偏高，这里按质心而不是共振峰本身取值
+VOWEL_FORMANTS = {
+    "aa": (800.0, 1300.0),
+    "ih": (330.0, 2500.0),
+    "ou": (500.0, 1000.0),
+    "ee": (500.0, 2100.0),
+    "oh": (660.0, 1000.0),
+}
+# 共振峰距离的归一化尺度（Hz）
+F1_SCALE = 150.0
+F2_SCALE = 400.0
+
+
+class VisemeTrack:
+    """一段音频的口型权重轨（每帧五个权重，顺序同 VISEMES）。"""
+
+    def __init__(self, fps: float = DEFAULT_FPS):
+        self.fps = fps
+        self.frames: List[Tuple[float, ...]] = []
+
+    def extend(self, weights):
+        self.frames.extend(tuple(round(float(w), 3) for w in row) for row in weights)
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    @property
+    def duration(self) -> float:
+        return len(self.frames) / self.fps
+
+    def summary(self, threshold: float = 0.05) -> Dict[str, float]:
+        """发声帧上各口型的平均权重（用于填充 LipsyncCue 的 aa / ih / ou / ee / oh）。"""
+        voiced = [f for f in self.frames if sum(f) > threshold]
+        if not voiced:
+            return {v: 0.0 for v in VISEMES}
+        return {
+            v: round(sum(f[i] for f in voiced) / len(voiced), 3) for i, v in enumerate(VISEMES)
+        }
+
+    def to_dict(self, mapper=None) -> Dict[str, Any]:
+        """
+        可序列化的口型轨。blendShapes 为各口型经 VRMExpressionMapper.map_viseme
+        映射后的 BlendShape 名称（不传 mapper 时用默认的 VRM1 映射）。
+        """
+        if mapper is None:
+            from ..vrm.mapper import VRMExpressionMapper
+
+            mapper = VRMExpressionMapper()
+        return {
+            "fps": self.fps,
+            "visemes": list(VISEMES),
+            "blendShapes": [mapper.map_viseme(v)["blendShape"] for v in VISEMES],
+            "frames": [list(f) for f in self.frames],
+        }
+
+
+class VisemeAnalyzer:
+    """16-bit 单声道 PCM 的流式口型分析器（每路音频一个实例，非线程安全）。"""
+
+    def __init__(
+        self,
+        sample_rate: int = 24000,
+        fps: float = DEFAULT_FPS,
+        silence_db: float = -50.0,
+        full_db: float = -15.0,
+        attack: float = 0.6,
+        release: float = 0.25,
+        sharpness: float = 1.5,
+    ):
+        """
+        Args:
+            sample_rate: 采样率
+            fps: 输出帧率
+            silence_db / full_db: 开口度 0 与 1 对应的帧 RMS（dBFS）
+            attack / release: 权重上升 / 下降时的平滑系数（越大越跟手）
+            sharpness: 口型 softmax 的锐度
+        """
+        import numpy as np
+
+        self.sample_rate = sample_rate
+        self.fps = fps
+        self.hop = max(1, int(round(sample_rate / fps)))
+        self.window = 2 * self.hop
+        self.silence_db = silence_db
+        self.full_db = full_db
+        self.attack = attack
+        self.release = release
+        self.sharpness = sharpness
+
+        freqs = np.fft.rfftfreq(self.window, 1.0 / sample_rate)
+        self._f1_band = (freqs >= 200) & (freqs < 1000)
+        self._f2_band = (freqs >= 900) & (freqs < 3000)
+        self._f1_freqs = freqs[self._f1_band].astype(np.float32)
+        self._f2_freqs = freqs[self._f2_band].astype(np.float32)
+        self._hann = np.hanning(self.window).astype(np.float32)
+        self._hann_power = float(np.mean(self._hann**2))
+        self._proto = np.array([VOWEL_FORMANTS[v] for v in VISEMES], dtype=np.float32)
+
+        # 流式状态：第一帧以 0 秒为中心，先垫一个帧间隔的静音
+        self._buffer = np.zeros(self.hop, dtype=np.float32)
+        self._odd = b""
+        self._smoothed = [0.0] * len(VISEMES)
+        self.track = VisemeTrack(fps)
+
+    def feed(self, pcm: bytes):
+        """送入一段 PCM，返回新完成的帧权重（numpy 数组，形状 (n, 5)）。"""
+        import numpy as np
+
+        data = self._odd + pcm if self._odd else pcm
+        usable = len(data) - len(data) % 2
+        self._odd = data[usable:]
+        samples = np.frombuffer(data, dtype="<i2", count=usable // 2)
+        buf = np.concatenate((self._buffer, samples * np.float32(1.0 / 32768)))
+        return self._analyze(buf)
+
+    def flush(self):
+        """音频结束：补静音输出覆盖末尾的帧，并重置流式状态。"""
+        import numpy as np
+
+        buf = np.concatenate((self._buffer, np.zeros(self.hop, dtype=np.float32)))
+        weights = self._analyze(buf)
+        self._buffer = np.zeros(self.hop, dtype=np.float32)
+        self._odd = b""
+        self._smoothed = [0.0] * len(VISEMES)
+        return weights
+
+    def _analyze(self, buf):
+        import numpy as np
+
+        n = (len(buf) - self.window) // self.hop + 1 if len(buf) >= self.window else 0
+        if n <= 0:
+            self._buffer = buf
+            return np.zeros((0, len(VISEMES)), dtype=np.float32)
+        # 帧是 buf 上的跨步视图，只有加窗时产生一次 (n, window) 的拷贝
+        frames = np.lib.stride_tricks.sliding_window_view(buf, self.window)[:: self.hop][:n]
+        self._buffer = buf[n * self.hop :].copy()
+
+        windowed = frames * self._hann
+        power = np.abs(np.fft.rfft(windowed, axis=1)) ** 2
+        energy = np.einsum("ij,ij->i", windowed, windowed) / (self.window * self._hann_power)
+        db = 10.0 * np.log10(np.maximum(energy, 1e-12))
+        openness = np.clip((db - self.silence_db) / (self.full_db - self.silence_db), 0.0, 1.0)
+
+        p1 = power[:, self._f1_band]
+        p2 = power[:, self._f2_band]
+        f1 = (p1 @ self._f1_freqs) / np.maximum(p1.sum(axis=1), 1e-12)
+        f2 = (p2 @ self._f2_freqs) / np.maximum(p2.sum(axis=1), 1e-12)
+
+        d2 = ((f1[:, None] - self._proto[:, 0]) / F1_SCALE) ** 2 + (
+            (f2[:, None] - self._proto[:, 1]) / F2_SCALE
+        ) ** 2
+        logits = -self.sharpness * d2
+        logits -= logits.max(axis=1, keepdims=True)
+        shape = np.exp(logits)
+        shape /= shape.sum(axis=1, keepdims=True)
+        raw = shape * openness[:, None]
+
+        out = np.empty_like(raw)
+        smoothed = self._smoothed
+        attack, release = self.attack, self.release
+        for i, row in enumerate(raw.tolist()):
+            for j, target in enumerate(row):
+                prev = smoothed[j]
+                alpha = attack if target > prev else release
+                smoothed[j] = prev + alpha * (target - prev)
+            out[i] = smoothed
+        self.track.extend(out)
+        return out
+
+
+def analyze_audio(
+    audio: Optional[bytes], sample_rate: int = 24000, fps: float = DEFAULT_FPS
+) -> Optional[VisemeTrack]:
+    """整段分析一段 16-bit 单声道 WAV；其他格式（mp3 等）返回 None。"""
+    if not audio:
+        return None
+    if is_wav(audio):
+        pcm, sample_rate, channels, sample_width = parse_wav(audio)
+        if (channels, sample_width) != (1, 2):
+            return None
+    else:
+        return None
+    analyzer = VisemeAnalyzer(sample_rate=sample_rate, fps=fps)
+    analyzer.feed(pcm)
+    analyzer.flush()
+    return analyzer.track
@@ -5,7 +5,7 @@ LLM 客户端封装（Claude）。
 from __future__ import annotations
 
 import os
-from typing import Optional
+from typing import AsyncIterator, Iterator, Optional
 
 
 class LLMClient:
@@ -15,31 +15,83 @@ class LLMClient:
         self.api_key = api_key or os.getenv("ANTHROPIC_API_KEY")
         self.model = model or os.getenv("DEFAULT_MODEL", "claude-3-haiku-20240307")
         self.client = None
+        self.async_client = None
 
         if self.api_key:
             try:
                 import anthropic
 
-                self.client = anthropic.Anthropic(api_key=self.api_key)
+                from .resources import anthropic_client
+
+                # 同步客户端按 API Key 在进程内共享（连接池复用）
+                self.client = anthropic_client(self.api_key)
+                self.async_client = anthropic.AsyncAnthropic(api_key=self.api_key)
                 print(f"LLM 已初始化: {self.model}")
             except ImportError:
                 raise ImportError("anthropic 未安装，请先安装 anthropic")
         else:
             raise ValueError("未设置 ANTHROPIC_API_KEY，无法使用真实模式")
 
+    def _build_kwargs(self, prompt: str, system: Optional[str], max_tokens: int) -> dict:
+        kwargs = {
+            "model": self.model,
+            "max_tokens": max_tokens,
+            "messages": [{"role": "user", "content": prompt}],
+        }
+        if system:
+            kwargs["system"] = system
+        return kwargs
+
     def call(self, prompt: str, system: Optional[str] = None, max_tokens: int = 1000) -> str:
         """调用 LLM。"""
         if self.client:
             try:
-                kwargs = {
-                    "model": self.model,
-                    "max_tokens": max_tokens,
-                    "messages": [{"role": "user", "content": prompt}],
-                }
-                if system:
-                    kwargs["system"] = system
-                response = self.client.messages.create(**kwargs)
+                response = self.client.messages.create(
+                    **self._build_kwargs(prompt, system, max_tokens)
+                )
+                return response.content[0].text
+            except Exception as exc:
+                raise RuntimeError(f"LLM 调用失败: {exc}") from exc
+        raise RuntimeError("LLM 未初始化，无法调用")
+
+    async def acall(self, prompt: str, system: Optional[str] = None, max_tokens: int = 1000) -> str:
+        """异步调用 LLM（不阻塞事件循环）。"""
+        if self.async_client:
+            try:
+                response = await self.async_client.messages.create(
+                    **self._build_kwargs(prompt, system, max_tokens)
+                )
                 return response.content[0].text
             except Exception as exc:
                 raise RuntimeError(f"LLM 调用失败: {exc}") from exc
         raise RuntimeError("LLM 未初始化，无法调用")
+
+    def stream(
+        self, prompt: str, system: Optional[str] = None, max_tokens: int = 1000
+    ) -> Iterator[str]:
+        """流式调用 LLM，逐段产出文本增量。"""
+        if not self.client:
+            raise RuntimeError("LLM 未初始化，无法调用")
+        try:
+            with self.client.messages.stream(
+                **self._build_kwargs(prompt, system, max_tokens)
+            ) as stream:
+                for text in stream.text_stream:
+                    yield text
+        except Exception as exc:
+            raise RuntimeError(f"LLM 调用失败: {exc}") from exc
+
+    async def astream(
+        self, prompt: str, system: Optional[str] = None, max_tokens: int = 1000
+    ) -> AsyncIterator[str]:
+        """异步流式调用 LLM，逐段产出文本增量。"""
+        if not self.async_client:
+            raise RuntimeError("LLM 未初始化，无法调用")
+        try:
+            async with self.async_client.messages.stream(
+                **self._build_kwargs(prompt, system, max_tokens)
+            ) as stream:
+                async for text in stream.text_stream:
+                    yield text
+        except Exception as exc:
+            raise RuntimeError(f"LLM 调用失败: {exc}") from exc
@@ -0,0 +1,290 @@
+"""
+离线后端：不联网的 LLM / TTS 替身。
+
+用于本地回放和性能基准（见 replay.py），也可以直接注入 EchuuLiveEngine：
+
+    engine = EchuuLiveEngine(llm=ScriptedLLM(), tts=SyntheticTTS())
+
+两者都按可配置的延迟分布 sleep，模拟真实服务的首包 / 逐字耗时，
+并把每次调用的耗时累计到 stats 中，方便按步统计延迟分解。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import random
+import threading
+import time
+import zlib
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional
+
+from .audio import pcm_to_wav
+from .postprocess import AudioPostProcessor
+from .tts_cache import TTSCache
+from .tts_client import TTSClient
+
+_CANNED_RESPONSES = [
+    {"response": "诶这个问得好，先别急，马上就说到了。", "action": "continue", "next_content": ""},
+    {"response": "哈哈哈你们也太懂了吧，我当时也是这么想的！", "action": "continue", "next_content": ""},
+    {
+        "response": "谢谢老板的SC！好好好，那我稍微多说两句。",
+        "action": "digress",
+        "next_content": "其实这件事还有个小插曲，不过先说正事哈。",
+    },
+    {"response": "真的真的，我发誓没有编，你们听我说完。", "action": "continue", "next_content": ""},
+    {
+        "response": "啊这个嘛……好吧我先透露一点点。",
+        "action": "adapt",
+        "next_content": "反正后面大家就知道了，我们接着说。",
+    },
+]
+
+
+class LatencyModel:
+    """
+    调用延迟分布。
+
+    一次调用的耗时 = base + per_unit * units，再乘以一个随机因子：
+    - "fixed": 不抖动
+    - "normal": N(1, jitter)，截断到 >= 0
+    - "lognormal": 对数正态（均值为 1，jitter 为对数标准差），模拟长尾
+
+    speed 是回放加速倍数，实际 sleep 的时间为 耗时 / speed。
+    """
+
+    DISTRIBUTIONS = ("fixed", "normal", "lognormal")
+
+    def __init__(
+        self,
+        base: float = 0.0,
+        per_unit: float = 0.0,
+        jitter: float = 0.0,
+        dist: str = "lognormal",
+        speed: float = 1.0,
+        seed: Optional[int] = None,
+    ):
+        if dist not in self.DISTRIBUTIONS:
+            raise ValueError(f"未知的延迟分布: {dist}")
+        if speed <= 0:
+            raise ValueError("speed 必须大于 0")
+        self.base = base
+        self.per_unit = per_unit
+        self.jitter = jitter
+        self.dist = dist
+        self.speed = speed
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self, units: float = 0.0) -> float:
+        """采样一次调用的（未加速）耗时，单位秒。"""
+        mean = self.base + self.per_unit * units
+        if mean <= 0 or self.jitter <= 0 or self.dist == "fixed":
+            return max(mean, 0.0)
+        with self._lock:
+            if self.dist == "normal":
+                factor = max(0.0, self._rng.gauss(1.0, self.jitter))
+            else:
+                factor = self._rng.lognormvariate(-self.jitter**2 / 2, self.jitter)
+        return mean * factor
+
+    def delay(self, units: float = 0.0) -> float:
+        """采样并换算成加速后实际要等待的秒数。"""
+        return self.sample(units) / self.speed
+
+
+# 后台线程池（预取 / 弹幕回应预生成 / 预渲染）的线程名前缀：这些调用不在表演步的关键路径上
+BACKGROUND_THREAD_PREFIXES = ("echuu-tts-prefetch", "echuu-speculate", "echuu-tts-prerender")
+
+
+class _CallStats:
+    """
+    线程安全的调用计数与累计耗时。
+
+    busy 只累计关键路径上的调用（驱动表演的线程、流式合成线程等），
+    后台线程池里的调用按线程名归入 background，两者互不重叠计算。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.busy = 0.0
+        self.background = 0.0
+
+    def add(self, seconds: float):
+        background = threading.current_thread().name.startswith(BACKGROUND_THREAD_PREFIXES)
+        with self._lock:
+            self.calls += 1
+            if background:
+                self.background += seconds
+            else:
+                self.busy += seconds
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return {"calls": self.calls, "busy": self.busy, "background": self.background}
+
+
+class ScriptedLLM:
+    """
+    确定性的离线 LLM，接口与 LLMClient 一致（call / acall / stream / astream）。
+
+    responses 为回复列表（字符串或字典，字典会转成 JSON）；不传时使用内置的弹幕回应模板。
+    同一个 prompt 总是得到同一条回复（按 prompt 的 CRC32 选取），回放结果可复现。
+    也可以传 responder(prompt, system) -> str 完全自定义回复。
+    """
+
+    def __init__(
+        self,
+        responses: Optional[List] = None,
+        responder: Optional[Callable[[str, Optional[str]], str]] = None,
+        first_token: Optional[LatencyModel] = None,
+        per_token: Optional[LatencyModel] = None,
+        chunk_chars: int = 4,
+    ):
+        self.model = "scripted"
+        self.responses = [
+            r if isinstance(r, str) else json.dumps(r, ensure_ascii=False)
+            for r in (responses or _CANNED_RESPONSES)
+        ]
+        self.responder = responder
+        self.first_token = first_token or LatencyModel()
+        self.per_token = per_token or LatencyModel()
+        self.chunk_chars = max(1, chunk_chars)
+        self.stats = _CallStats()
+
+    def reply(self, prompt: str, system: Optional[str] = None) -> str:
+        """根据 prompt 取回复文本（不计延迟）。"""
+        if self.responder:
+            return self.responder(prompt, system)
+        return self.responses[zlib.crc32(prompt.encode("utf-8")) % len(self.responses)]
+
+    def _chunks(self, text: str) -> List[str]:
+        return [text[i : i + self.chunk_chars] for i in range(0, len(text), self.chunk_chars)]
+
+    def call(self, prompt: str, system: Optional[str] = None, max_tokens: int = 1000) -> str:
+        start = time.perf_counter()
+        text = self.reply(prompt, system)
+        time.sleep(self.first_token.delay() + self.per_token.delay(len(self._chunks(text))))
+        self.stats.add(time.perf_counter() - start)
+        return text
+
+    async def acall(self, prompt: str, system: Optional[str] = None, max_tokens: int = 1000) -> str:
+        start = time.perf_counter()
+        text = self.reply(prompt, system)
+        await asyncio.sleep(self.first_token.delay() + self.per_token.delay(len(self._chunks(text))))
+        self.stats.add(time.perf_counter() - start)
+        return text
+
+    def stream(
+        self, prompt: str, system: Optional[str] = None, max_tokens: int = 1000
+    ) -> Iterator[str]:
+        start = time.perf_counter()
+        try:
+            time.sleep(self.first_token.delay())
+            for chunk in self._chunks(self.reply(prompt, system)):
+                time.sleep(self.per_token.delay(1))
+                yield chunk
+        finally:
+            self.stats.add(time.perf_counter() - start)
+
+    async def astream(
+        self, prompt: str, system: Optional[str] = None, max_tokens: int = 1000
+    ) -> AsyncIterator[str]:
+        start = time.perf_counter()
+        try:
+            await asyncio.sleep(self.first_token.delay())
+            for chunk in self._chunks(self.reply(prompt, system)):
+                await asyncio.sleep(self.per_token.delay(1))
+                yield chunk
+        finally:
+            self.stats.add(time.perf_counter() - start)
+
+
+class SyntheticVoice:
+    """
+    SyntheticTTS 的合成后端，接口同 CosyVoiceTTS 的 realtime 模式（PCM 输出）：
+    synthesize 返回整段 WAV，synthesize_with_callback 把 PCM 回调给 on_audio。
+
+    音频时长按 chars_per_sec 估算，内容是随字符起伏的低音量正弦波。
+    latency 按字符数计延迟（units = 文本字数）。
+    """
+
+    model = "synthetic"
+    response_format = "pcm"
+
+    def __init__(
+        self,
+        latency: Optional[LatencyModel] = None,
+        sample_rate: int = 24000,
+        chars_per_sec: float = 5.0,
+        tone_hz: float = 220.0,
+    ):
+        self.latency = latency or LatencyModel()
+        self.sample_rate = sample_rate
+        self.chars_per_sec = chars_per_sec
+        self.tone_hz = tone_hz
+        # 参与缓存键：音色参数不同的合成结果不能互相命中
+        self.voice = f"tone-{tone_hz:g}hz-{chars_per_sec:g}cps"
+        self.stats = _CallStats()
+
+    def _is_realtime_model(self) -> bool:
+        return True
+
+    def render_pcm(self, text: str) -> bytes:
+        """生成 text 对应时长的 16-bit 单声道 PCM（不计延迟）。"""
+        import numpy as np
+
+        chars = max(1, len(text.strip()))
+        samples = int(self.sample_rate * chars / self.chars_per_sec)
+        t = np.arange(samples, dtype=np.float32) / self.sample_rate
+        # 每个字一个音节包络
+        envelope = np.abs(np.sin(math.pi * self.chars_per_sec * t))
+        wave = 0.2 * envelope * np.sin(2 * math.pi * self.tone_hz * t)
+        return (wave * 32767).astype("<i2").tobytes()
+
+    def _render(self, text: str) -> bytes:
+        start = time.perf_counter()
+        time.sleep(self.latency.delay(len(text)))
+        pcm = self.render_pcm(text)
+        self.stats.add(time.perf_counter() - start)
+        return pcm
+
+    def synthesize(self, text: str) -> bytes:
+        return pcm_to_wav(self._render(text), sample_rate=self.sample_rate)
+
+    def synthesize_with_callback(self, text: str, on_audio: Callable[[bytes], None]) -> bytes:
+        pcm = self._render(text)
+        on_audio(pcm)
+        return pcm_to_wav(pcm, sample_rate=self.sample_rate)
+
+
+class SyntheticTTS(TTSClient):
+    """
+    合成假语音的离线 TTS：TTSClient 接上 SyntheticVoice 后端（输出 PCM / WAV）。
+
+    合成、缓存、后处理、录制、流式下发都走 TTSClient 的同一套逻辑，
+    离线基准测到的就是线上的代码路径。cache / postprocessor 默认关闭，由调用方传入。
+    """
+
+    def __init__(
+        self,
+        latency: Optional[LatencyModel] = None,
+        sample_rate: int = 24000,
+        chars_per_sec: float = 5.0,
+        tone_hz: float = 220.0,
+        cache: Optional[TTSCache] = None,
+        postprocessor: Optional[AudioPostProcessor] = None,
+    ):
+        voice = SyntheticVoice(latency, sample_rate, chars_per_sec, tone_hz)
+        self._init_state(tts=voice, cache=cache, postprocessor=postprocessor)
+        self.latency = voice.latency
+        self.stats = voice.stats  # 只统计真正调用后端的合成（缓存命中不计）
+
+    def synthesize(
+        self, text: str, emotion_boost: float = 0.0, record: bool = True
+    ) -> Optional[bytes]:
+        if not text or not text.strip():
+            return None
+        return super().synthesize(text, emotion_boost, record)
@@ -4,14 +4,22 @@
 
 from __future__ import annotations
 
+import asyncio
 import random
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 
+from ..core.performer_cue import LipsyncCue
 from .danmaku import DanmakuHandler
 from .llm_client import LLMClient
+from .audio import join_audio
+from .lipsync import VisemeTrack, analyze_audio
+from .prerender import ScriptPrerenderer
 from .response_generator import DanmakuResponseGenerator
+from .speculative import SpeculativeResponder
 from .state import Danmaku, PerformanceState
+from .streaming import SpeechStream
 from .tts_client import TTSClient
+from .tts_prefetch import TTSPrefetcher
 
 
 class PerformerV3:
@@ -19,117 +27,426 @@ class PerformerV3:
     表演引擎 V3 - 带记忆系统和统一弹幕处理。
     """
 
-    def __init__(self, llm: LLMClient, tts: TTSClient, danmaku_handler: DanmakuHandler):
+    def __init__(
+        self,
+        llm: LLMClient,
+        tts: TTSClient,
+        danmaku_handler: DanmakuHandler,
+        prefetch_lines: int = 0,
+        speculate_top_k: int = 0,
+        lipsync: bool = False,
+    ):
+        """
+        Args:
+            lipsync: 为每步音频分析口型，写入 cue["lipsync"]（见 lipsync.VisemeAnalyzer）
+        """
         self.llm = llm
         self.tts = tts
         self.danmaku_handler = danmaku_handler
         self.response_generator = DanmakuResponseGenerator(llm)
-
-    def step(self, state: PerformanceState, new_danmaku: Optional[List[Danmaku]] = None) -> Dict:
+        self.prefetcher = TTSPrefetcher(tts, lookahead=prefetch_lines)
+        self.prerenderer = ScriptPrerenderer(tts)
+        self.speculator = SpeculativeResponder(self.response_generator, tts, top_k=speculate_top_k)
+        self.lipsync = lipsync
+        # step / astep 执行中（含在线程池里合成语音的阶段）。只在驱动表演的线程 / 事件循环里
+        # 读写，不加锁；工作线程要请求预生成须先切回事件循环（loop.call_soon_threadsafe）
+        self._in_step = False
+
+    def set_prefetch(self, lookahead: int, max_workers: Optional[int] = None):
+        """设置 TTS 预取行数（0 表示关闭）。"""
+        self.prefetcher.reset()
+        self.prefetcher.lookahead = max(0, lookahead)
+        if max_workers:
+            self.prefetcher.max_workers = max(1, max_workers)
+
+    def set_speculation(
+        self, top_k: int, synthesize: bool = False, max_workers: Optional[int] = None
+    ):
+        """设置弹幕回应预生成的候选数（0 表示关闭）。"""
+        self.speculator.reset()
+        self.speculator.top_k = max(0, top_k)
+        self.speculator.synthesize = synthesize
+        if max_workers:
+            self.speculator.max_workers = max(1, max_workers)
+
+    def step(
+        self,
+        state: PerformanceState,
+        new_danmaku: Optional[List[Danmaku]] = None,
+        on_audio_chunk: Optional[Callable[[Dict], None]] = None,
+    ) -> Dict:
         """
         执行一步表演。
+
+        Args:
+            on_audio_chunk: 传入时按分句流式合成，每个音频分片回调一次（见 SpeechStream）；
+                回应弹幕时 LLM 边生成 token 边送入 TTS，不必等完整回复
         """
-        if new_danmaku:
-            state.danmaku_queue.extend(new_danmaku)
-            for dm in new_danmaku:
-                state.memory.danmaku_memory["received"].append(dm.text)
+        self._in_step = True
+        try:
+            return self._step(state, new_danmaku, on_audio_chunk)
+        finally:
+            self._in_step = False
+
+    def _step(
+        self,
+        state: PerformanceState,
+        new_danmaku: Optional[List[Danmaku]],
+        on_audio_chunk: Optional[Callable[[Dict], None]],
+    ) -> Dict:
+        self._receive_danmaku(state, new_danmaku)
 
         if state.current_line_idx >= len(state.script_lines):
             return self._generate_ending(state)
 
         current_line = state.script_lines[state.current_line_idx]
+        best_danmaku, handle_result = self._select_danmaku(state)
+        stream = self._open_stream(state, on_audio_chunk)
+        try:
+            if best_danmaku and handle_result:
+                output = self._take_speculated(
+                    best_danmaku, handle_result, current_line, state, stream
+                )
+                if output is None and stream:
+                    output = self._handle_danmaku_response_streaming(
+                        best_danmaku, handle_result, current_line, state, stream
+                    )
+                elif output is None:
+                    output = self._handle_danmaku_response(
+                        best_danmaku, handle_result, current_line, state
+                    )
+                self._record_response(state, best_danmaku, handle_result)
+            else:
+                output = self._continue_output(current_line)
+
+            line_idx = self._advance(state, current_line)
+            audio, visemes = self._speak(output, current_line, line_idx, stream)
+        finally:
+            if stream:
+                stream.abort()  # 正常路径已 close()，这里只在中途出错时释放线程池
+        self.schedule_prefetch(state)
+        self.schedule_speculation(state)
+
+        return self._finalize_output(state, current_line, output, audio, line_idx, visemes)
 
-        best_danmaku = None
-        handle_result = None
-
-        if state.danmaku_queue:
-            for danmaku in state.danmaku_queue:
-                result = self.danmaku_handler.handle(danmaku, state)
-                if result.get("should_interrupt"):
-                    if best_danmaku is None or result.get("priority", 0) > handle_result.get(
-                        "priority", 0
-                    ):
-                        best_danmaku = danmaku
-                        handle_result = result
-
-        if best_danmaku and handle_result:
-            output = self._handle_danmaku_response(best_danmaku, handle_result, current_line, state)
-            state.danmaku_queue = [d for d in state.danmaku_queue if d != best_danmaku]
-            state.memory.danmaku_memory["responded"].append(best_danmaku.text)
-
-            if best_danmaku.is_question() and handle_result.get("action") == "tease":
-                answer_loc = handle_result.get("answer_loc", {})
-                if answer_loc.get("found"):
-                    state.memory.promises.append(
-                        {
-                            "content": best_danmaku.text,
-                            "made_at_step": state.current_step,
-                            "fulfilled": False,
-                            "answer_at_line": answer_loc.get("line_idx"),
-                        }
+    async def astep(
+        self,
+        state: PerformanceState,
+        new_danmaku: Optional[List[Danmaku]] = None,
+        on_audio_chunk: Optional[Callable[[Dict], None]] = None,
+    ) -> Dict:
+        """
+        执行一步表演（asyncio 版本）。
+
+        LLM 调用走异步客户端，TTS 合成放到线程池，不阻塞事件循环。
+        on_audio_chunk 会在工作线程中被调用。
+        """
+        self._in_step = True
+        try:
+            return await self._astep(state, new_danmaku, on_audio_chunk)
+        finally:
+            self._in_step = False
+
+    async def _astep(
+        self,
+        state: PerformanceState,
+        new_danmaku: Optional[List[Danmaku]],
+        on_audio_chunk: Optional[Callable[[Dict], None]],
+    ) -> Dict:
+        self._receive_danmaku(state, new_danmaku)
+
+        if state.current_line_idx >= len(state.script_lines):
+            return await self._agenerate_ending(state)
+
+        current_line = state.script_lines[state.current_line_idx]
+        best_danmaku, handle_result = self._select_danmaku(state)
+        stream = self._open_stream(state, on_audio_chunk)
+        try:
+            if best_danmaku and handle_result:
+                output = await self._atake_speculated(
+                    best_danmaku, handle_result, current_line, state, stream
+                )
+                if output is None and stream:
+                    output = await self._ahandle_danmaku_response_streaming(
+                        best_danmaku, handle_result, current_line, state, stream
                     )
-        else:
-            output = {
-                "speech": current_line.text,
-                "action": "continue",
-                "priority": 0.0,
-                "cost": current_line.interruption_cost,
-            }
+                elif output is None:
+                    output = await self._ahandle_danmaku_response(
+                        best_danmaku, handle_result, current_line, state
+                    )
+                self._record_response(state, best_danmaku, handle_result)
+            else:
+                output = self._continue_output(current_line)
+
+            line_idx = self._advance(state, current_line)
+            audio, visemes = await asyncio.to_thread(
+                self._speak, output, current_line, line_idx, stream
+            )
+        finally:
+            if stream:
+                stream.abort()  # 出错或任务被取消时释放线程池
+        self.schedule_prefetch(state)
+        self.schedule_speculation(state)
+
+        return self._finalize_output(state, current_line, output, audio, line_idx, visemes)
 
+    def _receive_danmaku(self, state: PerformanceState, new_danmaku: Optional[List[Danmaku]]):
+        """新弹幕入队并记入记忆。"""
+        if new_danmaku:
+            state.danmaku_queue.extend(new_danmaku)
+            for dm in new_danmaku:
+                state.memory.danmaku_memory["received"].append(dm.text)
+
+    def _select_danmaku(self, state: PerformanceState) -> Tuple[Optional[Danmaku], Optional[Dict]]:
+        """取队首（衰减后优先级最高）的弹幕，决定是否打断。"""
+        self._admit_danmaku(state)
+        danmaku = state.danmaku_queue.peek()
+        if danmaku is None:
+            return None, None
+
+        result = self.danmaku_handler.decide(danmaku, state)
+        if not result.get("should_interrupt"):
+            return None, None
+        return danmaku, result
+
+    def _admit_danmaku(self, state: PerformanceState):
+        """评估新到的弹幕（每条只评估一次），记录被丢弃的弹幕。"""
+        evaluator = self.danmaku_handler.evaluator
+        dropped = state.danmaku_queue.admit(
+            lambda batch: evaluator.evaluate_batch(batch, state), batch=True
+        )
+        for danmaku in dropped:
+            state.memory.danmaku_memory["ignored"].append(danmaku.text)
+
+    def _record_response(self, state: PerformanceState, danmaku: Danmaku, handle_result: Dict):
+        """弹幕出队，记录回应和（吊胃口时的）承诺。"""
+        state.danmaku_queue.remove(danmaku)
+        state.memory.danmaku_memory["responded"].append(danmaku.text)
+
+        if danmaku.is_question() and handle_result.get("action") == "tease":
+            answer_loc = handle_result.get("answer_loc", {})
+            if answer_loc.get("found"):
+                state.memory.promises.append(
+                    {
+                        "content": danmaku.text,
+                        "made_at_step": state.current_step,
+                        "fulfilled": False,
+                        "answer_at_line": answer_loc.get("line_idx"),
+                    }
+                )
+
+    def _continue_output(self, current_line) -> Dict:
+        """无弹幕打断时，照剧本念。"""
+        return {
+            "speech": current_line.text,
+            "action": "continue",
+            "priority": 0.0,
+            "cost": current_line.interruption_cost,
+        }
+
+    def _advance(self, state: PerformanceState, current_line) -> int:
+        """推进剧本进度并更新记忆，返回刚表演完的行号。"""
         state.current_line_idx += 1
         state.current_step += 1
 
-        for info in current_line.key_info:
-            if info not in state.memory.story_points["mentioned"]:
-                state.memory.story_points["mentioned"].append(info)
+        state.memory.story_points["mentioned"].extend(current_line.key_info)
 
         state.memory.script_progress["current_line"] = state.current_line_idx
         state.memory.script_progress["total_lines"] = len(state.script_lines)
         state.memory.script_progress["current_stage"] = current_line.stage
 
         self._check_promises(current_line, state)
+        return state.current_line_idx - 1
+
+    def _open_stream(
+        self, state: PerformanceState, on_audio_chunk: Optional[Callable[[Dict], None]]
+    ) -> Optional[SpeechStream]:
+        """流式模式下为本步创建语音输出流。"""
+        if not on_audio_chunk or not self.tts.enabled:
+            return None
+        return SpeechStream(
+            self.tts,
+            on_audio_chunk,
+            step=state.current_step + 1,
+            line_idx=state.current_line_idx,
+            lipsync=self.lipsync,
+        )
 
+    def _speak(
+        self,
+        output: Dict,
+        current_line,
+        line_idx: int,
+        stream: Optional[SpeechStream] = None,
+    ) -> Tuple[Optional[bytes], Optional[VisemeTrack]]:
+        """合成本步语音并分析口型（流式时口型已随分片分析完）。"""
+        audio = self._synthesize_speech(output, current_line, line_idx, stream)
+        if stream and stream.first_audio_at is not None:
+            # 供播放调度使用：客户端从首个分片到达时开始播放
+            output["_first_audio_at"] = stream.first_audio_at
+        if not self.lipsync:
+            return audio, None
+        if stream and stream.viseme_track is not None:
+            return audio, stream.viseme_track
+        return audio, analyze_audio(audio)
+
+    def _synthesize_speech(
+        self,
+        output: Dict,
+        current_line,
+        line_idx: int,
+        stream: Optional[SpeechStream] = None,
+    ) -> Optional[bytes]:
+        """合成本步语音（优先取用预渲染 / 预取结果；流式模式下逐片下发）。"""
         speech = output.get("speech", "")
-        audio = None
-        if speech and self.tts.enabled:
-            emotion_boost = {
-                "Hook": 0.3,
-                "Build-up": 0.2,
-                "Climax": 0.8,
-                "Resolution": 0.4,
-            }.get(current_line.stage, 0.0)
-
-            if isinstance(current_line.emotion_break, dict):
-                level = current_line.emotion_break.get("level", 0)
-                emotion_boost += level * 0.15
-
-            if output.get("action") in ["tease", "improvise", "jump"]:
-                emotion_boost += 0.2
-
-            emotion_boost = min(1.0, emotion_boost)
-            audio = self.tts.synthesize(speech, emotion_boost=emotion_boost)
-
+        if not speech or not self.tts.enabled:
+            return stream.close() if stream else None
+
+        if stream and output.get("streamed"):
+            # 弹幕回应已在 LLM 生成过程中送入语音流
+            self.prefetcher.cancel(line_idx)
+            self.prerenderer.discard(line_idx)
+            return stream.close()
+
+        speculated = output.pop("_speculated_audio", None)
+        if speculated:
+            # 回应语音已预先合成，只需合成后续台词
+            self.prefetcher.cancel(line_idx)
+            self.prerenderer.discard(line_idx)
+            response_audio, tail, emotion_boost = speculated
+            tail_audio = self.tts.synthesize(tail, emotion_boost, False) if tail else None
+            audio = join_audio([response_audio, tail_audio])
+            self.tts.record_clip(audio)
+            return audio
+
+        if speech == current_line.text:
+            hit, audio = self.prerenderer.take(line_idx, speech)
+            if hit:
+                self.prefetcher.cancel(line_idx)
+            else:
+                hit, audio = self.prefetcher.take(line_idx, speech)
+            if hit:
+                if stream:
+                    output["streamed"] = True
+                    stream.say_audio(speech, audio)
+                    return stream.close()
+                self.tts.record_clip(audio)
+                return audio
+        else:
+            # 弹幕回应替换了原台词，预取 / 预渲染结果作废
+            self.prefetcher.cancel(line_idx)
+            self.prerenderer.discard(line_idx)
+
+        emotion_boost = self._emotion_boost(current_line, output.get("action"))
+        if stream:
+            output["streamed"] = True
+            stream.say(speech, emotion_boost)
+            return stream.close()
+        return self.tts.synthesize(speech, emotion_boost=emotion_boost)
+
+    def _finalize_output(
+        self,
+        state: PerformanceState,
+        current_line,
+        output: Dict,
+        audio: Optional[bytes],
+        line_idx: int,
+        visemes: Optional[VisemeTrack] = None,
+    ) -> Dict:
+        """补全输出字段并记录情绪轨迹。"""
         output["audio"] = audio
-        output["line_idx"] = state.current_line_idx - 1
+        output["line_idx"] = line_idx
         output["stage"] = current_line.stage
         output["step"] = state.current_step
         output["disfluencies"] = current_line.disfluencies
         output["emotion_break"] = current_line.emotion_break
         # 添加表演标注
         output["cue"] = current_line.cue.to_dict() if hasattr(current_line, 'cue') and current_line.cue else None
+        if visemes is not None and len(visemes):
+            # 口型由本步实际音频分析得到（剧本中的 LipsyncCue 只是占位）
+            lipsync = LipsyncCue(enabled=True, track=visemes.to_dict(), **visemes.summary())
+            output["cue"] = {**(output["cue"] or {}), "lipsync": lipsync.to_dict()}
 
         if isinstance(current_line.emotion_break, dict):
             state.memory.emotion_track.append(
                 {
                     "step": state.current_step,
-                    "line_idx": state.current_line_idx - 1,
+                    "line_idx": line_idx,
                     "level": current_line.emotion_break.get("level", 0),
                     "trigger": current_line.emotion_break.get("trigger", ""),
                     "stage": current_line.stage,
                 }
             )
 
-        output["memory_display"] = state.memory.to_display()
+        return output
+
+    def _next_line(self, state: PerformanceState):
+        """当前行之后的下一行（用于弹幕回应上下文）。"""
+        if state.current_line_idx < len(state.script_lines) - 1:
+            return state.script_lines[state.current_line_idx + 1]
+        return None
+
+    def _take_speculated(
+        self,
+        danmaku: Danmaku,
+        handle_result: Dict,
+        current_line,
+        state: PerformanceState,
+        stream: Optional[SpeechStream],
+    ) -> Optional[Dict]:
+        """取用预生成的弹幕回应；未命中时返回 None。"""
+        if not self.speculator.enabled:
+            return None
+        speculated = self.speculator.take(danmaku, state.current_line_idx)
+        return self._use_speculated(speculated, danmaku, handle_result, current_line, stream)
+
+    async def _atake_speculated(
+        self,
+        danmaku: Danmaku,
+        handle_result: Dict,
+        current_line,
+        state: PerformanceState,
+        stream: Optional[SpeechStream],
+    ) -> Optional[Dict]:
+        """取用预生成的弹幕回应（asyncio 版本，等待时不阻塞事件循环）。"""
+        if not self.speculator.enabled:
+            return None
+        speculated = await self.speculator.atake(danmaku, state.current_line_idx)
+        return self._use_speculated(speculated, danmaku, handle_result, current_line, stream)
+
+    def _use_speculated(
+        self,
+        speculated: Optional[Tuple[Dict, Optional[bytes], float]],
+        danmaku: Danmaku,
+        handle_result: Dict,
+        current_line,
+        stream: Optional[SpeechStream],
+    ) -> Optional[Dict]:
+        if speculated is None:
+            return None
+
+        llm_result, response_audio, speculated_boost = speculated
+        emotion_boost = self._emotion_boost(current_line, handle_result.get("action", "improvise"))
+        if speculated_boost != emotion_boost:
+            # 情绪参数不一致时重新合成
+            response_audio = None
+
+        tail = self._speech_tail(llm_result, current_line)
+        output = self._compose_danmaku_output(
+            danmaku, handle_result, current_line, llm_result, tail=tail
+        )
+        output["speculated"] = True
+
+        response = llm_result.get("response", "")
+        if stream:
+            if response_audio:
+                stream.say_audio(response, response_audio)
+            else:
+                stream.say(response, emotion_boost)
+            stream.say(tail, emotion_boost)
+            output["streamed"] = True
+        elif response_audio:
+            output["_speculated_audio"] = (response_audio, tail, emotion_boost)
         return output
 
     def _handle_danmaku_response(
@@ -140,34 +457,124 @@ class PerformerV3:
         state: PerformanceState,
     ) -> Dict:
         """处理弹幕回应 - 使用 LLM 生成自然回应。"""
-        next_line = None
-        if state.current_line_idx < len(state.script_lines) - 1:
-            next_line = state.script_lines[state.current_line_idx + 1]
-
         llm_result = self.response_generator.generate_response(
             danmaku=danmaku,
             current_line=current_line,
-            next_line=next_line,
+            next_line=self._next_line(state),
             memory=state.memory,
             name=state.name,
         )
+        return self._compose_danmaku_output(danmaku, handle_result, current_line, llm_result)
 
-        response = llm_result.get("response", "")
+    async def _ahandle_danmaku_response(
+        self,
+        danmaku: Danmaku,
+        handle_result: Dict,
+        current_line,
+        state: PerformanceState,
+    ) -> Dict:
+        """处理弹幕回应（asyncio 版本）。"""
+        llm_result = await self.response_generator.agenerate_response(
+            danmaku=danmaku,
+            current_line=current_line,
+            next_line=self._next_line(state),
+            memory=state.memory,
+            name=state.name,
+        )
+        return self._compose_danmaku_output(danmaku, handle_result, current_line, llm_result)
+
+    def _handle_danmaku_response_streaming(
+        self,
+        danmaku: Danmaku,
+        handle_result: Dict,
+        current_line,
+        state: PerformanceState,
+        stream: SpeechStream,
+    ) -> Dict:
+        """流式处理弹幕回应：LLM 的 response 字段边生成边送入语音流。"""
+        emotion_boost = self._emotion_boost(current_line, handle_result.get("action", "improvise"))
+        llm_result = self.response_generator.generate_response_stream(
+            danmaku=danmaku,
+            current_line=current_line,
+            next_line=self._next_line(state),
+            memory=state.memory,
+            name=state.name,
+            on_clause=lambda clause: stream.say(clause, emotion_boost),
+        )
+        return self._compose_streamed_output(
+            danmaku, handle_result, current_line, llm_result, stream, emotion_boost
+        )
+
+    async def _ahandle_danmaku_response_streaming(
+        self,
+        danmaku: Danmaku,
+        handle_result: Dict,
+        current_line,
+        state: PerformanceState,
+        stream: SpeechStream,
+    ) -> Dict:
+        """流式处理弹幕回应（asyncio 版本）。"""
+        emotion_boost = self._emotion_boost(current_line, handle_result.get("action", "improvise"))
+        llm_result = await self.response_generator.agenerate_response_stream(
+            danmaku=danmaku,
+            current_line=current_line,
+            next_line=self._next_line(state),
+            memory=state.memory,
+            name=state.name,
+            on_clause=lambda clause: stream.say(clause, emotion_boost),
+        )
+        return self._compose_streamed_output(
+            danmaku, handle_result, current_line, llm_result, stream, emotion_boost
+        )
+
+    def _compose_streamed_output(
+        self,
+        danmaku: Danmaku,
+        handle_result: Dict,
+        current_line,
+        llm_result: Dict,
+        stream: SpeechStream,
+        emotion_boost: float,
+    ) -> Dict:
+        """LLM 结束后，把尚未说出的部分（兜底回应 + 后续台词）也送入语音流。"""
+        if not llm_result.get("spoken_response"):
+            stream.say(llm_result.get("response", ""), emotion_boost)
+        tail = self._speech_tail(llm_result, current_line)
+        stream.say(tail, emotion_boost)
+
+        output = self._compose_danmaku_output(
+            danmaku, handle_result, current_line, llm_result, tail=tail
+        )
+        output["streamed"] = True
+        return output
+
+    def _speech_tail(self, llm_result: Dict, current_line) -> str:
+        """弹幕回应之后接着说的内容。"""
         llm_action = llm_result.get("action", "continue")
         next_content = llm_result.get("next_content", "")
 
-        if llm_action == "continue":
-            speech = f"{response} {current_line.text}"
-        elif llm_action == "adapt":
-            speech = f"{response} {next_content or current_line.text}"
-        elif llm_action == "digress":
+        if llm_action == "adapt":
+            return next_content or current_line.text
+        if llm_action == "digress":
             if next_content:
-                speech = f"{response} {next_content}"
-            else:
-                transition = self._generate_transition()
-                speech = f"{response} {transition}{current_line.text}"
-        else:
-            speech = f"{response} {current_line.text}"
+                return next_content
+            return f"{self._generate_transition()}{current_line.text}"
+        return current_line.text
+
+    def _compose_danmaku_output(
+        self,
+        danmaku: Danmaku,
+        handle_result: Dict,
+        current_line,
+        llm_result: Dict,
+        tail: Optional[str] = None,
+    ) -> Dict:
+        """把 LLM 回应与剧本台词拼接成本步输出。"""
+        response = llm_result.get("response", "")
+        llm_action = llm_result.get("action", "continue")
+        if tail is None:
+            tail = self._speech_tail(llm_result, current_line)
+        speech = f"{response} {tail}"
 
         return {
             "speech": speech,
@@ -179,6 +586,74 @@ class PerformerV3:
             "relevance": handle_result.get("relevance", 0),
         }
 
+    def _emotion_boost(self, line, action: Optional[str] = "continue") -> float:
+        """根据阶段、情绪断点和叙事动作计算 TTS 情绪增强。"""
+        emotion_boost = {
+            "Hook": 0.3,
+            "Build-up": 0.2,
+            "Climax": 0.8,
+            "Resolution": 0.4,
+        }.get(line.stage, 0.0)
+
+        if isinstance(line.emotion_break, dict):
+            level = line.emotion_break.get("level", 0)
+            emotion_boost += level * 0.15
+
+        if action in ["tease", "improvise", "jump"]:
+            emotion_boost += 0.2
+
+        return min(1.0, emotion_boost)
+
+    def schedule_prefetch(self, state: PerformanceState):
+        """为接下来的剧本台词提交 TTS 预取任务。"""
+        if not self.prefetcher.enabled:
+            return
+        start = state.current_line_idx
+        end = min(start + self.prefetcher.lookahead, len(state.script_lines))
+        upcoming = [
+            (idx, state.script_lines[idx].text, self._emotion_boost(state.script_lines[idx]))
+            for idx in range(start, end)
+            if idx not in self.prerenderer  # 已预渲染的台词无需预取
+        ]
+        self.prefetcher.schedule(start, upcoming)
+
+    def schedule_speculation(self, state: PerformanceState):
+        """
+        为队列中排名靠前的弹幕提交回应预生成任务（针对下一步将要表演的台词）。
+
+        每步结束时自动调用；弹幕在台词播放期间到达时请调用 request_speculation。
+        """
+        if not self.speculator.enabled or state.current_line_idx >= len(state.script_lines):
+            return
+        self._admit_danmaku(state)
+        candidates = state.danmaku_queue.top(self.speculator.top_k)
+
+        current_line = state.script_lines[state.current_line_idx]
+        self.speculator.schedule(
+            state.current_line_idx,
+            candidates,
+            current_line=current_line,
+            next_line=self._next_line(state),
+            memory=state.memory,
+            name=state.name,
+            emotion_boost=self._emotion_boost(current_line, "improvise"),
+        )
+
+    def request_speculation(self, state: PerformanceState):
+        """
+        新弹幕到达后请求重新排名并预生成回应。
+
+        必须在驱动表演的线程 / 事件循环中调用（_in_step 与 state 都不加锁）；
+        其他线程请用 loop.call_soon_threadsafe(performer.request_speculation, state)。
+
+        表演步执行中时不动 state（该步可能正在线程池里合成语音、推进剧本），
+        也不会为正在表演的台词白花一次 LLM 调用：每步结束时都会调用
+        schedule_speculation，新弹幕届时一并参与排名。空闲时立即调度。
+        """
+        if self._in_step:
+            return
+        self.schedule_speculation(state)
+
     def _generate_transition(self) -> str:
         """生成承接语。"""
         transitions = ["好，那刚才说到，", "回到我们的故事，", "继续说，", "对了，", ""]
@@ -186,16 +661,24 @@ class PerformerV3:
 
     def _check_promises(self, current_line, state: PerformanceState):
         """检查当前台词是否兑现了承诺。"""
-        for promise in state.memory.promises:
-            if promise.get("fulfilled", False):
-                continue
-            if promise.get("answer_at_line") == state.current_line_idx - 1:
-                promise["fulfilled"] = True
+        state.memory.promises.fulfill_at(state.current_line_idx - 1)
 
     def _generate_ending(self, state: PerformanceState) -> Dict:
         """生成结尾。"""
-        speech = f"好啦，今天关于{state.topic}就聊到这里，谢谢大家！"
+        speech = self._ending_speech(state)
         audio = self.tts.synthesize(speech) if self.tts.enabled else None
+        return self._ending_output(state, speech, audio)
+
+    async def _agenerate_ending(self, state: PerformanceState) -> Dict:
+        """生成结尾（asyncio 版本）。"""
+        speech = self._ending_speech(state)
+        audio = await self.tts.asynthesize(speech) if self.tts.enabled else None
+        return self._ending_output(state, speech, audio)
+
+    def _ending_speech(self, state: PerformanceState) -> str:
+        return f"好啦，今天关于{state.topic}就聊到这里，谢谢大家！"
+
+    def _ending_output(self, state: PerformanceState, speech: str, audio: Optional[bytes]) -> Dict:
         return {
             "speech": speech,
             "action": "end",
@@ -203,5 +686,4 @@ class PerformerV3:
             "audio": audio,
             "disfluencies": [],
             "emotion_break": None,
-            "memory_display": state.memory.to_display(),
         }
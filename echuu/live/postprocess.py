@@ -0,0 +1,172 @@
+"""
+TTS 音频后处理：静音裁剪、响度归一与淡入淡出。
+
+不同次 TTS 调用的音频音量不一，首尾还带着长短不一的静音：静音在步与步之间变成
+冷场，音量跳变听得很明显。AudioPostProcessor 对每段 16-bit 单声道 WAV
+（裸 PCM 用 process_pcm）：
+
+1. 按 10ms 帧的 RMS 找出首尾静音并裁掉（两端各保留 pad_ms，避免吃掉辅音起音）
+2. 按近似 LUFS 把响度拉到 target_lufs（400ms 块、100ms 步长的均方能量，
+   -70 LUFS 绝对门限 + -10 LU 相对门限；不做 K 加权，对语音约有 1-2dB 偏差），
+   增益受 max_gain_db 与峰值上限约束，不会削波
+3. 首尾各做 fade_ms 的线性淡入淡出，消除裁剪处的咔哒声
+
+分析与裁剪都在 np.frombuffer 的只读视图上完成，整段只转换一次 float32 工作缓冲；
+24kHz 音频每秒处理耗时约几十微秒。处理后的时长写在输出 WAV 的文件头里，
+播放调度（scheduler.audio_duration）读到的就是裁剪后的实际时长，
+并作为 audio_duration 写入每步结果。
+
+mp3 等压缩格式需要解码，这里原样返回。
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Optional
+
+from .audio import is_wav, parse_wav, pcm_to_wav
+
+# 16-bit 满幅
+FULL_SCALE = 32768.0
+
+
+@dataclass
+class ProcessedAudio:
+    """一段后处理后的音频。"""
+
+    audio: bytes
+    trimmed: float = 0.0  # 裁掉的静音（秒）
+    gain_db: float = 0.0
+    loudness: Optional[float] = None  # 处理前的近似 LUFS（无法测量时为 None）
+    processed: bool = False
+
+
+class AudioPostProcessor:
+    """16-bit 单声道语音的后处理（无状态，可在多个线程中共用）。"""
+
+    def __init__(
+        self,
+        target_lufs: float = -18.0,
+        silence_db: float = -45.0,
+        pad_ms: float = 60.0,
+        fade_ms: float = 8.0,
+        max_gain_db: float = 12.0,
+        peak_db: float = -1.0,
+    ):
+        """
+        Args:
+            target_lufs: 目标响度（近似 LUFS）
+            silence_db: 帧 RMS 低于该值（dBFS）视为静音
+            pad_ms: 裁剪后首尾保留的静音
+            fade_ms: 淡入淡出时长
+            max_gain_db: 最大增益（避免把几乎无声的片段放大成噪声）
+            peak_db: 处理后的峰值上限（dBFS）
+        """
+        self.target_lufs = target_lufs
+        self.silence_db = silence_db
+        self.pad_ms = pad_ms
+        self.fade_ms = fade_ms
+        self.max_gain_db = max_gain_db
+        self.peak_db = peak_db
+
+    def process(self, audio: Optional[bytes]) -> ProcessedAudio:
+        """
+        处理一段 WAV（采样率以文件头为准）。
+
+        非 WAV（mp3 等，以及无法与压缩格式区分的裸 PCM）和非 16-bit 单声道的 WAV
+        原样返回；裸 PCM 请调用 process_pcm。
+        """
+        if not audio:
+            return ProcessedAudio(audio=audio or b"")
+        if not is_wav(audio):
+            return ProcessedAudio(audio=audio)
+        pcm, sample_rate, channels, sample_width = parse_wav(audio)
+        if (channels, sample_width) != (1, 2):
+            return ProcessedAudio(audio=audio)
+        return self.process_pcm(pcm, sample_rate, original=audio)
+
+    def process_pcm(
+        self, pcm: bytes, sample_rate: int = 24000, original: Optional[bytes] = None
+    ) -> ProcessedAudio:
+        """处理 16-bit 单声道 PCM，返回 WAV。original 为未改动时直接返回的原始数据。"""
+        import numpy as np
+
+        samples = np.frombuffer(pcm, dtype="<i2", count=len(pcm) // 2)
+        total = len(samples)
+        unchanged = ProcessedAudio(
+            audio=original if original is not None else pcm_to_wav(pcm, sample_rate)
+        )
+        frame = max(1, sample_rate // 100)  # 10ms
+        n_frames = total // frame
+        if n_frames == 0:
+            return unchanged
+
+        # 帧能量（均方，满幅归一）：只转换一次 float32
+        work = samples.astype(np.float32)
+        work *= 1.0 / FULL_SCALE
+        frames = work[: n_frames * frame].reshape(n_frames, frame)
+        energy = np.einsum("ij,ij->i", frames, frames) / frame
+
+        voiced = np.flatnonzero(energy > 10.0 ** (self.silence_db / 10.0))
+        if len(voiced) == 0:
+            return unchanged  # 整段静音，不处理
+
+        pad = int(sample_rate * self.pad_ms / 1000)
+        start = max(0, voiced[0] * frame - pad)
+        end = min(total, (voiced[-1] + 1) * frame + pad)
+
+        loudness = self._loudness(energy[voiced[0] : voiced[-1] + 1], np)
+        gain_db = 0.0
+        if loudness is not None:
+            gain_db = min(self.target_lufs - loudness, self.max_gain_db)
+        out = work[start:end]  # 视图，不复制
+        peak = float(np.max(np.abs(out)))
+        if peak > 0:
+            # 不超过峰值上限（必要时允许为负增益，即衰减）
+            gain_db = min(gain_db, self.peak_db - 20.0 * math.log10(peak))
+
+        if abs(gain_db) < 0.1 and start == 0 and end == total:
+            unchanged.loudness = loudness
+            return unchanged
+
+        out *= FULL_SCALE * 10.0 ** (gain_db / 20.0)
+        fade = min(int(sample_rate * self.fade_ms / 1000), len(out) // 2)
+        if fade > 0:
+            ramp = np.linspace(0.0, 1.0, fade, endpoint=False, dtype=np.float32)
+            out[:fade] *= ramp
+            out[-fade:] *= ramp[::-1]
+        np.clip(out, -FULL_SCALE, FULL_SCALE - 1, out=out)
+
+        processed = out.astype("<i2").tobytes()
+        return ProcessedAudio(
+            audio=pcm_to_wav(processed, sample_rate=sample_rate),
+            trimmed=(total - len(out)) / float(sample_rate),
+            gain_db=gain_db,
+            loudness=loudness,
+            processed=True,
+        )
+
+    @staticmethod
+    def _loudness(energy, np) -> Optional[float]:
+        """
+        由 10ms 帧能量估算近似 LUFS：400ms 块（100ms 步长）的均方，
+        先去掉低于 -70 LUFS 的块，再去掉比其余块平均响度低 10 LU 以上的块。
+        """
+        block, hop = 40, 10
+        if len(energy) < block:
+            blocks = np.array([energy.mean()])
+        else:
+            csum = np.concatenate(([0.0], np.cumsum(energy, dtype=np.float64)))
+            starts = np.arange(0, len(energy) - block + 1, hop)
+            blocks = (csum[starts + block] - csum[starts]) / block
+
+        def lufs(ms):
+            return -0.691 + 10.0 * np.log10(np.maximum(ms, 1e-12))
+
+        gated = blocks[lufs(blocks) > -70.0]
+        if len(gated) == 0:
+            return None
+        relative = lufs(gated.mean()) - 10.0
+        gated = gated[lufs(gated) > relative]
+        return float(lufs(gated.mean()))
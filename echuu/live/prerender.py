@@ -0,0 +1,165 @@
+"""
+剧本语音预渲染。
+
+setup() 结束时整份剧本已经确定，而表演时仍是一行一行地合成语音。预渲染在开播前
+用有限的线程数并发合成全部 script_lines（按 rate 限制每秒请求数，避免触发 TTS 服务的
+QPS 限制），表演时原样念出的台词直接取用，只有弹幕驱动的回应才实时合成。
+
+合成走 TTSClient.synthesize，启用了 TTSCache 时结果同时写入缓存；
+也可以指定 output_dir，把每行音频另存为 line_000.wav 这样的文件。
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Tuple, Union
+
+from .tts_client import TTSClient
+
+
+class RateLimiter:
+    """令牌桶限流：平均每秒 rate 次，最多连续 burst 次（线程安全）。"""
+
+    def __init__(self, rate: float, burst: int = 1, clock: Callable[[], float] = time.monotonic):
+        if rate <= 0:
+            raise ValueError("rate 必须大于 0")
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.clock = clock
+        self._tokens = float(self.burst)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """占用一个令牌，返回调用方还需等待的秒数。"""
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self):
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class ScriptPrerenderer:
+    """
+    剧本台词语音预渲染器。
+
+    - render(): 阻塞直到全部台词合成完毕（或失败），通过 on_progress(done, total) 汇报进度
+    - take(): 与 TTSPrefetcher.take 相同的语义，按 line_idx 取用并校验文本
+    """
+
+    def __init__(self, tts: TTSClient, max_workers: int = 4, rate: Optional[float] = None):
+        self.tts = tts
+        self.max_workers = max(1, max_workers)
+        self.rate = rate
+        self._audio: Dict[int, Tuple[str, bytes]] = {}
+        self._lock = threading.Lock()
+        self.stats = {"rendered": 0, "failed": 0, "hits": 0, "seconds": 0.0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.tts.enabled
+
+    def __contains__(self, line_idx: int) -> bool:
+        with self._lock:
+            return line_idx in self._audio
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._audio)
+
+    def render(
+        self,
+        lines: Iterable[Tuple[int, str, float]],
+        output_dir: Optional[Union[str, Path]] = None,
+        on_progress: Optional[Callable[[int, int], None]] = None,
+    ) -> Dict[str, float]:
+        """
+        并发合成台词语音。
+
+        Args:
+            lines: (line_idx, text, emotion_boost) 列表
+            output_dir: 另存每行音频的目录（可选）
+            on_progress: 每完成一行回调 (已完成行数, 总行数)，在调用 render 的线程中执行
+
+        Returns:
+            stats（rendered / failed / seconds）
+        """
+        todo = [(idx, text, boost) for idx, text, boost in lines if text and text.strip()]
+        if not self.enabled or not todo:
+            return dict(self.stats)
+
+        limiter = RateLimiter(self.rate, burst=self.max_workers) if self.rate else None
+        out = Path(output_dir) if output_dir else None
+        if out:
+            out.mkdir(parents=True, exist_ok=True)
+        ext = ".wav" if self.tts.stream_format in ("pcm", "wav") else f".{self.tts.stream_format}"
+
+        def _render(text: str, emotion_boost: float) -> Optional[bytes]:
+            if limiter:
+                limiter.acquire()
+            return self.tts.synthesize(text, emotion_boost, False)
+
+        start = time.perf_counter()
+        done = 0
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="echuu-tts-prerender"
+        ) as executor:
+            futures = {
+                executor.submit(_render, text, boost): (idx, text) for idx, text, boost in todo
+            }
+            for future in as_completed(futures):
+                idx, text = futures[future]
+                try:
+                    audio = future.result()
+                except Exception as exc:
+                    print(f"[TTS] 预渲染失败 (line {idx}): {exc}")
+                    audio = None
+                if audio:
+                    with self._lock:
+                        self._audio[idx] = (text, audio)
+                    self.stats["rendered"] += 1
+                    if out:
+                        (out / f"line_{idx:03d}{ext}").write_bytes(audio)
+                else:
+                    self.stats["failed"] += 1
+                done += 1
+                if on_progress:
+                    on_progress(done, len(todo))
+
+        self.stats["seconds"] += time.perf_counter() - start
+        return dict(self.stats)
+
+    def take(self, line_idx: int, text: str) -> Tuple[bool, Optional[bytes]]:
+        """
+        取出预渲染结果（文本不一致时视为未命中，例如台词被弹幕回应改写）。
+
+        Returns:
+            (命中与否, 音频)
+        """
+        with self._lock:
+            entry = self._audio.pop(line_idx, None)
+        if entry is None or entry[0] != text:
+            return False, None
+        self.stats["hits"] += 1
+        return True, entry[1]
+
+    def discard(self, line_idx: int):
+        """丢弃某一行的预渲染结果（该行被弹幕回应替换）。"""
+        with self._lock:
+            self._audio.pop(line_idx, None)
+
+    def reset(self):
+        """丢弃所有预渲染结果。"""
+        with self._lock:
+            self._audio.clear()
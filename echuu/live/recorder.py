@@ -0,0 +1,192 @@
+"""
+流式录制：边演边写盘，内存占用与直播时长无关。
+
+原来的录制把每段音频都留在内存里，结束时首尾相接写出；而每段 PCM 都已经封装成
+完整的 WAV（带文件头），拼出来的文件中间夹着文件头。StreamingRecorder 在每段音频
+到达时只把 PCM 追加到磁盘，并随即回填文件头中 RIFF 与 data 的长度，
+输出始终是一个合法的单轨 WAV（进程中途退出时已写入的部分也能正常播放）。
+
+    recorder = StreamingRecorder("output/scripts/live.wav", segment_seconds=3600)
+    recorder.write(wav_clip)
+    ...
+    recorder.close()
+
+- segment_seconds: 滚动分段，每段写满后另起 live_001.wav、live_002.wav ...
+  （按采样精确切分；单个 WAV 最大 4GB，24kHz 单声道约 24 小时，长时间直播建议分段）
+- 非 WAV 音频（mp3 / opus 等）按原样追加：mp3 帧可直接拼接，Ogg Opus 会成为
+  依次衔接的链式流；这类格式无法从字节数得到时长，不分段
+"""
+
+from __future__ import annotations
+
+import struct
+import threading
+from pathlib import Path
+from typing import BinaryIO, List, Optional, Union
+
+from .audio import is_wav, parse_wav, wav_header
+
+WAV_HEADER_SIZE = 44
+# WAV 的长度字段是 32 位
+MAX_WAV_DATA = 0xFFFFFFFF - (WAV_HEADER_SIZE - 8)
+
+
+class StreamingRecorder:
+    """
+    追加写盘的录音器（线程安全）。
+
+    输出格式由第一段音频决定：WAV（或裸 PCM，按 sample_rate 等参数解释）写成单个 WAV，
+    其他格式原样追加。之后格式不一致的片段会被跳过并打印警告。
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        sample_rate: int = 24000,
+        channels: int = 1,
+        sample_width: int = 2,
+        segment_seconds: Optional[float] = None,
+        raw_format: str = "wav",
+    ):
+        """
+        Args:
+            path: 输出文件；分段时作为第一段，其后的文件名加 _001、_002 后缀
+            sample_rate / channels / sample_width: 裸 PCM 片段的参数（WAV 片段以文件头为准）
+            segment_seconds: WAV 每段最长秒数（None 表示不分段）
+            raw_format: 传入的非 WAV 片段是 "pcm" 还是已编码格式（默认按编码格式原样追加）
+        """
+        self.path = Path(path)
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.sample_width = sample_width
+        self.segment_seconds = segment_seconds
+        self.raw_format = raw_format.lower()
+        self.paths: List[Path] = []
+        self.clips = 0
+        self.bytes_written = 0  # 音频数据总字节数（不含文件头）
+        self.skipped = 0
+        self._mode: Optional[str] = None  # "wav" / "raw"
+        self._file: Optional[BinaryIO] = None
+        self._segment_bytes = 0
+        self._lock = threading.Lock()
+        self.closed = False
+
+    @property
+    def bytes_per_second(self) -> int:
+        return self.sample_rate * self.channels * self.sample_width
+
+    @property
+    def duration(self) -> float:
+        """已录制的时长（秒，仅 WAV 模式）。"""
+        if self._mode != "wav":
+            return 0.0
+        return self.bytes_written / float(self.bytes_per_second)
+
+    def _segment_path(self, index: int) -> Path:
+        if index == 0:
+            return self.path
+        return self.path.with_name(f"{self.path.stem}_{index:03d}{self.path.suffix}")
+
+    def _segment_limit(self) -> int:
+        """WAV 模式下每个分段的最大字节数（按整帧对齐）。"""
+        frame = self.channels * self.sample_width
+        limit = MAX_WAV_DATA
+        if self.segment_seconds is not None:
+            limit = min(limit, int(self.segment_seconds * self.bytes_per_second))
+        return max(frame, limit - limit % frame)
+
+    def _open_segment(self):
+        path = self._segment_path(len(self.paths))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = path.open("wb")
+        self.paths.append(path)
+        self._segment_bytes = 0
+        if self._mode == "wav":
+            self._file.write(
+                wav_header(0, self.sample_rate, self.channels, self.sample_width)
+            )
+
+    def _finish_segment(self):
+        if self._file is None:
+            return
+        self._patch_header()
+        self._file.close()
+        self._file = None
+
+    def _patch_header(self):
+        """回填 WAV 长度字段并刷盘（文件指针保持在末尾）。"""
+        if self._file is None:
+            return
+        if self._mode == "wav":
+            self._file.seek(4)
+            self._file.write(struct.pack("<I", 36 + self._segment_bytes))
+            self._file.seek(40)
+            self._file.write(struct.pack("<I", self._segment_bytes))
+            self._file.seek(0, 2)
+        self._file.flush()
+
+    def _classify(self, audio: bytes):
+        """返回 (模式, 数据)；WAV 片段取出 PCM。"""
+        if is_wav(audio):
+            pcm, sample_rate, channels, sample_width = parse_wav(audio)
+            if self._mode is None:
+                self.sample_rate, self.channels, self.sample_width = sample_rate, channels, sample_width
+            elif (sample_rate, channels, sample_width) != (
+                self.sample_rate, self.channels, self.sample_width
+            ):
+                return None, b""
+            return "wav", pcm
+        if self.raw_format == "pcm":
+            return "wav", audio
+        return "raw", audio
+
+    def write(self, audio: Optional[bytes]):
+        """追加一段音频（WAV / 裸 PCM / 已编码格式）。"""
+        if not audio:
+            return
+        with self._lock:
+            if self.closed:
+                return
+            mode, data = self._classify(audio)
+            if mode is None or (self._mode is not None and mode != self._mode):
+                self.skipped += 1
+                print(f"[录制] 跳过格式不一致的音频片段 ({len(audio)} bytes)")
+                return
+            if self._mode is None:
+                self._mode = mode
+            if self._file is None:
+                self._open_segment()
+
+            if mode == "raw":
+                self._file.write(data)
+                self._segment_bytes += len(data)
+            else:
+                limit = self._segment_limit()
+                view = memoryview(data)
+                while view:
+                    room = limit - self._segment_bytes
+                    if room <= 0:
+                        self._finish_segment()
+                        self._open_segment()
+                        continue
+                    part = view[:room]
+                    self._file.write(part)
+                    self._segment_bytes += len(part)
+                    view = view[len(part):]
+            self.bytes_written += len(data)
+            self.clips += 1
+            self._patch_header()
+
+    def close(self) -> List[Path]:
+        """结束录制，返回写出的文件列表。"""
+        with self._lock:
+            if not self.closed:
+                self._finish_segment()
+                self.closed = True
+            return list(self.paths)
+
+    def __enter__(self) -> "StreamingRecorder":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
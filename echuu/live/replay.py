@@ -0,0 +1,345 @@
+"""
+离线回放：用保存的剧本 + 录制的弹幕轨迹跑完整的表演循环，统计每步延迟。
+
+    python -m echuu.live.replay output/scripts/xxx.json --danmaku output/test_danmaku.json --speed 20
+
+LLM / TTS 使用 offline.py 中的离线后端（按延迟分布 sleep，speed 倍加速），
+不需要任何 API Key，也不联网。输出每步的延迟分解（关键路径上的 LLM / TTS / 其他，
+以及与之并行的后台调用）和整体吞吐。
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .audio import wav_duration
+from .engine import EchuuLiveEngine
+from .offline import LatencyModel, ScriptedLLM, SyntheticTTS
+from .postprocess import AudioPostProcessor
+from .tts_cache import TTSCache
+
+# 默认延迟配置（秒，未加速）：大致对应 Claude Haiku 首 token / 逐 token 和 realtime TTS
+DEFAULT_LLM_FIRST_TOKEN = 0.6
+DEFAULT_LLM_PER_TOKEN = 0.02
+DEFAULT_TTS_BASE = 0.25
+DEFAULT_TTS_PER_CHAR = 0.03
+
+
+def load_danmaku_trace(path: str, every: int = 2) -> List[Dict]:
+    """
+    载入弹幕轨迹（如 output/test_danmaku.json），转换为 run(danmaku_sim=...) 的格式。
+
+    条目自带 step 或 time（开播后秒数，按播放进度投放）时保留；否则按顺序每 every 步放一条。
+    """
+    with Path(path).open("r", encoding="utf-8") as f:
+        items = json.load(f)
+    trace = []
+    for i, item in enumerate(items):
+        if isinstance(item, str):
+            item = {"text": item}
+        entry = dict(item)
+        if entry.get("time") is None:
+            entry.setdefault("step", i * max(1, every))
+        if entry.get("is_sc") and entry.get("amount") and "SC" not in entry.get("text", ""):
+            entry["text"] = f"SC ¥{entry['amount']} {entry['text']}"
+        trace.append(entry)
+    return trace
+
+
+@dataclass
+class StepTiming:
+    """单步耗时（秒，实际墙钟时间）。"""
+
+    step: int
+    action: str
+    total: float
+    llm: float
+    tts: float
+    other: float
+    first_audio: Optional[float] = None
+    audio_seconds: float = 0.0
+    background: float = 0.0  # 本步期间后台预取 / 预生成线程的 LLM + TTS 耗时（与 total 并行）
+
+
+@dataclass
+class ReplayReport:
+    """回放结果。"""
+
+    steps: List[StepTiming] = field(default_factory=list)
+    wall_time: float = 0.0
+    speed: float = 1.0
+    danmaku: int = 0
+    queue_stats: Dict[str, int] = field(default_factory=dict)
+    prerender_time: float = 0.0  # 开播前预渲染耗时（不计入 wall_time）
+    cache_stats: Optional[Dict[str, float]] = None  # TTS 缓存命中（未启用缓存时为 None）
+
+    @property
+    def audio_seconds(self) -> float:
+        return sum(s.audio_seconds for s in self.steps)
+
+    def summary(self) -> Dict[str, float]:
+        """整体吞吐与平均/最大单步延迟。"""
+        count = len(self.steps) or 1
+        totals = sorted(s.total for s in self.steps) or [0.0]
+        return {
+            "steps": len(self.steps),
+            "wall_time": self.wall_time,
+            "steps_per_sec": len(self.steps) / self.wall_time if self.wall_time else 0.0,
+            "danmaku_per_sec": self.danmaku / self.wall_time if self.wall_time else 0.0,
+            "step_mean": sum(totals) / count,
+            "step_p95": totals[min(len(totals) - 1, int(len(totals) * 0.95))],
+            "step_max": totals[-1],
+            "llm_mean": sum(s.llm for s in self.steps) / count,
+            "tts_mean": sum(s.tts for s in self.steps) / count,
+            "background_mean": sum(s.background for s in self.steps) / count,
+            # 以未加速的时间计：>1 表示生成比播放快
+            "realtime_factor": self.audio_seconds / (self.wall_time * self.speed)
+            if self.wall_time
+            else 0.0,
+            "prerender_time": self.prerender_time,
+        }
+
+    def to_dict(self) -> Dict:
+        return {
+            "summary": self.summary(),
+            "queue": dict(self.queue_stats),
+            "cache": self.cache_stats,
+            "steps": [asdict(s) for s in self.steps],
+        }
+
+
+def make_offline_engine(
+    speed: float = 10.0,
+    seed: Optional[int] = 0,
+    llm_first_token: float = DEFAULT_LLM_FIRST_TOKEN,
+    llm_per_token: float = DEFAULT_LLM_PER_TOKEN,
+    tts_base: float = DEFAULT_TTS_BASE,
+    tts_per_char: float = DEFAULT_TTS_PER_CHAR,
+    jitter: float = 0.3,
+    dist: str = "lognormal",
+    cache_dir: Optional[str] = None,
+    postprocess: bool = False,
+) -> EchuuLiveEngine:
+    """
+    构建使用离线后端的引擎。
+
+    cache_dir 传入时启用 TTS 磁盘缓存，postprocess=True 时启用音频后处理，
+    与线上 TTSClient 的合成路径一致。
+    """
+    llm = ScriptedLLM(
+        first_token=LatencyModel(llm_first_token, jitter=jitter, dist=dist, speed=speed, seed=seed),
+        per_token=LatencyModel(per_unit=llm_per_token, jitter=jitter, dist=dist, speed=speed, seed=seed),
+    )
+    tts = SyntheticTTS(
+        latency=LatencyModel(
+            tts_base, per_unit=tts_per_char, jitter=jitter, dist=dist, speed=speed, seed=seed
+        ),
+        cache=TTSCache(cache_dir) if cache_dir else None,
+        postprocessor=AudioPostProcessor() if postprocess else None,
+    )
+    return EchuuLiveEngine(llm=llm, tts=tts)
+
+
+def replay(
+    engine: EchuuLiveEngine,
+    script_path: str,
+    danmaku_trace: Optional[List[Dict]] = None,
+    max_steps: int = 100,
+    prefetch_lines: int = 0,
+    speculate_danmaku: int = 0,
+    stream: bool = False,
+    use_async: bool = False,
+    speed: float = 1.0,
+    quiet: bool = True,
+    prerender_workers: int = 0,
+) -> ReplayReport:
+    """
+    回放一场表演并统计每步耗时。
+
+    llm / tts 只计本步关键路径上的后端调用（驱动表演的线程与流式合成线程）；
+    预取 / 预生成 / 预渲染线程池里的调用单独记在 background，与本步并行，不计入 total 的分解。
+    other = total - llm - tts，下限 0（流式模式下 LLM 与分句合成重叠，llm + tts 可能大于 total）。
+    prerender_workers > 0 时开播前先预渲染全部台词，耗时单独记在 prerender_time。
+    """
+    sink = io.StringIO() if quiet else None
+    with contextlib.redirect_stdout(sink) if quiet else contextlib.nullcontext():
+        engine.load_script(script_path)
+
+        report = ReplayReport(speed=speed)
+        if prerender_workers > 0:
+            prerender_start = time.perf_counter()
+            engine.prerender_audio(max_workers=prerender_workers)
+            report.prerender_time = time.perf_counter() - prerender_start
+        first_audio: Dict[int, float] = {}
+        step_start = [0.0]
+
+        def on_audio_chunk(chunk: Dict):
+            if chunk.get("data") and chunk.get("step") not in first_audio:
+                first_audio[chunk.get("step")] = time.perf_counter() - step_start[0]
+
+        kwargs = dict(
+            max_steps=max_steps,
+            danmaku_sim=danmaku_trace,
+            prefetch_lines=prefetch_lines,
+            speculate_danmaku=speculate_danmaku,
+            on_audio_chunk=on_audio_chunk if stream else None,
+        )
+
+        def busy() -> tuple:
+            snapshots = [
+                stats.snapshot() if stats else {"busy": 0.0, "background": 0.0}
+                for stats in (getattr(engine.llm, "stats", None), getattr(engine.tts, "stats", None))
+            ]
+            return (
+                snapshots[0]["busy"],
+                snapshots[1]["busy"],
+                snapshots[0]["background"] + snapshots[1]["background"],
+            )
+
+        def record(result: Dict, before: tuple):
+            total = time.perf_counter() - step_start[0]
+            after = busy()
+            llm, tts, background = (a - b for a, b in zip(after, before))
+            step = result.get("step", len(report.steps))
+            report.steps.append(
+                StepTiming(
+                    step=step,
+                    action=result.get("action", "continue"),
+                    total=total,
+                    llm=llm,
+                    tts=tts,
+                    other=max(0.0, total - llm - tts),
+                    first_audio=first_audio.get(step),
+                    audio_seconds=wav_duration(result.get("audio") or b""),
+                    background=background,
+                )
+            )
+
+        start = time.perf_counter()
+        if use_async:
+
+            async def _run():
+                results = engine.arun(**kwargs)
+                while True:
+                    before = busy()
+                    step_start[0] = time.perf_counter()
+                    try:
+                        result = await results.__anext__()
+                    except StopAsyncIteration:
+                        break
+                    record(result, before)
+
+            asyncio.run(_run())
+        else:
+            results = engine.run(**kwargs)
+            while True:
+                before = busy()
+                step_start[0] = time.perf_counter()
+                try:
+                    result = next(results)
+                except StopIteration:
+                    break
+                record(result, before)
+        report.wall_time = time.perf_counter() - start
+        # 只统计实际送达的弹幕
+        elapsed = engine.scheduler.elapsed()
+        report.danmaku = sum(
+            1
+            for dm in danmaku_trace or []
+            if (dm["time"] <= elapsed if dm.get("time") is not None else dm.get("step", 0) < len(report.steps))
+        )
+        report.queue_stats = dict(engine.state.danmaku_queue.stats)
+        report.cache_stats = getattr(engine.tts, "cache_stats", lambda: None)()
+    return report
+
+
+def print_report(report: ReplayReport):
+    print(
+        f"{'step':>4} {'action':<10} {'total':>8} {'llm':>8} {'tts':>8} {'other':>8} "
+        f"{'first':>8} {'bg':>8}"
+    )
+    for s in report.steps:
+        first = f"{s.first_audio * 1000:7.1f}" if s.first_audio is not None else "      -"
+        print(
+            f"{s.step:>4} {s.action:<10} {s.total * 1000:7.1f}m {s.llm * 1000:7.1f}m "
+            f"{s.tts * 1000:7.1f}m {s.other * 1000:7.1f}m {first}m {s.background * 1000:7.1f}m"
+        )
+    summary = report.summary()
+    print()
+    print(f"共 {summary['steps']} 步，墙钟 {summary['wall_time']:.2f}s（加速 {report.speed:g}x）")
+    print(f"  吞吐: {summary['steps_per_sec']:.1f} 步/秒, {summary['danmaku_per_sec']:.1f} 弹幕/秒")
+    print(
+        f"  单步: 平均 {summary['step_mean'] * 1000:.1f}ms, p95 {summary['step_p95'] * 1000:.1f}ms, "
+        f"最大 {summary['step_max'] * 1000:.1f}ms"
+    )
+    print(f"  实时率: {summary['realtime_factor']:.2f}x（>1 表示生成快于播放）")
+    if report.prerender_time:
+        print(f"  预渲染: {report.prerender_time:.2f}s（开播前）")
+    if report.queue_stats:
+        print(f"  弹幕队列: {report.queue_stats}")
+    if report.cache_stats:
+        cache = report.cache_stats
+        print(f"  TTS 缓存: 命中 {cache['hits']}/{cache['hits'] + cache['misses']} ({cache['hit_rate']:.0%})")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="echuu 离线回放 / 基准")
+    parser.add_argument("script", help="output/scripts/ 下保存的剧本 JSON")
+    parser.add_argument("--danmaku", help="弹幕轨迹 JSON（如 output/test_danmaku.json）")
+    parser.add_argument("--every", type=int, default=2, help="轨迹无 step 时每几步放一条弹幕")
+    parser.add_argument("--speed", type=float, default=10.0, help="延迟加速倍数")
+    parser.add_argument("--max-steps", type=int, default=100)
+    parser.add_argument("--prefetch", type=int, default=0, help="TTS 预取行数")
+    parser.add_argument("--speculate", type=int, default=0, help="弹幕回应预生成候选数")
+    parser.add_argument("--prerender", type=int, default=0, help="开播前预渲染全部台词的线程数")
+    parser.add_argument("--stream", action="store_true", help="分句流式合成")
+    parser.add_argument("--cache-dir", help="启用 TTS 磁盘缓存（重复回放同一剧本时命中）")
+    parser.add_argument("--postprocess", action="store_true", help="启用静音裁剪与响度归一")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="使用 arun")
+    parser.add_argument("--dist", default="lognormal", choices=LatencyModel.DISTRIBUTIONS)
+    parser.add_argument("--jitter", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="把结果写入 JSON 文件")
+    parser.add_argument("--verbose", action="store_true", help="显示引擎日志")
+    args = parser.parse_args(argv)
+
+    with contextlib.redirect_stdout(io.StringIO()) if not args.verbose else contextlib.nullcontext():
+        engine = make_offline_engine(
+            speed=args.speed,
+            seed=args.seed,
+            jitter=args.jitter,
+            dist=args.dist,
+            cache_dir=args.cache_dir,
+            postprocess=args.postprocess,
+        )
+    trace = load_danmaku_trace(args.danmaku, every=args.every) if args.danmaku else None
+    report = replay(
+        engine,
+        args.script,
+        danmaku_trace=trace,
+        max_steps=args.max_steps,
+        prefetch_lines=args.prefetch,
+        speculate_danmaku=args.speculate,
+        stream=args.stream,
+        use_async=args.use_async,
+        speed=args.speed,
+        quiet=not args.verbose,
+        prerender_workers=args.prerender,
+    )
+    print_report(report)
+    if args.json:
+        with Path(args.json).open("w", encoding="utf-8") as f:
+            json.dump(report.to_dict(), f, ensure_ascii=False, indent=2)
+        print(f"结果已保存: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
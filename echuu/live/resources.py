@@ -0,0 +1,137 @@
+"""
+进程级共享资源。
+
+每个直播间都会新建一个 EchuuLiveEngine。语料（annotated_clips.json、切片 JSONL）、
+由它算出的 PatternAnalyzer / ExampleSampler 索引、.env 和 Anthropic 连接池
+在进程内只需要加载一次：这里按数据路径缓存，所有引擎只读共享，
+引擎构造只剩下创建几个轻量对象。
+
+    resources = get_resources()
+    engine = EchuuLiveEngine(resources=resources)
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from ..core.pattern_analyzer import PatternAnalyzer
+from ..generators.example_sampler import ExampleSampler
+from .keywords import add_keyword_terms
+
+ANNOTATED_CLIPS = Path("data") / "annotated_clips.json"
+RAW_CLIPS = Path("data") / "vtuber_raw_clips_for_notebook_full_30_cleaned.jsonl"
+
+_lock = threading.Lock()
+_registry: Dict[Tuple[Path, Optional[Path]], "SharedResources"] = {}
+_env_loaded: set = set()
+
+
+def find_project_root() -> Path:
+    """
+    项目根目录：优先向上查找名为 echuu-agent 的目录（原有约定），
+    找不到时（例如仓库以其他名字检出）使用 echuu 包所在的目录。
+    """
+    root = Path.cwd()
+    while root.name != "echuu-agent" and root.parent != root:
+        root = root.parent
+    if root.name == "echuu-agent":
+        return root
+    return Path(__file__).resolve().parents[2]
+
+
+def load_env_once(project_root: Path):
+    """加载 .env（每个目录只加载一次）。"""
+    env_file = project_root / ".env"
+    with _lock:
+        if env_file in _env_loaded:
+            return
+        _env_loaded.add(env_file)
+    from dotenv import load_dotenv
+
+    load_dotenv(env_file)
+
+
+@dataclass
+class SharedResources:
+    """
+    一份语料及其派生索引（加载后只读，可在多个引擎、多个线程间共享）。
+
+    不要修改 clips 或 analyzer / example_sampler 的内部状态。
+    """
+
+    project_root: Path
+    clips: List[dict] = field(default_factory=list)
+    analyzer: Optional[PatternAnalyzer] = None
+    example_sampler: Optional[ExampleSampler] = None
+    _catchphrases: Dict[str, List[str]] = field(default_factory=dict, repr=False)
+
+    def catchphrases(self, language: str = "zh", limit: int = 5) -> List[str]:
+        """该语言最常见的口癖（预先算好，按语言缓存）。"""
+        key = f"{language}:{limit}"
+        cached = self._catchphrases.get(key)
+        if cached is None:
+            if self.analyzer:
+                cached = [cp for cp, _ in self.analyzer.extract_catchphrases(language)[:limit]]
+            else:
+                cached = []
+            self._catchphrases[key] = cached
+        return list(cached)
+
+
+def _load(project_root: Path, data_path: Optional[Path]) -> SharedResources:
+    resources = SharedResources(project_root=project_root)
+
+    data_file = data_path or project_root / ANNOTATED_CLIPS
+    if data_file.exists():
+        with data_file.open("r", encoding="utf-8") as f:
+            resources.clips = json.load(f)
+        resources.analyzer = PatternAnalyzer(resources.clips)
+        # 切片语料中的口癖加入关键词词典（词典是进程级的，只需加一次）
+        add_keyword_terms(cp for clip in resources.clips for cp in clip.get("catchphrases", []))
+        for language in {clip.get("language", "zh") for clip in resources.clips}:
+            resources.catchphrases(language)
+
+    clips_file = project_root / RAW_CLIPS
+    if clips_file.exists():
+        resources.example_sampler = ExampleSampler(str(clips_file))
+    return resources
+
+
+def get_resources(
+    project_root: Optional[Path] = None, data_path: Optional[str] = None
+) -> SharedResources:
+    """取（必要时加载）进程内共享的资源；同一组路径只加载一次。"""
+    root = Path(project_root) if project_root else find_project_root()
+    data = Path(data_path).resolve() if data_path else None
+    key = (root.resolve(), data)
+    resources = _registry.get(key)
+    if resources is not None:
+        return resources
+    load_env_once(root)
+    with _lock:
+        resources = _registry.get(key)
+        if resources is None:
+            resources = _load(root, data)
+            _registry[key] = resources
+    return resources
+
+
+def clear_resources():
+    """清空缓存（测试或语料文件更新后使用）。"""
+    with _lock:
+        _registry.clear()
+        _env_loaded.clear()
+    anthropic_client.cache_clear()
+
+
+@lru_cache(maxsize=8)
+def anthropic_client(api_key: str):
+    """按 API Key 共享同步 Anthropic 客户端（底层连接池线程安全）。"""
+    import anthropic
+
+    return anthropic.Anthropic(api_key=api_key)
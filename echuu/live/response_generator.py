@@ -6,10 +6,11 @@ from __future__ import annotations
 
 import json
 import random
-from typing import Dict, Optional
+from typing import Callable, Dict, List, Optional
 
 from .llm_client import LLMClient
 from .state import Danmaku, PerformerMemory
+from .streaming import ClauseSplitter, JSONFieldStreamer
 
 
 class DanmakuResponseGenerator:
@@ -50,6 +51,8 @@ class DanmakuResponseGenerator:
 
 只输出 JSON，不要其他内容。"""
 
+    SYSTEM_PROMPT = "你是一个VTuber主播，正在直播。用JSON格式回复。"
+
     def __init__(self, llm: LLMClient):
         self.llm = llm
 
@@ -62,6 +65,154 @@ class DanmakuResponseGenerator:
         name: str,
     ) -> Dict:
         """生成对弹幕的响应。"""
+        prompt = self._build_prompt(danmaku, current_line, next_line, memory, name)
+        try:
+            response_text = self.llm.call(
+                system=self.SYSTEM_PROMPT,
+                prompt=prompt,
+                max_tokens=500,
+            )
+            return self._parse_response(response_text, danmaku)
+        except Exception as exc:
+            print(f"[DanmakuResponse] LLM 调用失败: {exc}")
+            return self._fallback_response(danmaku)
+
+    async def agenerate_response(
+        self,
+        danmaku: Danmaku,
+        current_line,
+        next_line: Optional,
+        memory: PerformerMemory,
+        name: str,
+    ) -> Dict:
+        """生成对弹幕的响应（asyncio 版本）。"""
+        prompt = self._build_prompt(danmaku, current_line, next_line, memory, name)
+        try:
+            response_text = await self.llm.acall(
+                system=self.SYSTEM_PROMPT,
+                prompt=prompt,
+                max_tokens=500,
+            )
+            return self._parse_response(response_text, danmaku)
+        except Exception as exc:
+            print(f"[DanmakuResponse] LLM 调用失败: {exc}")
+            return self._fallback_response(danmaku)
+
+    def generate_response_stream(
+        self,
+        danmaku: Danmaku,
+        current_line,
+        next_line: Optional,
+        memory: PerformerMemory,
+        name: str,
+        on_clause: Callable[[str], None],
+    ) -> Dict:
+        """
+        流式生成弹幕响应。
+
+        LLM 输出 token 的同时增量解析 "response" 字段，每凑齐一个分句就回调
+        on_clause，调用方可以立刻送去合成，不必等 next_content 生成完。
+
+        Returns:
+            与 generate_response 相同的字典，另含 spoken_response（已回调出去的文本）
+        """
+        prompt = self._build_prompt(danmaku, current_line, next_line, memory, name)
+        extractor = JSONFieldStreamer("response")
+        splitter = ClauseSplitter()
+        spoken: List[str] = []
+        raw: List[str] = []
+
+        def speak(clauses: List[str]):
+            for clause in clauses:
+                spoken.append(clause)
+                on_clause(clause)
+
+        try:
+            for delta in self.llm.stream(
+                system=self.SYSTEM_PROMPT,
+                prompt=prompt,
+                max_tokens=500,
+            ):
+                raw.append(delta)
+                if not extractor.done:
+                    speak(splitter.feed(extractor.feed(delta)))
+                    if extractor.done:
+                        speak(splitter.flush())
+        except Exception as exc:
+            print(f"[DanmakuResponse] LLM 流式调用失败: {exc}")
+
+        return self._finish_stream("".join(raw), danmaku, extractor, splitter, spoken, speak)
+
+    async def agenerate_response_stream(
+        self,
+        danmaku: Danmaku,
+        current_line,
+        next_line: Optional,
+        memory: PerformerMemory,
+        name: str,
+        on_clause: Callable[[str], None],
+    ) -> Dict:
+        """流式生成弹幕响应（asyncio 版本），语义同 generate_response_stream。"""
+        prompt = self._build_prompt(danmaku, current_line, next_line, memory, name)
+        extractor = JSONFieldStreamer("response")
+        splitter = ClauseSplitter()
+        spoken: List[str] = []
+        raw: List[str] = []
+
+        def speak(clauses: List[str]):
+            for clause in clauses:
+                spoken.append(clause)
+                on_clause(clause)
+
+        try:
+            async for delta in self.llm.astream(
+                system=self.SYSTEM_PROMPT,
+                prompt=prompt,
+                max_tokens=500,
+            ):
+                raw.append(delta)
+                if not extractor.done:
+                    speak(splitter.feed(extractor.feed(delta)))
+                    if extractor.done:
+                        speak(splitter.flush())
+        except Exception as exc:
+            print(f"[DanmakuResponse] LLM 流式调用失败: {exc}")
+
+        return self._finish_stream("".join(raw), danmaku, extractor, splitter, spoken, speak)
+
+    def _finish_stream(
+        self,
+        response_text: str,
+        danmaku: Danmaku,
+        extractor: JSONFieldStreamer,
+        splitter: ClauseSplitter,
+        spoken: List[str],
+        speak: Callable[[List[str]], None],
+    ) -> Dict:
+        """流结束后解析完整 JSON；已经说出口的内容以 spoken_response 为准。"""
+        speak(splitter.flush())
+        try:
+            result = self._parse_response(response_text, danmaku)
+        except Exception as exc:
+            if response_text:
+                print(f"[DanmakuResponse] JSON 解析失败: {exc}")
+            result = self._fallback_response(danmaku)
+
+        spoken_text = extractor.value.strip() if spoken else ""
+        if spoken_text:
+            result["response"] = spoken_text
+        result["spoken_response"] = spoken_text
+        return result
+
+    def _build_prompt(
+        self,
+        danmaku: Danmaku,
+        current_line,
+        next_line: Optional,
+        memory: PerformerMemory,
+        name: str,
+    ) -> str:
+        """构造弹幕回应 prompt。"""
         if danmaku.is_sc:
             danmaku_type = f"SC打赏 (¥{danmaku.amount})"
         elif danmaku.is_question():
@@ -73,7 +224,7 @@ class DanmakuResponseGenerator:
 
         mentioned = memory.story_points.get("mentioned", [])[-5:]
 
-        prompt = self.RESPONSE_PROMPT.format(
+        return self.RESPONSE_PROMPT.format(
             name=name,
             stage=current_line.stage,
             current_text_preview=current_line.text[:80] + "...",
@@ -84,30 +235,26 @@ class DanmakuResponseGenerator:
             danmaku_type=danmaku_type,
         )
 
-        try:
-            response_text = self.llm.call(
-                system="你是一个VTuber主播，正在直播。用JSON格式回复。",
-                prompt=prompt,
-                max_tokens=500,
-            )
+    def _parse_response(self, response_text: str, danmaku: Danmaku) -> Dict:
+        """解析 LLM 返回的 JSON。"""
+        if "```json" in response_text:
+            response_text = response_text.split("```json")[1].split("```")[0]
+        elif "```" in response_text:
+            response_text = response_text.split("```")[1].split("```")[0]
 
-            if "```json" in response_text:
-                response_text = response_text.split("```json")[1].split("```")[0]
-            elif "```" in response_text:
-                response_text = response_text.split("```")[1].split("```")[0]
+        result = json.loads(response_text.strip())
+        result.setdefault("response", f"哈哈{danmaku.text}！")
+        result.setdefault("action", "continue")
+        result.setdefault("next_content", "")
+        return result
 
-            result = json.loads(response_text.strip())
-            result.setdefault("response", f"哈哈{danmaku.text}！")
-            result.setdefault("action", "continue")
-            result.setdefault("next_content", "")
-            return result
-        except Exception as exc:
-            print(f"[DanmakuResponse] LLM 调用失败: {exc}")
-            return {
-                "response": f"哈哈有人说'{danmaku.text}'！",
-                "action": "continue",
-                "next_content": "",
-            }
+    def _fallback_response(self, danmaku: Danmaku) -> Dict:
+        """LLM 失败时的兜底回应。"""
+        return {
+            "response": f"哈哈有人说'{danmaku.text}'！",
+            "action": "continue",
+            "next_content": "",
+        }
 
     def generate_quick_response(self, danmaku: Danmaku) -> str:
         """快速生成简单回应（不调用 LLM）。"""
@@ -0,0 +1,124 @@
+"""
+按播放时间调度表演步。
+
+引擎原来是按步驱动的：一步生成完就立刻生成下一步，服务端只在步间固定 sleep 0.1 秒，
+音频长的时候客户端缓冲会被撑爆，短的时候又会断档。PlaybackScheduler 维护客户端的
+播放时间线：每步的音频时长由 PCM 长度算出，下一步在当前音频播完前 lead 秒开始生成，
+这样客户端缓冲里始终只多出大约一步的音频。
+
+流式模式下客户端收到第一个分片就开始播放，不必等整段合成完：这时以首个分片
+送出的时刻（started_at）作为这段音频的开播时间。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Callable, Optional
+
+from .audio import is_wav, wav_duration
+
+# 无法从音频本身得到时长（如 mp3）时，按语速估算（字/秒）
+DEFAULT_CHARS_PER_SEC = 5.0
+
+
+def audio_duration(
+    audio: Optional[bytes],
+    fmt: str = "wav",
+    sample_rate: int = 24000,
+    text: str = "",
+    chars_per_sec: float = DEFAULT_CHARS_PER_SEC,
+) -> float:
+    """
+    一段音频的播放时长（秒）。
+
+    WAV 读文件头，裸 PCM（16-bit 单声道）按字节数计算；
+    其他压缩格式无法直接得到时长，按台词字数和语速估算。
+    """
+    if audio and is_wav(audio):
+        return wav_duration(audio)
+    if audio and fmt == "pcm":
+        return len(audio) / float(sample_rate * 2)
+    if text:
+        return len(text.strip()) / chars_per_sec
+    return 0.0
+
+
+class PlaybackScheduler:
+    """
+    播放时间线调度器。
+
+    - schedule(duration, started_at): 一段音频送出后调用，排到时间线末尾
+      （客户端空闲时从现在开始播；流式时从首个分片送出的时刻开始播）
+    - wait() / await_next(): 睡到下一步应该开始的时间（当前音频结束前 lead 秒）
+    - elapsed(): 从开播算起的时间，用于按时间投放模拟弹幕
+
+    realtime=False 时不真正等待，elapsed() 返回虚拟时间线上的位置（已排音频的总时长），
+    离线回放时模拟弹幕仍按播放进度到达，结果可复现。
+    """
+
+    def __init__(
+        self,
+        lead: float = 0.5,
+        realtime: bool = True,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.lead = max(0.0, lead)
+        self.realtime = realtime
+        self.clock = clock
+        self.reset()
+
+    def reset(self):
+        """开始新的一场：时间线清零。"""
+        self.started_at = self.clock()
+        self.playhead_end = self.started_at  # 已排音频在客户端播完的时刻
+        self.scheduled = 0.0  # 已排音频的总时长
+        self.stats = {"steps": 0, "waited": 0.0, "starved": 0.0}
+
+    def elapsed(self) -> float:
+        if not self.realtime:
+            return self.scheduled
+        return self.clock() - self.started_at
+
+    def schedule(self, duration: float, started_at: Optional[float] = None) -> float:
+        """
+        把一段时长为 duration 的音频排到时间线上，返回下一步应开始的时刻。
+
+        如果客户端已经播完了之前的音频（生成太慢），从开播时刻开始排，并记入 starved。
+
+        Args:
+            duration: 音频时长（秒）
+            started_at: 流式下发时首个分片送出的时刻（与 clock 同一时钟），
+                客户端此时即可开始播放；None 表示整段送出，从现在开始播
+        """
+        now = self.clock()
+        start = now if started_at is None else min(started_at, now)
+        if self.playhead_end < start:
+            if self.stats["steps"]:
+                self.stats["starved"] += start - self.playhead_end
+            self.playhead_end = start
+        self.playhead_end += max(0.0, duration)
+        self.scheduled += max(0.0, duration)
+        self.stats["steps"] += 1
+        return self.next_start()
+
+    def next_start(self) -> float:
+        return self.playhead_end - self.lead
+
+    def delay(self) -> float:
+        """距下一步开始还要等多久（秒）；非实时模式恒为 0。"""
+        if not self.realtime:
+            return 0.0
+        return max(0.0, self.next_start() - self.clock())
+
+    def wait(self):
+        delay = self.delay()
+        if delay > 0:
+            self.stats["waited"] += delay
+            time.sleep(delay)
+
+    async def await_next(self):
+        delay = self.delay()
+        if delay > 0:
+            self.stats["waited"] += delay
+            await asyncio.sleep(delay)
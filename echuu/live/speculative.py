@@ -0,0 +1,218 @@
+"""
+弹幕回应的投机预生成。
+
+当前台词播放期间表演者是空闲的：在后台为队列中排名靠前的弹幕
+提前生成 LLM 回应（可选连同回应语音），下一步真正决定打断时直接取用。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Dict, Iterable, Optional, Tuple
+
+from .response_generator import DanmakuResponseGenerator
+from .state import Danmaku, PerformerMemory
+from .tts_client import TTSClient
+
+SpeculationKey = Tuple[str, str, int]
+
+
+class SpeculativeResponder:
+    """
+    弹幕回应预生成器。
+
+    - 结果按 (弹幕, 行号) 缓存，行号变化或弹幕出队后即视为过期并丢弃
+    - 只预生成前 top_k 条候选，避免在不会被选中的弹幕上浪费 LLM 调用
+    - synthesize=True 时顺带合成回应语音（不写入录制）
+    """
+
+    def __init__(
+        self,
+        response_generator: DanmakuResponseGenerator,
+        tts: TTSClient,
+        top_k: int = 0,
+        max_workers: int = 2,
+        synthesize: bool = False,
+    ):
+        self.response_generator = response_generator
+        self.tts = tts
+        self.top_k = max(0, top_k)
+        self.max_workers = max(1, max_workers)
+        self.synthesize = synthesize
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: Dict[SpeculationKey, Tuple[float, Future]] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "discarded": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.top_k > 0
+
+    @staticmethod
+    def key(danmaku: Danmaku, line_idx: int) -> SpeculationKey:
+        return (danmaku.user, danmaku.text, line_idx)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="echuu-speculate",
+            )
+        return self._executor
+
+    def schedule(
+        self,
+        line_idx: int,
+        candidates: Iterable[Danmaku],
+        current_line,
+        next_line,
+        memory: PerformerMemory,
+        name: str,
+        emotion_boost: float = 0.0,
+    ):
+        """
+        提交预生成任务。
+
+        Args:
+            line_idx: 下一步将要表演的行号，其他行号的结果会被丢弃
+            candidates: 按优先级排好序的候选弹幕，只取前 top_k 条
+            memory: 在调用线程中取快照后交给后台任务（表演步会继续修改原记忆）
+        """
+        if not self.enabled:
+            return
+
+        candidates = list(candidates)[: self.top_k]
+        wanted = {self.key(dm, line_idx) for dm in candidates}
+
+        with self._lock:
+            for key in [k for k in self._pending if k[2] != line_idx or k not in wanted]:
+                self._discard_locked(key)
+
+            snapshot = None
+            for danmaku in candidates:
+                key = self.key(danmaku, line_idx)
+                if key in self._pending:
+                    continue
+                if snapshot is None:
+                    snapshot = memory.snapshot()
+                future = self._get_executor().submit(
+                    self._generate, danmaku, current_line, next_line, snapshot, name, emotion_boost
+                )
+                self._pending[key] = (emotion_boost, future)
+
+    def _generate(
+        self,
+        danmaku: Danmaku,
+        current_line,
+        next_line,
+        memory: PerformerMemory,
+        name: str,
+        emotion_boost: float,
+    ) -> Tuple[Dict, Optional[bytes]]:
+        llm_result = self.response_generator.generate_response(
+            danmaku=danmaku,
+            current_line=current_line,
+            next_line=next_line,
+            memory=memory,
+            name=name,
+        )
+        audio = None
+        response = llm_result.get("response", "")
+        if self.synthesize and self.tts.enabled and response:
+            audio = self.tts.synthesize(response, emotion_boost, False)
+        return llm_result, audio
+
+    def take(
+        self, danmaku: Danmaku, line_idx: int, timeout: Optional[float] = None
+    ) -> Optional[Tuple[Dict, Optional[bytes], float]]:
+        """
+        取出预生成结果（任务仍在执行时等待其完成，最多等 timeout 秒）。
+
+        Returns:
+            (llm_result, 回应语音或 None, 合成语音时的 emotion_boost)；
+            未命中、任务失败或等待超时时返回 None。
+        """
+        entry = self._pop(danmaku, line_idx)
+        if entry is None:
+            return None
+
+        emotion_boost, future = entry
+        try:
+            llm_result, audio = future.result(timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            return self._miss("等待超时")
+        except CancelledError:
+            return self._miss()
+        except Exception as exc:
+            return self._miss(exc)
+        return self._hit(llm_result, audio, emotion_boost)
+
+    async def atake(
+        self, danmaku: Danmaku, line_idx: int, timeout: Optional[float] = None
+    ) -> Optional[Tuple[Dict, Optional[bytes], float]]:
+        """
+        take() 的 asyncio 版本：等待预生成任务时不阻塞事件循环。
+
+        超时与未命中的语义同 take()。
+        """
+        entry = self._pop(danmaku, line_idx)
+        if entry is None:
+            return None
+
+        emotion_boost, future = entry
+        try:
+            llm_result, audio = await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            future.cancel()
+            return self._miss("等待超时")
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                raise  # 调用方的任务被取消
+            return self._miss()
+        except Exception as exc:
+            return self._miss(exc)
+        return self._hit(llm_result, audio, emotion_boost)
+
+    def _pop(self, danmaku: Danmaku, line_idx: int) -> Optional[Tuple[float, Future]]:
+        with self._lock:
+            entry = self._pending.pop(self.key(danmaku, line_idx), None)
+        if entry is None:
+            self.stats["misses"] += 1
+        return entry
+
+    def _miss(self, reason=None) -> None:
+        if reason is not None:
+            print(f"[LLM] 预生成失败: {reason}")
+        self.stats["misses"] += 1
+        return None
+
+    def _hit(
+        self, llm_result: Dict, audio: Optional[bytes], emotion_boost: float
+    ) -> Tuple[Dict, Optional[bytes], float]:
+        self.stats["hits"] += 1
+        return llm_result, audio, emotion_boost
+
+    def _discard_locked(self, key: SpeculationKey):
+        entry = self._pending.pop(key, None)
+        if entry is None:
+            return
+        # 已在执行中的 LLM 调用无法中断，只能丢弃结果
+        entry[1].cancel()
+        self.stats["discarded"] += 1
+
+    def reset(self):
+        """丢弃所有未取用的预生成结果。"""
+        with self._lock:
+            for key in list(self._pending):
+                self._discard_locked(key)
+
+    def shutdown(self):
+        """关闭后台线程池。"""
+        self.reset()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -4,8 +4,19 @@
 
 from __future__ import annotations
 
+import copy
+import heapq
+import itertools
+import json
+import math
+import threading
+import time
+from collections import Counter, deque
 from dataclasses import dataclass, field
-from typing import Dict, List
+from typing import AbstractSet, Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .aggregator import DanmakuAggregator
+from .keywords import KeyInfoIndex, KeywordExtractor, default_extractor
 
 
 @dataclass
@@ -19,6 +30,10 @@ class Danmaku:
 
     relevance: float = 0.0
     priority: float = 0.0
+    # 聚合的近似重复弹幕条数（见 DanmakuAggregator）
+    count: int = 1
+    # 到达时间（time.monotonic()）；为空时以进入 DanmakuQueue 的时间为准
+    received_at: Optional[float] = None
 
     @classmethod
     def from_text(cls, text: str, user: str = "观众") -> "Danmaku":
@@ -40,6 +55,141 @@ class Danmaku:
         """判断是否是问题。"""
         return "?" in self.text or "？" in self.text
 
+    def crowd_bonus(self) -> float:
+        """多人刷同一条弹幕时的优先级加成。"""
+        return crowd_bonus(self.count)
+
+
+def crowd_bonus(count: int) -> float:
+    """count 条重复弹幕的优先级加成：每翻一倍 +0.1，最多 +0.3。"""
+    return min(0.3, 0.1 * math.log2(max(count, 1)))
+
+
+# 长时间直播时记忆中各列表的容量上限
+DANMAKU_MEMORY_SIZE = 200
+EMOTION_TRACK_SIZE = 500
+PROMISE_HISTORY_SIZE = 100
+
+
+class RingBuffer(deque):
+    """
+    定长环形缓冲：超出容量时丢弃最旧的条目。
+
+    在 deque 的基础上支持切片读取（buf[-5:]），
+    total 记录历史上追加过的总条数，不受容量限制。
+    """
+
+    def __init__(self, iterable: Iterable = (), maxlen: Optional[int] = None):
+        super().__init__(iterable, maxlen)
+        self.total = len(self)
+
+    def append(self, item):
+        super().append(item)
+        self.total += 1
+
+    def extend(self, items: Iterable):
+        for item in items:
+            self.append(item)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+        return super().__getitem__(index)
+
+    def __reduce__(self):
+        # 由条目重建（子类据此重建索引），再恢复计数
+        counters = {k: v for k, v in self.__dict__.items() if not k.startswith("_")}
+        return type(self), (list(self), self.maxlen), counters
+
+
+class OrderedSet:
+    """保持插入顺序的集合：O(1) 判断成员，支持 append / 索引 / 切片。"""
+
+    def __init__(self, iterable: Iterable = ()):
+        self._items: Dict = dict.fromkeys(iterable)
+
+    def add(self, item) -> bool:
+        """加入条目，返回是否为新条目。"""
+        if item in self._items:
+            return False
+        self._items[item] = None
+        return True
+
+    append = add
+
+    def extend(self, items: Iterable):
+        for item in items:
+            self.add(item)
+
+    def discard(self, item):
+        self._items.pop(item, None)
+
+    def remove(self, item):
+        del self._items[item]
+
+    def __contains__(self, item) -> bool:
+        return item in self._items
+
+    def __iter__(self) -> Iterator:
+        return iter(self._items)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self._items)[index]
+        if index < 0:
+            index += len(self._items)
+        if not 0 <= index < len(self._items):
+            raise IndexError(index)
+        return next(itertools.islice(self._items, index, None))
+
+    def __eq__(self, other) -> bool:
+        return list(self) == list(other)
+
+    def __repr__(self) -> str:
+        return f"OrderedSet({list(self._items)!r})"
+
+
+class PromiseBook(RingBuffer):
+    """
+    承诺记录。
+
+    未兑现的承诺按 answer_at_line 建索引，兑现检查只看当前行对应的承诺；
+    open_count / fulfilled_count 为 O(1) 计数，历史承诺按容量滚动丢弃。
+    """
+
+    def __init__(self, iterable: Iterable = (), maxlen: Optional[int] = PROMISE_HISTORY_SIZE):
+        self._open: Dict[Optional[int], List[Dict]] = {}
+        self.open_count = 0
+        self.fulfilled_count = 0
+        super().__init__((), maxlen)
+        self.extend(iterable)
+
+    def append(self, promise: Dict):
+        super().append(promise)
+        if not promise.get("fulfilled", False):
+            self._open.setdefault(promise.get("answer_at_line"), []).append(promise)
+            self.open_count += 1
+        else:
+            self.fulfilled_count += 1
+
+    def fulfill_at(self, line_idx: int) -> List[Dict]:
+        """兑现答案位于 line_idx 的所有承诺，返回这些承诺。"""
+        fulfilled = []
+        for promise in self._open.pop(line_idx, []):
+            if not promise.get("fulfilled", False):
+                promise["fulfilled"] = True
+                fulfilled.append(promise)
+        self.open_count -= len(fulfilled)
+        self.fulfilled_count += len(fulfilled)
+        return fulfilled
+
+    def unfulfilled(self) -> List[Dict]:
+        """未兑现的承诺（按记录顺序）。"""
+        return [p for p in self if not p.get("fulfilled", False)]
+
 
 @dataclass
 class PerformerMemory:
@@ -54,27 +204,198 @@ class PerformerMemory:
         }
     )
 
+    # 弹幕记录只保留最近 DANMAKU_MEMORY_SIZE 条，总数见各 RingBuffer 的 total
     danmaku_memory: Dict = field(
         default_factory=lambda: {
-            "received": [],
-            "responded": [],
-            "ignored": [],
-            "pending_questions": [],
+            "received": RingBuffer(maxlen=DANMAKU_MEMORY_SIZE),
+            "responded": RingBuffer(maxlen=DANMAKU_MEMORY_SIZE),
+            "ignored": RingBuffer(maxlen=DANMAKU_MEMORY_SIZE),
+            "pending_questions": RingBuffer(maxlen=DANMAKU_MEMORY_SIZE),
         }
     )
 
-    promises: List[Dict] = field(default_factory=list)
+    promises: PromiseBook = field(default_factory=PromiseBook)
     story_points: Dict = field(
         default_factory=lambda: {
-            "mentioned": [],
+            "mentioned": OrderedSet(),
             "upcoming": [],
             "revealed": [],
         }
     )
-    emotion_track: List[Dict] = field(default_factory=list)
+    emotion_track: RingBuffer = field(default_factory=lambda: RingBuffer(maxlen=EMOTION_TRACK_SIZE))
+
+    # 剧情关键词索引：只对新增的剧情点增量提取，供弹幕相关性计算使用
+    _keyword_counts: Counter = field(default_factory=Counter, repr=False, compare=False)
+    _indexed_lens: Dict[str, int] = field(default_factory=dict, repr=False, compare=False)
+    _keyword_source: Tuple[Optional[KeywordExtractor], int] = field(
+        default=(None, -1), repr=False, compare=False
+    )
+
+    # 版本与增量：各部分的“游标”（只追加的列表取历史总数，其余取内容指纹）变化时版本号 +1
+    version: int = field(default=0, compare=False)
+    _cursors: Dict[str, Any] = field(default_factory=dict, repr=False, compare=False)
+    _history: Deque = field(default_factory=lambda: deque(maxlen=64), repr=False, compare=False)
+    _display_cache: Tuple[int, str] = field(default=(-1, ""), repr=False, compare=False)
+
+    # 只追加的列表：增量为 add（以及环形缓冲溢出时的 remove）
+    APPEND_PATHS = (
+        ("danmaku_memory", "received"),
+        ("danmaku_memory", "responded"),
+        ("danmaku_memory", "ignored"),
+        ("danmaku_memory", "pending_questions"),
+        ("story_points", "mentioned"),
+        ("story_points", "upcoming"),
+        ("story_points", "revealed"),
+        ("emotion_track",),
+    )
+    # 会被原地修改的部分：变化时整体 replace
+    REPLACE_SECTIONS = ("script_progress", "promises")
+
+    def __post_init__(self):
+        self._cursors = self._current_cursors()
+        self._history.append((self.version, self._cursors))
+
+    KEYWORD_SOURCES = ("mentioned", "upcoming")
+
+    def story_keywords(self, extractor: Optional[KeywordExtractor] = None) -> AbstractSet[str]:
+        """
+        已提到 + 即将出现的剧情点中的关键词集合。
+
+        story_points 列表只追加时增量更新（只处理新增的条目）；
+        列表变短（条目被移除或移动）、换了提取器或词典变化时整体重建。
+
+        Args:
+            extractor: 关键词提取器（通常为 PerformanceState.keywords），默认共享词典
+        """
+        extractor = extractor or default_extractor
+        points = self.story_points
+        source = (extractor, extractor.version)
+        if self._keyword_source != source or any(
+            len(points.get(kind, [])) < self._indexed_lens.get(kind, 0)
+            for kind in self.KEYWORD_SOURCES
+        ):
+            self._keyword_counts.clear()
+            self._indexed_lens.clear()
+            self._keyword_source = source
+
+        for kind in self.KEYWORD_SOURCES:
+            entries = points.get(kind, [])
+            start = self._indexed_lens.get(kind, 0)
+            if len(entries) > start:
+                for info in entries[start:]:
+                    self._keyword_counts.update(extractor.extract(info))
+            self._indexed_lens[kind] = len(entries)
+
+        return self._keyword_counts.keys()
+
+    # ---- 版本 / 快照 / 增量 ----
+
+    def _container(self, path: Tuple[str, ...]):
+        node = self
+        for i, key in enumerate(path):
+            node = getattr(node, key) if i == 0 else node.get(key, [])
+        return node
+
+    def _current_cursors(self) -> Dict[str, Any]:
+        cursors = {}
+        for path in self.APPEND_PATHS:
+            cursors["/".join(path)] = _total(self._container(path))
+        cursors["script_progress"] = json.dumps(self.script_progress, sort_keys=True, default=str)
+        promises = self.promises
+        cursors["promises"] = (
+            _total(promises),
+            getattr(promises, "fulfilled_count", sum(1 for p in promises if p.get("fulfilled"))),
+        )
+        return cursors
+
+    def sync(self) -> int:
+        """检查各部分是否有变化（dirty），有则版本号 +1；返回当前版本号。"""
+        cursors = self._current_cursors()
+        if cursors != self._cursors:
+            self.version += 1
+            self._cursors = cursors
+            self._history.append((self.version, cursors))
+        return self.version
+
+    def to_dict(self) -> Dict:
+        """完整快照（可 JSON 序列化）。"""
+        self.sync()
+        return {
+            "version": self.version,
+            "script_progress": copy.deepcopy(self.script_progress),
+            "danmaku_memory": {k: list(v) for k, v in self.danmaku_memory.items()},
+            "promises": [dict(p) for p in self.promises],
+            "story_points": {k: list(v) for k, v in self.story_points.items()},
+            "emotion_track": [dict(e) for e in self.emotion_track],
+        }
+
+    def snapshot(self) -> "PerformerMemory":
+        """
+        当前记忆的独立副本（各容器拷贝为普通 list / dict），
+        供后台线程读取，不受之后表演步对原记忆的修改影响。
+        """
+        return PerformerMemory(
+            script_progress=copy.deepcopy(self.script_progress),
+            danmaku_memory={k: list(v) for k, v in self.danmaku_memory.items()},
+            promises=[dict(p) for p in self.promises],
+            story_points={k: list(v) for k, v in self.story_points.items()},
+            emotion_track=[dict(e) for e in self.emotion_track],
+        )
+
+    def diff_since(self, version: int) -> List[Dict]:
+        """
+        从 version 到当前版本的增量（JSON Patch 风格的操作列表）。
+
+        - 只追加的列表：新条目为 {"op": "add", "path": "/emotion_track/-"}，
+          环形缓冲溢出丢弃的旧条目为 {"op": "remove", "path": ".../0"}
+        - script_progress / promises 有变化时整体 replace
+        - version 太旧（已不在历史中）时返回一条整体 replace（path 为 ""）
+        """
+        self.sync()
+        if version == self.version:
+            return []
+        base = next((c for v, c in self._history if v == version), None)
+        if base is None:
+            return [{"op": "replace", "path": "", "value": self.to_dict()}]
+
+        ops: List[Dict] = []
+        for path in self.APPEND_PATHS:
+            key = "/".join(path)
+            added = self._cursors[key] - base[key]
+            if added == 0:
+                continue
+            container = self._container(path)
+            pointer = "/" + key
+            if added < 0 or added > len(container):
+                ops.append({"op": "replace", "path": pointer, "value": _jsonable(list(container))})
+                continue
+            maxlen = getattr(container, "maxlen", None)
+            old_len = min(base[key], maxlen) if maxlen else base[key]
+            overflow = old_len + added - len(container)
+            ops.extend({"op": "remove", "path": pointer + "/0"} for _ in range(overflow))
+            ops.extend(
+                {"op": "add", "path": pointer + "/-", "value": _jsonable(item)}
+                for item in container[-added:]
+            )
+
+        if base["script_progress"] != self._cursors["script_progress"]:
+            ops.append(
+                {"op": "replace", "path": "/script_progress", "value": copy.deepcopy(self.script_progress)}
+            )
+        if base["promises"] != self._cursors["promises"]:
+            ops.append({"op": "replace", "path": "/promises", "value": [dict(p) for p in self.promises]})
+        return ops
 
     def to_display(self) -> str:
-        """生成用户可见的记忆状态。"""
+        """生成用户可见的记忆状态（内容没有变化时复用上次的渲染结果）。"""
+        version = self.sync()
+        if self._display_cache[0] == version:
+            return self._display_cache[1]
+        text = self._render_display()
+        self._display_cache = (version, text)
+        return text
+
+    def _render_display(self) -> str:
         lines = []
         lines.append("+-------------------------------------------+")
         lines.append("| AI 记忆状态                               |")
@@ -89,11 +410,11 @@ class PerformerMemory:
             lines.append(f"| 剧本: [{bar}] {current}/{total} ({prog.get('current_stage', '?')}) |")
 
         dm = self.danmaku_memory
-        responded = len(dm.get("responded", []))
+        responded = _total(dm.get("responded", []))
         pending = len(dm.get("pending_questions", []))
         lines.append(f"| 弹幕: 已回应{responded}条, 待回答{pending}个问题           |")
 
-        unfulfilled = [p for p in self.promises if not p.get("fulfilled", False)]
+        unfulfilled = _unfulfilled(self.promises)
         if unfulfilled:
             lines.append("| 待兑现承诺:                               |")
             for p in unfulfilled[:2]:
@@ -135,13 +456,275 @@ class PerformerMemory:
         if pending:
             parts.append(f"待回答: {', '.join(q[:20] for q in pending[:3])}")
 
-        unfulfilled = [p for p in self.promises if not p.get("fulfilled", False)]
+        unfulfilled = _unfulfilled(self.promises)
         if unfulfilled:
             parts.append(f"待兑现承诺: {', '.join(p['content'][:15] for p in unfulfilled[:2])}")
 
         return " | ".join(parts)
 
 
+def _jsonable(item):
+    return dict(item) if isinstance(item, dict) else item
+
+
+def _total(items) -> int:
+    """历史总条数（RingBuffer 取 total，普通列表取长度）。"""
+    return getattr(items, "total", len(items))
+
+
+def _unfulfilled(promises) -> List[Dict]:
+    if isinstance(promises, PromiseBook):
+        return promises.unfulfilled() if promises.open_count else []
+    return [p for p in promises if not p.get("fulfilled", False)]
+
+
+class _QueueEntry:
+    __slots__ = ("danmaku", "priority", "arrived_at", "key", "seq", "alive")
+
+    def __init__(self, danmaku: Danmaku, priority: float, arrived_at: float, key: float, seq: int):
+        self.danmaku = danmaku
+        self.priority = priority
+        self.arrived_at = arrived_at
+        self.key = key
+        self.seq = seq
+        self.alive = True
+
+
+class DanmakuQueue:
+    """
+    弹幕优先队列（有界 + 时间衰减 + SC 置顶）。
+
+    - 新弹幕先进入收件箱，admit() 时只评估一次再入堆
+    - 有效优先级 = priority * exp(-等待时间 / decay)。所有弹幕按同一速率衰减，
+      折算成 log(priority) + 到达时间 / decay 的静态堆键后相对顺序不变，取出为 O(log n)
+    - 普通弹幕等待超过 ttl 秒即过期；超过 max_size 时淘汰有效优先级最低的
+    - SC 单独置顶，按金额排序，不衰减、不过期、不被淘汰
+    - aggregate=True 时入堆前先合并滑动窗口内的近似重复弹幕（DanmakuAggregator），
+      代表弹幕的 count 增加时按新的人数加成重新入堆，并视为刚刚收到
+    - 与 list 一样支持 append / extend / len / 迭代，可以直接替换原来的列表
+    """
+
+    def __init__(
+        self,
+        max_size: int = 200,
+        ttl: float = 120.0,
+        decay: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+        aggregate: bool = True,
+    ):
+        self.max_size = max(1, max_size)
+        self.ttl = ttl
+        self.decay = decay
+        self.clock = clock
+        self.aggregator = DanmakuAggregator(clock=clock) if aggregate else None
+        self._incoming: Deque = deque()
+        self._top: List = []  # (-key, seq, entry)，取最高
+        self._bottom: List = []  # (key, seq, entry)，淘汰最低
+        self._pinned: List = []  # (-amount, seq, entry)，SC
+        self._arrivals: Deque[_QueueEntry] = deque()
+        self._entries: Dict[int, _QueueEntry] = {}
+        self._size = 0  # 存活的普通弹幕数
+        self._seq = itertools.count()
+        self._lock = threading.RLock()
+        self.stats = {"admitted": 0, "merged": 0, "popped": 0, "evicted": 0, "expired": 0}
+
+    # ---- list 兼容接口 ----
+
+    def append(self, danmaku: Danmaku):
+        """
+        新弹幕进入收件箱（线程安全，可在其他线程调用）。
+
+        弹幕带 received_at 时按真实到达时间计算等待时长（不晚于当前时间），否则记为现在到达。
+        """
+        now = self.clock()
+        arrived_at = now if danmaku.received_at is None else min(danmaku.received_at, now)
+        danmaku.received_at = arrived_at
+        self._incoming.append((danmaku, arrived_at))
+
+    def extend(self, danmaku_list: Iterable[Danmaku]):
+        for danmaku in danmaku_list:
+            self.append(danmaku)
+
+    def __len__(self) -> int:
+        return len(self._incoming) + len(self._entries)
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def __iter__(self) -> Iterator[Danmaku]:
+        return iter(self.items())
+
+    def items(self) -> List[Danmaku]:
+        """按出队顺序列出已入堆的弹幕，收件箱中未评估的排在最后。"""
+        with self._lock:
+            ranked = self.top(len(self._entries))
+            return ranked + [dm for dm, _ in list(self._incoming)]
+
+    # ---- 入队 / 清理 ----
+
+    def admit(self, evaluate: Callable, batch: bool = False) -> List[Danmaku]:
+        """
+        评估收件箱中的新弹幕并入堆，随后清理过期和超限的弹幕。
+
+        Args:
+            evaluate: 评估函数，需写入 danmaku.priority（每条弹幕只评估一次）
+            batch: 为 True 时 evaluate 接收整批弹幕列表（如 DanmakuEvaluator.evaluate_batch）
+
+        Returns:
+            本次因过期或超限被丢弃的弹幕
+        """
+        with self._lock:
+            arrivals = []
+            while self._incoming:
+                danmaku, arrived_at = self._incoming.popleft()
+                if self.aggregator is not None:
+                    representative = self.aggregator.add(danmaku, arrived_at)
+                    if representative is not danmaku:
+                        self.stats["merged"] += 1
+                        self._bump(representative, arrived_at)
+                        continue
+                arrivals.append((danmaku, arrived_at))
+            if batch and arrivals:
+                evaluate([danmaku for danmaku, _ in arrivals])
+            for danmaku, arrived_at in arrivals:
+                if not batch:
+                    evaluate(danmaku)
+                self._push(danmaku, arrived_at)
+
+            dropped = self._expire(self.clock())
+            while self._size > self.max_size:
+                dropped.append(self._evict())
+            self._maybe_compact()
+            return dropped
+
+    def _push(self, danmaku: Danmaku, arrived_at: float):
+        seq = next(self._seq)
+        priority = danmaku.priority
+        if danmaku.is_sc:
+            entry = _QueueEntry(danmaku, priority, arrived_at, float(danmaku.amount), seq)
+            heapq.heappush(self._pinned, (-danmaku.amount, seq, entry))
+        else:
+            key = math.log(max(priority, 1e-6))
+            if self.decay > 0:
+                key += arrived_at / self.decay
+            entry = _QueueEntry(danmaku, priority, arrived_at, key, seq)
+            heapq.heappush(self._top, (-key, seq, entry))
+            heapq.heappush(self._bottom, (key, seq, entry))
+            self._arrivals.append(entry)
+            self._size += 1
+        self._entries[id(danmaku)] = entry
+        self.stats["admitted"] += 1
+
+    def _bump(self, danmaku: Danmaku, arrived_at: float):
+        """代表弹幕又被刷了一次：按新的人数加成重新入堆。"""
+        entry = self._entries.get(id(danmaku))
+        if entry is None:
+            # 尚未评估（评估时会用上最新的 count），或已出队/被丢弃
+            return
+        self._kill(entry)
+        danmaku.priority = (
+            entry.priority + crowd_bonus(danmaku.count) - crowd_bonus(danmaku.count - 1)
+        )
+        self._push(danmaku, arrived_at)
+        self.stats["admitted"] -= 1
+
+    def _kill(self, entry: _QueueEntry):
+        entry.alive = False
+        self._entries.pop(id(entry.danmaku), None)
+        if not entry.danmaku.is_sc:
+            self._size -= 1
+
+    def _expire(self, now: float) -> List[Danmaku]:
+        expired = []
+        while self._arrivals:
+            entry = self._arrivals[0]
+            if entry.alive and (self.ttl <= 0 or now - entry.arrived_at <= self.ttl):
+                break
+            self._arrivals.popleft()
+            if entry.alive:
+                self._kill(entry)
+                self.stats["expired"] += 1
+                expired.append(entry.danmaku)
+        return expired
+
+    def _evict(self) -> Danmaku:
+        while True:
+            _, _, entry = heapq.heappop(self._bottom)
+            if entry.alive:
+                self._kill(entry)
+                self.stats["evicted"] += 1
+                return entry.danmaku
+
+    def _maybe_compact(self):
+        # 惰性删除留下的无效条目过多时重建堆
+        if len(self._top) + len(self._bottom) <= 4 * self._size + 64:
+            return
+        alive = [item for item in self._top if item[2].alive]
+        heapq.heapify(alive)
+        self._top = alive
+        self._bottom = [(entry.key, seq, entry) for _, seq, entry in alive]
+        heapq.heapify(self._bottom)
+        self._arrivals = deque(entry for entry in self._arrivals if entry.alive)
+
+    # ---- 查询 / 出队 ----
+
+    def effective_priority(self, danmaku: Danmaku) -> float:
+        """弹幕当前（衰减后）的优先级。"""
+        entry = self._entries.get(id(danmaku))
+        if entry is None:
+            return danmaku.priority
+        return self._effective(entry, self.clock())
+
+    def _effective(self, entry: _QueueEntry, now: float) -> float:
+        if entry.danmaku.is_sc or self.decay <= 0:
+            return entry.priority
+        return entry.priority * math.exp(-(now - entry.arrived_at) / self.decay)
+
+    def _head(self) -> Optional[_QueueEntry]:
+        for heap in (self._pinned, self._top):
+            while heap and not heap[0][2].alive:
+                heapq.heappop(heap)
+            if heap:
+                return heap[0][2]
+        return None
+
+    def peek(self) -> Optional[Danmaku]:
+        """查看队首弹幕，并把其 priority 更新为衰减后的有效优先级。"""
+        with self._lock:
+            entry = self._head()
+            if entry is None:
+                return None
+            entry.danmaku.priority = self._effective(entry, self.clock())
+            return entry.danmaku
+
+    def pop(self) -> Optional[Danmaku]:
+        """取出队首弹幕。"""
+        with self._lock:
+            danmaku = self.peek()
+            if danmaku is not None:
+                self.remove(danmaku)
+            return danmaku
+
+    def remove(self, danmaku: Danmaku) -> bool:
+        """移除指定弹幕（按对象身份），返回是否存在。"""
+        with self._lock:
+            entry = self._entries.get(id(danmaku))
+            if entry is None:
+                return False
+            self._kill(entry)
+            self.stats["popped"] += 1
+            return True
+
+    def top(self, k: int) -> List[Danmaku]:
+        """按出队顺序返回前 k 条已入堆的弹幕（不出队）。"""
+        with self._lock:
+            pinned = [e for _, _, e in sorted(self._pinned) if e.alive]
+            normal = heapq.nsmallest(
+                k, (item for item in self._top if item[2].alive)
+            )
+            return [e.danmaku for e in pinned + [item[2] for item in normal]][:k]
+
+
 @dataclass
 class PerformanceState:
     """表演状态。"""
@@ -156,5 +739,17 @@ class PerformanceState:
     current_step: int = 0
 
     memory: PerformerMemory = field(default_factory=PerformerMemory)
-    danmaku_queue: List[Danmaku] = field(default_factory=list)
+    danmaku_queue: DanmakuQueue = field(default_factory=DanmakuQueue)
     catchphrases: List[str] = field(default_factory=list)
+    # 本场表演的关键词词典（key_info、口癖），叠加在共享的语料词典之上
+    keywords: KeywordExtractor = field(
+        default_factory=default_extractor.overlay, repr=False, compare=False
+    )
+
+    _answer_index: Optional[KeyInfoIndex] = field(default=None, repr=False, compare=False)
+
+    def answer_index(self) -> KeyInfoIndex:
+        """剧本 key_info 的倒排索引（首次使用或剧本被替换时构建）。"""
+        if self._answer_index is None or not self._answer_index.matches(self.script_lines):
+            self._answer_index = KeyInfoIndex(self.script_lines)
+        return self._answer_index
@@ -0,0 +1,269 @@
+"""
+流式语音相关工具：分句切分、LLM JSON 字段增量提取、按步的流式语音输出。
+"""
+
+from __future__ import annotations
+
+import time
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from .audio import pcm_to_wav, wav_to_pcm
+
+# 句末标点：标点（连同后引号）结束后切分
+SENTENCE_ENDINGS = set("。！？!?；;…\n")
+# 句中停顿：片段足够长时才切分，避免碎成一两个字
+CLAUSE_BREAKS = set("，、,：:~～")
+# 可以跟在句末标点后面的后引号/括号
+CLOSING_MARKS = set("”’」』）)】\"'")
+
+
+class ClauseSplitter:
+    """
+    增量分句器。
+
+    按中英文标点把不断到来的文本切成可以单独送去合成的短句。
+    """
+
+    def __init__(self, min_chars: int = 6):
+        self.min_chars = min_chars
+        self._buffer = ""
+        self._cut_pending = False
+
+    def feed(self, text: str) -> List[str]:
+        """输入新文本，返回已经完整的分句。"""
+        clauses = []
+        for ch in text:
+            # 连续的句末标点（“！？”“……”）和后引号跟在同一句里
+            if self._cut_pending and ch not in SENTENCE_ENDINGS and ch not in CLOSING_MARKS:
+                clauses.append(self._buffer)
+                self._buffer = ""
+                self._cut_pending = False
+
+            self._buffer += ch
+            if ch in SENTENCE_ENDINGS:
+                self._cut_pending = bool(self._buffer.strip())
+            elif ch in CLAUSE_BREAKS and len(self._buffer.strip()) >= self.min_chars:
+                clauses.append(self._buffer)
+                self._buffer = ""
+            elif ch == " " and self._buffer[:-1].rstrip().endswith("."):
+                # 英文句号需要看到后面的空格才能确认不是小数点
+                clauses.append(self._buffer)
+                self._buffer = ""
+        return [c.strip() for c in clauses if c.strip()]
+
+    def flush(self) -> List[str]:
+        """取出剩余文本。"""
+        rest = self._buffer.strip()
+        self._buffer = ""
+        self._cut_pending = False
+        return [rest] if rest else []
+
+
+def split_clauses(text: str, min_chars: int = 6) -> List[str]:
+    """把一段台词切成分句。"""
+    splitter = ClauseSplitter(min_chars=min_chars)
+    return splitter.feed(text) + splitter.flush()
+
+
+class JSONFieldStreamer:
+    """
+    增量 JSON 字符串字段提取器。
+
+    LLM 流式输出 JSON 时，不必等完整对象解析完成，
+    一边接收 token 一边解出指定字段（如 "response"）的字符串内容。
+    """
+
+    _ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+    def __init__(self, field: str):
+        self._key = f'"{field}"'
+        self._raw = ""
+        self._pos = 0
+        self._state = "key"  # key -> value -> string -> done
+        self._chars: List[str] = []
+
+    @property
+    def done(self) -> bool:
+        return self._state == "done"
+
+    @property
+    def value(self) -> str:
+        """目前已解出的字段内容。"""
+        return "".join(self._chars)
+
+    def feed(self, chunk: str) -> str:
+        """输入新 token，返回本次新解出的字段文本。"""
+        self._raw += chunk
+        out: List[str] = []
+        raw = self._raw
+
+        while self._pos < len(raw) and self._state != "done":
+            if self._state == "key":
+                idx = raw.find(self._key, self._pos)
+                if idx < 0:
+                    # 保留可能被截断的 key 前缀
+                    self._pos = max(self._pos, len(raw) - len(self._key) + 1)
+                    break
+                self._pos = idx + len(self._key)
+                self._state = "value"
+            elif self._state == "value":
+                ch = raw[self._pos]
+                if ch in " \t\r\n:":
+                    self._pos += 1
+                elif ch == '"':
+                    self._pos += 1
+                    self._state = "string"
+                else:
+                    # 字段值不是字符串，放弃提取
+                    self._state = "done"
+            else:
+                ch = raw[self._pos]
+                if ch == '"':
+                    self._pos += 1
+                    self._state = "done"
+                elif ch == "\\":
+                    if self._pos + 1 >= len(raw):
+                        break
+                    esc = raw[self._pos + 1]
+                    if esc == "u":
+                        if self._pos + 6 > len(raw):
+                            break
+                        try:
+                            out.append(chr(int(raw[self._pos + 2 : self._pos + 6], 16)))
+                        except ValueError:
+                            pass
+                        self._pos += 6
+                    else:
+                        out.append(self._ESCAPES.get(esc, esc))
+                        self._pos += 2
+                else:
+                    out.append(ch)
+                    self._pos += 1
+
+        text = "".join(out)
+        self._chars.append(text)
+        return text
+
+
+class SpeechStream:
+    """
+    一步表演的流式语音输出。
+
+    say() 只提交任务，分句合成在单个后台线程中按提交顺序执行，
+    这样 LLM 还在生成后续 token 时，已完成的分句就可以开始合成和下发。
+    每个音频分片回调一个字典：step / line_idx / seq（本步内递增）/ clause（分句序号）/
+    text（分句文本）/ format / sample_rate / data / final。
+    close() 时回调一个 final=True、data 为空的结束标记，并返回整段音频；
+    表演步中途出错未能 close() 时须调用 abort() 释放后台线程。
+    first_audio_at 记录首个音频分片送出的时刻（time.monotonic），播放调度以此为开播时间。
+
+    lipsync=True 且输出为 PCM 时，分片同时送入 VisemeAnalyzer：每个分片附带
+    visemes（该分片新增的口型帧），close() 后整段口型轨在 viseme_track 中。
+    """
+
+    def __init__(
+        self,
+        tts,
+        on_audio_chunk: Callable[[Dict], None],
+        step: int,
+        line_idx: int,
+        lipsync: bool = False,
+    ):
+        self.tts = tts
+        self.on_audio_chunk = on_audio_chunk
+        self.step = step
+        self.line_idx = line_idx
+        self.format = tts.stream_format
+        self.sample_rate = tts.sample_rate
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="echuu-speech")
+        self._futures: List[Future] = []
+        self._closed = False
+        self._chunks: List[bytes] = []
+        self._seq = 0
+        self._clause_base = 0
+        self._visemes = None
+        if lipsync and self.format == "pcm":
+            from .lipsync import VisemeAnalyzer
+
+            self._visemes = VisemeAnalyzer(sample_rate=self.sample_rate)
+        self.viseme_track = None
+        self.first_audio_at: Optional[float] = None
+
+    def say(self, text: str, emotion_boost: float = 0.0):
+        """提交一段文本（内部会再按分句切分）。"""
+        if text and text.strip():
+            self._futures.append(self._executor.submit(self._synthesize, text, emotion_boost))
+
+    def say_audio(self, text: str, audio: bytes):
+        """提交一段已合成好的音频（例如预取结果），作为一个分片下发。"""
+        if audio:
+            self._futures.append(self._executor.submit(self._emit_audio, text, audio))
+
+    def _synthesize(self, text: str, emotion_boost: float):
+        base = self._clause_base
+        count = len(split_clauses(text))
+        self.tts.synthesize_stream(
+            text,
+            lambda idx, clause, data: self._emit(base + idx, clause, data),
+            emotion_boost=emotion_boost,
+            record=False,
+        )
+        self._clause_base = base + count
+
+    def _emit_audio(self, text: str, audio: bytes):
+        data = wav_to_pcm(audio) if self.format == "pcm" else audio
+        self._emit(self._clause_base, text, data)
+        self._clause_base += 1
+
+    def _emit(self, clause_idx: int, text: str, data: bytes, final: bool = False):
+        if data:
+            if self.first_audio_at is None:
+                self.first_audio_at = time.monotonic()
+            self._chunks.append(data)
+        chunk = {
+            "step": self.step,
+            "line_idx": self.line_idx,
+            "seq": self._seq,
+            "clause": clause_idx,
+            "text": text,
+            "format": self.format,
+            "sample_rate": self.sample_rate,
+            "data": data,
+            "final": final,
+        }
+        if self._visemes is not None:
+            weights = self._visemes.flush() if final else self._visemes.feed(data)
+            chunk["visemes"] = weights.round(3).tolist()
+        self.on_audio_chunk(chunk)
+        self._seq += 1
+
+    def close(self) -> Optional[bytes]:
+        """等待所有分句合成完毕，发送结束标记，返回整段音频并写入录制。"""
+        self._closed = True
+        for future in self._futures:
+            try:
+                future.result()
+            except CancelledError:
+                pass
+            except Exception as exc:
+                print(f"[TTS] 流式合成错误: {exc}")
+        self._executor.shutdown(wait=True)
+        self._emit(-1, "", b"", final=True)
+        if self._visemes is not None:
+            self.viseme_track = self._visemes.track
+
+        if not self._chunks:
+            return None
+        audio = b"".join(self._chunks)
+        if self.format == "pcm":
+            audio = pcm_to_wav(audio, sample_rate=self.sample_rate)
+        self.tts.record_clip(audio)
+        return audio
+
+    def abort(self):
+        """放弃本步输出：取消排队中的分句并关闭线程池，不发结束标记。已 close() 时无操作。"""
+        if self._closed:
+            return
+        self._closed = True
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,253 @@
+"""
+二进制音频传输。
+
+原来每段音频都是 24kHz 的 WAV，base64 后塞进 JSON 的 step / audio_chunk 消息，
+比裸 PCM 还大 1/3，再乘以观众数。这里把每段音频在房间内只编码一次（默认 Opus），
+封装成一个带小文件头的二进制 WebSocket 帧发给所有支持的连接；文字事件仍然是 JSON。
+
+帧格式（小端）：
+
+    magic   2s  b"EA"
+    version B   1
+    codec   B   0=pcm16 1=opus 2=wav 3=mp3 4=ogg_opus（TTS 直接输出的 Ogg Opus 文件）
+    flags   B   bit0 = final（该步音频结束）
+    roomlen B   房间号字节数
+    step    I   表演步
+    seq     I   本场直播内全局递增序号，与 JSON 消息中的 audio_seq 对应
+    rate    I   采样率
+    chunk   H   该步内的分片序号
+    room    roomlen 字节 UTF-8
+    payload 其余字节
+
+opus 的 payload 是若干 20ms Opus 包，每包前加 2 字节长度（<H），客户端可逐包送入
+WebCodecs AudioDecoder；pcm16 为 16-bit 单声道小端 PCM。
+
+Opus 编码依赖可选的 opuslib（pip install opuslib，需要系统 libopus）；
+未安装时自动退回 pcm16，仍然省去 base64 与 JSON 转义。
+"""
+
+from __future__ import annotations
+
+import struct
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+from .audio import is_wav, parse_wav
+
+MAGIC = b"EA"
+VERSION = 1
+HEADER = struct.Struct("<2sBBBBIIIH")
+
+CODEC_PCM16 = 0
+CODEC_OPUS = 1
+CODEC_WAV = 2
+CODEC_MP3 = 3
+CODEC_OGG_OPUS = 4
+CODEC_NAMES = {
+    CODEC_PCM16: "pcm16",
+    CODEC_OPUS: "opus",
+    CODEC_WAV: "wav",
+    CODEC_MP3: "mp3",
+    CODEC_OGG_OPUS: "ogg_opus",
+}
+# TTS 输出的已压缩格式 -> 帧中的 codec（原样转发）
+_PASSTHROUGH = {"mp3": CODEC_MP3, "opus": CODEC_OGG_OPUS}
+
+FLAG_FINAL = 0x01
+
+OPUS_SAMPLE_RATES = (8000, 12000, 16000, 24000, 48000)
+
+
+def opus_available() -> bool:
+    """是否可以使用 Opus 编码（opuslib 及 libopus 均可用）。"""
+    try:
+        import opuslib  # noqa: F401
+    except Exception:
+        return False
+    return True
+
+
+@dataclass
+class AudioFrame:
+    """一个二进制音频帧。"""
+
+    room: str
+    step: int
+    seq: int
+    codec: int
+    sample_rate: int
+    payload: bytes
+    chunk: int = 0
+    final: bool = True
+
+    @property
+    def codec_name(self) -> str:
+        return CODEC_NAMES.get(self.codec, "unknown")
+
+    def pack(self) -> bytes:
+        room = self.room.encode("utf-8")[:255]
+        header = HEADER.pack(
+            MAGIC,
+            VERSION,
+            self.codec,
+            FLAG_FINAL if self.final else 0,
+            len(room),
+            self.step,
+            self.seq,
+            self.sample_rate,
+            self.chunk,
+        )
+        return header + room + self.payload
+
+    @classmethod
+    def unpack(cls, data: bytes) -> "AudioFrame":
+        if len(data) < HEADER.size:
+            raise ValueError("音频帧过短")
+        magic, version, codec, flags, room_len, step, seq, rate, chunk = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("不是有效的音频帧")
+        room_end = HEADER.size + room_len
+        return cls(
+            room=data[HEADER.size:room_end].decode("utf-8"),
+            step=step,
+            seq=seq,
+            codec=codec,
+            sample_rate=rate,
+            payload=data[room_end:],
+            chunk=chunk,
+            final=bool(flags & FLAG_FINAL),
+        )
+
+
+def split_opus_packets(payload: bytes):
+    """把 opus payload 拆回 Opus 包列表。"""
+    packets = []
+    pos = 0
+    while pos + 2 <= len(payload):
+        (size,) = struct.unpack_from("<H", payload, pos)
+        packets.append(payload[pos + 2 : pos + 2 + size])
+        pos += 2 + size
+    return packets
+
+
+class OpusStreamEncoder:
+    """
+    把连续的 16-bit 单声道 PCM 编成 20ms 的 Opus 包。
+
+    不足一帧的尾部留到下一段（同一步的分片首尾相接）；final 时补静音编完。
+    encoder 可以注入任何带 encode(pcm, frame_size) -> bytes 的对象（测试用）。
+    """
+
+    FRAME_MS = 20
+
+    def __init__(self, sample_rate: int = 24000, bitrate: int = 24000, encoder=None):
+        if sample_rate not in OPUS_SAMPLE_RATES:
+            raise ValueError(f"Opus 不支持的采样率: {sample_rate}")
+        self.sample_rate = sample_rate
+        self.frame_samples = sample_rate * self.FRAME_MS // 1000
+        self.frame_bytes = self.frame_samples * 2
+        if encoder is None:
+            import opuslib
+
+            encoder = opuslib.Encoder(sample_rate, 1, opuslib.APPLICATION_AUDIO)
+            encoder.bitrate = bitrate
+        self._encoder = encoder
+        self._pending = b""
+
+    def encode(self, pcm: bytes, final: bool = False) -> bytes:
+        data = self._pending + pcm
+        usable = len(data) - len(data) % self.frame_bytes
+        if final and usable < len(data):
+            data += b"\0" * (self.frame_bytes - len(data) % self.frame_bytes)
+            usable = len(data)
+        self._pending = data[usable:]
+
+        out = []
+        for pos in range(0, usable, self.frame_bytes):
+            packet = self._encoder.encode(data[pos : pos + self.frame_bytes], self.frame_samples)
+            out.append(struct.pack("<H", len(packet)))
+            out.append(packet)
+        return b"".join(out)
+
+
+class AudioTransport:
+    """
+    一个房间的音频编码器：每段音频只编码一次，所有二进制连接共享同一帧。
+
+    codec="opus" 时在 opuslib 可用且采样率受支持的情况下编码为 Opus，否则为 pcm16；
+    mp3 等已压缩的音频原样转发。
+    """
+
+    def __init__(
+        self,
+        room: str,
+        codec: str = "opus",
+        bitrate: int = 24000,
+        encoder_factory: Optional[Callable[[int], OpusStreamEncoder]] = None,
+    ):
+        self.room = room
+        self.codec = codec.lower()
+        self.bitrate = bitrate
+        self.seq = 0
+        self._encoder_factory = encoder_factory
+        self._encoders: Dict[int, OpusStreamEncoder] = {}
+        self._use_opus = self.codec == "opus" and (encoder_factory is not None or opus_available())
+        self._lock = threading.Lock()
+        self.stats = {"frames": 0, "bytes_in": 0, "bytes_out": 0}
+
+    def _opus_encoder(self, sample_rate: int) -> OpusStreamEncoder:
+        encoder = self._encoders.get(sample_rate)
+        if encoder is None:
+            if self._encoder_factory:
+                encoder = self._encoder_factory(sample_rate)
+            else:
+                encoder = OpusStreamEncoder(sample_rate, self.bitrate)
+            self._encoders[sample_rate] = encoder
+        return encoder
+
+    def encode(
+        self,
+        audio: bytes,
+        fmt: str = "pcm",
+        sample_rate: int = 24000,
+        step: int = 0,
+        chunk: int = 0,
+        final: bool = True,
+    ) -> AudioFrame:
+        """
+        编码一段音频（WAV、裸 PCM 或 mp3 等）。
+
+        流式分片按到达顺序传入，final=True 表示该步音频结束（Opus 在此处补齐最后一帧）。
+        """
+        with self._lock:
+            codec = CODEC_PCM16
+            payload = audio or b""
+            if payload and is_wav(payload):
+                pcm, sample_rate, channels, sample_width = parse_wav(payload)
+                if (channels, sample_width) == (1, 2):
+                    payload = pcm
+                else:
+                    codec = CODEC_WAV  # 非 16-bit 单声道的 WAV 原样转发
+            elif fmt not in ("pcm", "wav"):
+                codec = _PASSTHROUGH.get(fmt, CODEC_MP3)
+
+            if codec == CODEC_PCM16 and self._use_opus and sample_rate in OPUS_SAMPLE_RATES:
+                payload = self._opus_encoder(sample_rate).encode(payload, final=final)
+                codec = CODEC_OPUS
+
+            frame = AudioFrame(
+                room=self.room,
+                step=step,
+                seq=self.seq,
+                codec=codec,
+                sample_rate=sample_rate,
+                payload=payload,
+                chunk=chunk,
+                final=final,
+            )
+            self.seq += 1
+            self.stats["frames"] += 1
+            self.stats["bytes_in"] += len(audio or b"")
+            self.stats["bytes_out"] += len(payload) + HEADER.size
+            return frame
@@ -0,0 +1,172 @@
+"""
+TTS 音频磁盘缓存。
+
+结束语、快速回应模板、"好了不说了" 这类收尾句，以及在多个直播间重放的同一份剧本，
+合成结果完全相同。这里按 (文本, 模型, 音色, 语速, 音调, 音量, 格式, 采样率) 的哈希
+把音频存到分片目录（root/ab/abcdef....bin），总大小超过上限时按最近使用时间淘汰。
+
+    cache = TTSCache("output/tts_cache", max_bytes=512 * 1024 * 1024)
+    key = cache.key(text, model="qwen3-tts-flash-realtime", voice="Cherry")
+    audio = cache.get(key)
+    if audio is None:
+        audio = synthesize(text)
+        cache.put(key, audio)
+
+索引（键 -> 大小，按使用顺序排列）保存在内存中，启动时按文件 mtime 重建；
+命中时更新 mtime，因此 LRU 顺序在进程重启后仍然保留。多个进程共用同一目录是安全的
+（写入先写临时文件再原子替换），只是各自只按自己的索引淘汰。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+SUFFIX = ".bin"
+
+
+class TTSCache:
+    """内容寻址的 TTS 音频缓存（线程安全）。"""
+
+    def __init__(self, root: Union[str, Path], max_bytes: int = 512 * 1024 * 1024):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._load_index()
+
+    @staticmethod
+    def key(text: str, **params) -> str:
+        """
+        缓存键：文本与全部合成参数（model / voice / speech_rate / pitch_rate / volume /
+        format / sample_rate 等）的 SHA-256。参数值统一转成字符串，None 与缺省等价。
+        """
+        payload = {"text": text}
+        payload.update({k: str(v) for k, v in params.items() if v is not None})
+        raw = json.dumps(payload, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}{SUFFIX}"
+
+    def _load_index(self):
+        if not self.root.exists():
+            return
+        entries = []
+        for path in self.root.glob(f"*/*{SUFFIX}"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, path.stem, stat.st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._size += size
+        self._evict()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """读取缓存；命中时刷新 LRU 位置。"""
+        with self._lock:
+            known = key in self._index
+        if known:
+            path = self._path(key)
+            try:
+                data = path.read_bytes()
+                os.utime(path)
+            except OSError:
+                data = None
+            with self._lock:
+                if data is not None:
+                    if key in self._index:
+                        self._index.move_to_end(key)
+                    self.hits += 1
+                    return data
+                # 文件被外部删除
+                self._size -= self._index.pop(key, 0)
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, audio: Optional[bytes]):
+        """写入缓存（空音频不缓存；单个超过上限的条目也不缓存）。"""
+        if not audio or len(audio) > self.max_bytes:
+            return
+        path = self._path(key)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp.write_bytes(audio)
+            os.replace(tmp, path)
+        except OSError as exc:
+            print(f"[TTS] 写入缓存失败: {exc}")
+            tmp.unlink(missing_ok=True)
+            return
+        with self._lock:
+            self._size -= self._index.pop(key, 0)
+            self._index[key] = len(audio)
+            self._size += len(audio)
+            self.writes += 1
+            self._evict()
+
+    def _evict(self):
+        """淘汰最久未使用的条目直到总大小不超过上限（调用方持有锁或在初始化中）。"""
+        while self._size > self.max_bytes and self._index:
+            key, size = self._index.popitem(last=False)
+            self._size -= size
+            self.evictions += 1
+            try:
+                self._path(key).unlink()
+            except OSError:
+                pass
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._index
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._index)
+
+    @property
+    def size(self) -> int:
+        """缓存占用的总字节数。"""
+        return self._size
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "entries": len(self._index),
+                "bytes": self._size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "writes": self.writes,
+                "evictions": self.evictions,
+                "hit_rate": self.hit_rate,
+            }
+
+    def clear(self):
+        """删除全部缓存条目。"""
+        with self._lock:
+            keys = list(self._index)
+            self._index.clear()
+            self._size = 0
+        for key in keys:
+            try:
+                self._path(key).unlink()
+            except OSError:
+                pass
@@ -4,20 +4,56 @@ TTS 客户端封装（基于 CosyVoiceTTS）。
 
 from __future__ import annotations
 
+import asyncio
 import importlib.util
 import os
+import sys
+import threading
 from pathlib import Path
-from typing import Optional
+from types import ModuleType
+from typing import Callable, Dict, Optional
+
+from .audio import join_audio, pcm_to_wav
+from .postprocess import AudioPostProcessor
+from .recorder import StreamingRecorder
+from .streaming import split_clauses
+from .tts_cache import TTSCache
+
+# 动态加载的 TTS 后端模块（模块路径 -> 模块）：每个文件在进程内只执行一次，
+# 其中的 dashscope 等 SDK 也只在第一次构造启用的 TTSClient 时才导入
+_backend_modules: Dict[Path, ModuleType] = {}
+_backend_lock = threading.Lock()
+
+
+def load_backend_module(module_path: Path, module_name: str) -> Optional[ModuleType]:
+    """按路径加载后端模块并缓存（同时登记到 sys.modules，其他地方 import 时复用同一份）。"""
+    module_path = module_path.resolve()
+    with _backend_lock:
+        module = _backend_modules.get(module_path)
+        if module is not None:
+            return module
+        if not module_path.exists():
+            return None
+
+        spec = importlib.util.spec_from_file_location(module_name, module_path)
+        if not spec or not spec.loader:
+            return None
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_name] = module
+        try:
+            spec.loader.exec_module(module)
+        except Exception:
+            sys.modules.pop(module_name, None)
+            raise
+        _backend_modules[module_path] = module
+        return module
 
 
 class TTSClient:
     """轻量 TTS 包装器，提供统一接口。"""
 
     def __init__(self):
-        self.enabled = False
-        self._recording = False
-        self._recording_buffer = []
-        self.tts = None
+        self._init_state()
 
         api_key = os.getenv("DASHSCOPE_API_KEY")
         if not api_key:
@@ -36,9 +72,103 @@ class TTSClient:
             )
             self.enabled = True
             print("TTS 已启用")
+            self.cache = self._open_cache()
+            self.postprocessor = self._open_postprocessor()
+            if hasattr(self.tts, "warmup"):
+                # 后台预建 realtime 长连接，首句合成不再等握手
+                threading.Thread(target=self._warmup, daemon=True).start()
         except Exception as exc:
             print(f"TTS 初始化失败: {exc}")
 
+    def _init_state(
+        self,
+        tts=None,
+        cache: Optional[TTSCache] = None,
+        postprocessor: Optional[AudioPostProcessor] = None,
+    ):
+        """
+        初始化基础状态（子类换用其他合成后端时也调用这里，而不是逐个复制属性）。
+
+        Args:
+            tts: 合成后端（接口同 CosyVoiceTTS），传入时即为启用
+            cache: 音频磁盘缓存
+            postprocessor: 整段音频的后处理
+        """
+        self.tts = tts
+        self.enabled = tts is not None
+        self._recording = False
+        self._recording_buffer = []
+        self._recorder: Optional[StreamingRecorder] = None
+        self.cache = cache
+        self.postprocessor = postprocessor
+
+    def _warmup(self):
+        try:
+            self.tts.warmup()
+        except Exception as exc:
+            print(f"[TTS] 预建连接失败: {exc}")
+
+    def _open_cache(self) -> Optional[TTSCache]:
+        """
+        音频磁盘缓存（TTS_CACHE_DIR，默认 output/tts_cache；
+        TTS_CACHE_MAX_MB 为容量上限，设为 0 关闭缓存）。
+        """
+        max_mb = float(os.getenv("TTS_CACHE_MAX_MB", "512"))
+        if max_mb <= 0:
+            return None
+        root = os.getenv("TTS_CACHE_DIR") or self._find_project_root() / "output" / "tts_cache"
+        try:
+            return TTSCache(root, max_bytes=int(max_mb * 1024 * 1024))
+        except OSError as exc:
+            print(f"[TTS] 缓存不可用: {exc}")
+            return None
+
+    @staticmethod
+    def _open_postprocessor() -> Optional[AudioPostProcessor]:
+        """
+        整段音频的后处理（AUDIO_POSTPROCESS=0 关闭；AUDIO_TARGET_LUFS 目标响度，
+        AUDIO_SILENCE_DB 静音门限）。
+        """
+        if os.getenv("AUDIO_POSTPROCESS", "1").lower() in ("0", "false", "no", "off"):
+            return None
+        return AudioPostProcessor(
+            target_lufs=float(os.getenv("AUDIO_TARGET_LUFS", "-18")),
+            silence_db=float(os.getenv("AUDIO_SILENCE_DB", "-45")),
+        )
+
+    def postprocess(self, audio: Optional[bytes]) -> Optional[bytes]:
+        """裁剪首尾静音并归一响度（仅 WAV；缓存中存的是未处理的原始音频）。"""
+        if self.postprocessor is None or not audio:
+            return audio
+        try:
+            return self.postprocessor.process(audio).audio
+        except Exception as exc:
+            print(f"[TTS] 音频后处理失败: {exc}")
+            return audio
+
+    def cache_key(self, text: str, kind: str = "full") -> str:
+        """
+        文本 + 全部合成参数的缓存键。kind 区分整段音频（full，PCM 已封装为 WAV）
+        和流式分句（stream，原始分片拼接）。
+        """
+        tts = self.tts
+        return TTSCache.key(
+            text,
+            kind=kind,
+            model=getattr(tts, "model", None),
+            voice=getattr(tts, "voice", None),
+            speech_rate=getattr(tts, "speech_rate", None),
+            pitch_rate=getattr(tts, "pitch_rate", None),
+            volume=getattr(tts, "volume", None),
+            format=self.stream_format,
+            sample_rate=getattr(tts, "sample_rate", None),
+            language_type=getattr(tts, "language_type", None),
+        )
+
+    def cache_stats(self) -> Optional[Dict[str, float]]:
+        """缓存命中率等指标（未启用缓存时为 None）。"""
+        return self.cache.stats() if self.cache is not None else None
+
     @staticmethod
     def _find_project_root() -> Path:
         """寻找项目根目录（包含 .git 或 requirements.txt）。"""
@@ -50,67 +180,190 @@ class TTSClient:
 
     def _load_cosyvoice_class(self):
         """
-        动态加载 workflow/backend/tts_client.py 中的 CosyVoiceTTS。
+        动态加载 workflow/backend/tts_client.py 中的 CosyVoiceTTS（模块进程内只加载一次）。
         """
-        project_root = self._find_project_root()
-        module_path = project_root / "workflow" / "backend" / "tts_client.py"
-        if not module_path.exists():
-            return None
-
-        spec = importlib.util.spec_from_file_location("workflow_backend_tts_client", module_path)
-        if not spec or not spec.loader:
-            return None
-        module = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(module)
-        return getattr(module, "CosyVoiceTTS", None)
+        module_path = self._find_project_root() / "workflow" / "backend" / "tts_client.py"
+        module = load_backend_module(module_path, "workflow_backend_tts_client")
+        return getattr(module, "CosyVoiceTTS", None) if module else None
 
-    def synthesize(self, text: str, emotion_boost: float = 0.0) -> Optional[bytes]:
+    def synthesize(
+        self, text: str, emotion_boost: float = 0.0, record: bool = True
+    ) -> Optional[bytes]:
         """
         合成语音。
 
         Args:
             text: 合成文本
             emotion_boost: 情绪增强参数（保留接口，不影响当前实现）
+            record: 是否写入录制缓冲（预取时为 False，取用时再调用 record_clip）
         """
         if not self.enabled or not self.tts:
             return None
 
-        try:
-            audio = self.tts.synthesize(text)
-        except Exception as exc:
-            print(f"[TTS] 合成错误: {exc}")
+        key = self.cache_key(text) if self.cache is not None else None
+        audio = self.cache.get(key) if key else None
+        if audio is None:
+            try:
+                audio = self.tts.synthesize(text)
+            except Exception as exc:
+                print(f"[TTS] 合成错误: {exc}")
+                return None
+            if key:
+                self.cache.put(key, audio)
+
+        audio = self.postprocess(audio)
+        if record:
+            self.record_clip(audio)
+
+        return audio
+
+    @property
+    def stream_format(self) -> str:
+        """流式回调中音频分片的格式（realtime 模型为 response_format，离线模型为 mp3）。"""
+        if self.tts and getattr(self.tts, "_is_realtime_model", lambda: False)():
+            return getattr(self.tts, "response_format", "pcm").lower()
+        return "mp3"
+
+    @property
+    def sample_rate(self) -> int:
+        return int(getattr(self.tts, "sample_rate", 24000))
+
+    def synthesize_stream(
+        self,
+        text: str,
+        on_audio: Callable[[int, str, bytes], None],
+        emotion_boost: float = 0.0,
+        record: bool = True,
+    ) -> Optional[bytes]:
+        """
+        分句流式合成。
+
+        按标点把台词切成分句，逐句送入 CosyVoiceTTS.synthesize_with_callback，
+        每收到一个音频分片就回调 on_audio(clause_idx, clause_text, chunk)。
+
+        Returns:
+            整段音频（PCM 会封装为一个完整 WAV），用于录制和非流式消费者
+        """
+        if not self.enabled or not self.tts:
             return None
 
-        if self._recording and audio:
-            self._recording_buffer.append(audio)
+        chunks = []
+        for clause_idx, clause in enumerate(split_clauses(text)):
+            key = self.cache_key(clause, kind="stream") if self.cache is not None else None
+            cached = self.cache.get(key) if key else None
+            if cached is not None:
+                # 命中缓存：整句音频作为一个分片送出
+                chunks.append(cached)
+                on_audio(clause_idx, clause, cached)
+                continue
+
+            clause_chunks = []
+
+            def _on_chunk(data: bytes, _idx=clause_idx, _clause=clause):
+                if data:
+                    clause_chunks.append(data)
+                    on_audio(_idx, _clause, data)
 
+            try:
+                self.tts.synthesize_with_callback(clause, on_audio=_on_chunk)
+            except Exception as exc:
+                print(f"[TTS] 分句合成错误: {exc}")
+                key = None  # 不完整的音频不缓存
+            chunks.extend(clause_chunks)
+            if key and clause_chunks:
+                self.cache.put(key, b"".join(clause_chunks))
+
+        if not chunks:
+            return None
+
+        audio = b"".join(chunks)
+        if self.stream_format == "pcm":
+            audio = pcm_to_wav(audio, sample_rate=self.sample_rate)
+
+        if record:
+            self.record_clip(audio)
         return audio
 
-    def start_recording(self):
-        """开始录制音频片段。"""
+    async def asynthesize(
+        self, text: str, emotion_boost: float = 0.0, record: bool = True
+    ) -> Optional[bytes]:
+        """
+        异步合成语音。
+
+        DashScope SDK 只提供阻塞式 websocket 接口，这里放到线程池执行，
+        避免阻塞事件循环。
+        """
+        if not self.enabled or not self.tts:
+            return None
+        return await asyncio.to_thread(self.synthesize, text, emotion_boost, record)
+
+    def record_clip(self, audio: Optional[bytes]):
+        """将一段已合成的音频写入录制（流式录制时直接追加到文件）。"""
+        if not self._recording or not audio:
+            return
+        if self._recorder is not None:
+            try:
+                self._recorder.write(audio)
+            except OSError as exc:
+                print(f"[TTS] 写入录制失败: {exc}")
+        else:
+            self._recording_buffer.append(audio)
+
+    def start_recording(self, path: Optional[str] = None, segment_seconds: Optional[float] = None):
+        """
+        开始录制音频片段。
+
+        Args:
+            path: 传入时边演边写入该文件（内存占用不随时长增长，见 recorder.StreamingRecorder）；
+                不传时录制缓冲在内存中，由 save_recording(path) 一次写出
+            segment_seconds: 流式录制的滚动分段时长（秒）
+        """
         self._recording = True
         self._recording_buffer = []
+        if self._recorder is not None:
+            self._recorder.close()
+        self._recorder = (
+            StreamingRecorder(path, sample_rate=self.sample_rate, segment_seconds=segment_seconds)
+            if path
+            else None
+        )
 
-    def save_recording(self, path: str):
+    def save_recording(self, path: Optional[str] = None):
         """
-        保存录制音频。
-        
-        注意：音频数据已经是正确格式（PCM已转换为WAV），直接拼接保存即可。
+        结束录制并保存。
+
+        流式录制时关闭文件（path 不同且未分段时把文件移动到 path）；
+        内存录制时把片段合并为一个音频写入 path（WAV 片段合并 PCM，只保留一个文件头）。
         """
-        if not self._recording_buffer:
-            print("没有可保存的录制音频")
-            return
+        try:
+            if self._recorder is not None:
+                recorder, self._recorder = self._recorder, None
+                paths = recorder.close()
+                if not paths:
+                    print("没有可保存的录制音频")
+                    return
+                if path and len(paths) == 1 and Path(path) != paths[0]:
+                    Path(path).parent.mkdir(parents=True, exist_ok=True)
+                    os.replace(paths[0], path)
+                    paths = [Path(path)]
+                names = ", ".join(str(p) for p in paths)
+                print(f"录制音频已保存: {names} ({recorder.bytes_written} bytes)")
+                return
 
-        output_path = Path(path)
-        output_path.parent.mkdir(parents=True, exist_ok=True)
+            if not self._recording_buffer:
+                print("没有可保存的录制音频")
+                return
+            if not path:
+                print("[TTS] 未指定录制保存路径")
+                return
 
-        try:
-            with output_path.open("wb") as f:
-                for chunk in self._recording_buffer:
-                    f.write(chunk)
-            file_size = sum(len(chunk) for chunk in self._recording_buffer)
-            print(f"录制音频已保存: {output_path} ({file_size} bytes)")
+            output_path = Path(path)
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            audio = join_audio(self._recording_buffer)
+            output_path.write_bytes(audio)
+            print(f"录制音频已保存: {output_path} ({len(audio)} bytes)")
         except Exception as exc:
             print(f"[TTS] 保存录制失败: {exc}")
         finally:
             self._recording = False
+            self._recording_buffer = []
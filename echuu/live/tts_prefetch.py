@@ -0,0 +1,127 @@
+"""
+TTS 预取流水线（look-ahead）。
+
+当前台词播放时，在后台线程池中提前合成后续 N 行剧本台词的语音，
+下一步直接取用，把步与步之间的 TTS 等待压缩到接近 0。
+"""
+
+from __future__ import annotations
+
+import threading
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from typing import Dict, Iterable, Optional, Tuple
+
+from .tts_client import TTSClient
+
+
+class TTSPrefetcher:
+    """
+    台词语音预取器。
+
+    - 只预取剧本原文（尚未被弹幕回应替换的台词）
+    - 按 line_idx 缓存 Future，取用时校验文本是否一致
+    - 弹幕回应替换了即将要说的内容时，取消对应的预取任务
+    """
+
+    def __init__(self, tts: TTSClient, lookahead: int = 2, max_workers: int = 2):
+        self.tts = tts
+        self.lookahead = max(0, lookahead)
+        self.max_workers = max(1, max_workers)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: Dict[int, Tuple[str, Future]] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "cancelled": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.lookahead > 0 and self.tts.enabled
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="echuu-tts-prefetch",
+            )
+        return self._executor
+
+    def schedule(self, current_idx: int, lines: Iterable[Tuple[int, str, float]]):
+        """
+        提交预取任务。
+
+        Args:
+            current_idx: 下一步将要表演的行号，更早的预取结果会被丢弃
+            lines: (line_idx, text, emotion_boost) 列表，只取前 lookahead 行
+        """
+        if not self.enabled:
+            return
+
+        with self._lock:
+            for idx in [i for i in self._pending if i < current_idx]:
+                self._cancel_locked(idx)
+
+            for line_idx, text, emotion_boost in list(lines)[: self.lookahead]:
+                if not text or line_idx in self._pending:
+                    continue
+                future = self._get_executor().submit(
+                    self.tts.synthesize, text, emotion_boost, False
+                )
+                self._pending[line_idx] = (text, future)
+
+    def take(self, line_idx: int, text: str) -> Tuple[bool, Optional[bytes]]:
+        """
+        取出预取结果。
+
+        Returns:
+            (命中与否, 音频)。未命中时调用方需自行合成。
+        """
+        with self._lock:
+            entry = self._pending.pop(line_idx, None)
+
+        if entry is None:
+            self.stats["misses"] += 1
+            return False, None
+
+        prefetched_text, future = entry
+        if prefetched_text != text:
+            future.cancel()
+            self.stats["cancelled"] += 1
+            return False, None
+
+        try:
+            audio = future.result()
+        except CancelledError:
+            self.stats["misses"] += 1
+            return False, None
+        except Exception as exc:
+            print(f"[TTS] 预取失败: {exc}")
+            self.stats["misses"] += 1
+            return False, None
+
+        self.stats["hits"] += 1
+        return True, audio
+
+    def cancel(self, line_idx: int):
+        """取消某一行的预取（例如该行被弹幕回应替换）。"""
+        with self._lock:
+            self._cancel_locked(line_idx)
+
+    def _cancel_locked(self, line_idx: int):
+        entry = self._pending.pop(line_idx, None)
+        if entry is None:
+            return
+        # 已在执行中的合成无法中断，只能丢弃结果
+        entry[1].cancel()
+        self.stats["cancelled"] += 1
+
+    def reset(self):
+        """丢弃所有未取用的预取结果。"""
+        with self._lock:
+            for idx in list(self._pending):
+                self._cancel_locked(idx)
+
+    def shutdown(self):
+        """关闭后台线程池。"""
+        self.reset()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
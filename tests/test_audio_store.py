@@ -0,0 +1,121 @@
+"""
+内容寻址音频存储单元测试
+"""
+
+import os
+
+import pytest
+
+from echuu.live.audio import pcm_to_wav
+from echuu.live.audio_store import (
+    IMMUTABLE_CACHE_CONTROL,
+    REVALIDATE_CACHE_CONTROL,
+    AudioStore,
+    audio_static_files,
+    cache_control_for,
+    etag_for,
+    parse_range,
+)
+
+
+class TestAudioStore:
+    """写入、去重与 URL"""
+
+    def test_put_is_content_addressed(self, tmp_path):
+        store = AudioStore(tmp_path)
+        wav = pcm_to_wav(b"\1\2" * 100)
+        ref = store.put("room_1", wav, "pcm")
+        assert ref.path == tmp_path / "room_1" / f"{ref.hash}.wav"
+        assert ref.path.read_bytes() == wav
+        assert ref.url == f"/audio/room_1/{ref.hash}.wav"
+        assert ref.to_dict() == {"audio_url": ref.url, "audio_hash": ref.hash, "audio_size": len(wav)}
+
+        again = store.put("room_1", wav, "pcm")
+        assert again.url == ref.url
+        assert store.stats["writes"] == 1 and store.stats["reused"] == 1
+        assert store.put("room_1", b"mp3data", "mp3").path.suffix == ".mp3"
+
+
+class TestHttpHelpers:
+    """ETag、缓存头与 Range 解析"""
+
+    def test_etag_and_cache_control(self, tmp_path):
+        ref = AudioStore(tmp_path).put("s", b"abc", "mp3")
+        assert etag_for(ref.path, os.stat(ref.path)) == f'"{ref.hash}"'
+        assert cache_control_for(ref.path) == IMMUTABLE_CACHE_CONTROL
+
+        legacy = tmp_path / "s" / "step_0.wav"
+        legacy.write_bytes(b"x")
+        stat = os.stat(legacy)
+        assert etag_for(legacy, stat) == f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        assert cache_control_for(legacy) == REVALIDATE_CACHE_CONTROL
+
+    def test_parse_range(self):
+        assert parse_range(None, 100) is None
+        assert parse_range("bytes=0-9", 100) == (0, 9)
+        assert parse_range("bytes=90-", 100) == (90, 99)
+        assert parse_range("bytes=50-500", 100) == (50, 99)
+        assert parse_range("bytes=-10", 100) == (90, 99)
+        assert parse_range("bytes=0-1,5-6", 100) is None  # 多段按整份响应
+        with pytest.raises(ValueError):
+            parse_range("bytes=100-", 100)
+        with pytest.raises(ValueError):
+            parse_range("bytes=9-3", 100)
+
+
+@pytest.fixture
+def audio_client(tmp_path):
+    """挂载 /audio 的 TestClient 与一段已写入的音频（需要 starlette 与 httpx）。"""
+    pytest.importorskip("starlette")
+    pytest.importorskip("httpx")
+    from starlette.applications import Starlette
+    from starlette.routing import Mount
+    from starlette.testclient import TestClient
+
+    ref = AudioStore(tmp_path).put("room_1", bytes(range(256)) * 4, "mp3")
+    app = Starlette(routes=[Mount("/audio", app=audio_static_files(tmp_path), name="audio")])
+    return TestClient(app), ref
+
+
+class TestAudioStaticFiles:
+    """/audio 路由的条件请求与 Range 响应"""
+
+    def test_full_response_headers(self, audio_client):
+        client, ref = audio_client
+        response = client.get(ref.url)
+        assert response.status_code == 200
+        assert response.content == ref.path.read_bytes()
+        assert response.headers["etag"] == f'"{ref.hash}"'
+        assert response.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+        assert response.headers["accept-ranges"] == "bytes"
+
+    def test_if_none_match_not_modified(self, audio_client):
+        client, ref = audio_client
+        response = client.get(ref.url, headers={"If-None-Match": f'"{ref.hash}"'})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == f'"{ref.hash}"'
+
+    def test_range_partial_content(self, audio_client):
+        client, ref = audio_client
+        response = client.get(ref.url, headers={"Range": "bytes=10-19"})
+        assert response.status_code == 206
+        assert response.headers["content-range"] == f"bytes 10-19/{ref.size}"
+        assert response.headers["content-length"] == "10"
+        assert response.content == ref.path.read_bytes()[10:20]
+
+        response = client.get(ref.url, headers={"Range": "bytes=10-19", "If-Range": f'"{ref.hash}"'})
+        assert response.status_code == 206
+
+    def test_if_range_mismatch_returns_full(self, audio_client):
+        client, ref = audio_client
+        response = client.get(ref.url, headers={"Range": "bytes=10-19", "If-Range": '"stale"'})
+        assert response.status_code == 200
+        assert "content-range" not in response.headers
+        assert response.content == ref.path.read_bytes()
+
+    def test_unsatisfiable_range(self, audio_client):
+        client, ref = audio_client
+        response = client.get(ref.url, headers={"Range": f"bytes={ref.size}-"})
+        assert response.status_code == 416
+        assert response.headers["content-range"] == f"bytes */{ref.size}"
@@ -0,0 +1,51 @@
+"""
+DanmakuEvaluator.evaluate_batch 单元测试
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+from echuu.live.benchmark import make_benchmark_state, make_danmaku_burst
+from echuu.live.danmaku import DanmakuEvaluator
+from echuu.live.state import Danmaku
+
+
+class NoBoostRng:
+    """random() 恒为 1.0，关闭随机加分。"""
+
+    def random(self, n):
+        return np.ones(n)
+
+
+class TestEvaluateBatch:
+    """批量评估与逐条评估一致性测试"""
+
+    def test_matches_scalar(self, monkeypatch):
+        monkeypatch.setattr(random, "random", lambda: 1.0)
+        state = make_benchmark_state()
+        evaluator = DanmakuEvaluator()
+        evaluator.rng = NoBoostRng()
+
+        scalar = make_danmaku_burst(200, seed=1)
+        batch = make_danmaku_burst(200, seed=1)
+        for dm in scalar:
+            evaluator.evaluate(dm, state)
+        evaluator.evaluate_batch(batch, state)
+
+        assert [d.priority for d in batch] == pytest.approx([d.priority for d in scalar])
+        assert [d.relevance for d in batch] == pytest.approx([d.relevance for d in scalar])
+
+    def test_small_batch_uses_scalar(self):
+        state = make_benchmark_state()
+        burst = make_danmaku_burst(3)
+        DanmakuEvaluator(seed=0).evaluate_batch(burst, state)
+        assert all(d.priority > 0 for d in burst)
+
+    def test_random_boost_rate(self):
+        state = make_benchmark_state()
+        burst = [Danmaku.from_text("前排") for _ in range(5000)]
+        DanmakuEvaluator(seed=0).evaluate_batch(burst, state)
+        boosted = sum(1 for d in burst if d.priority > 0.5)
+        assert 0.15 < boosted / len(burst) < 0.25
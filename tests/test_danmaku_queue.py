@@ -0,0 +1,144 @@
+"""
+DanmakuQueue 单元测试
+"""
+
+import pytest
+
+from echuu.live.aggregator import DanmakuAggregator
+from echuu.live.state import Danmaku, DanmakuQueue
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make(text, priority, user="观众"):
+    dm = Danmaku(text=text, user=user)
+    dm.priority = priority
+    return dm
+
+
+def keep_priority(dm):
+    return dm
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+class TestDanmakuQueue:
+    """DanmakuQueue 测试"""
+
+    def test_list_compat(self, clock):
+        q = DanmakuQueue(clock=clock)
+        assert not q
+        q.append(make("a", 0.1))
+        q.extend([make("b", 0.2)])
+        assert len(q) == 2
+        assert {d.text for d in q} == {"a", "b"}
+
+    def test_evaluated_once_on_admit(self, clock):
+        q = DanmakuQueue(clock=clock)
+        calls = []
+        q.append(make("a", 0.5))
+        q.admit(calls.append)
+        q.admit(calls.append)
+        assert len(calls) == 1
+
+    def test_pop_order(self, clock):
+        q = DanmakuQueue(clock=clock)
+        q.extend([make("low", 0.2), make("high", 0.9), make("mid", 0.5)])
+        q.admit(keep_priority)
+        assert [q.pop().text for _ in range(3)] == ["high", "mid", "low"]
+        assert q.pop() is None
+
+    def test_aging_prefers_fresh(self, clock):
+        q = DanmakuQueue(decay=10.0, ttl=0, clock=clock)
+        q.append(make("old", 0.6))
+        clock.now = 20.0
+        q.append(make("new", 0.4))
+        q.admit(keep_priority)
+        top = q.peek()
+        assert top.text == "new"
+        assert top.priority == pytest.approx(0.4)
+        assert q.effective_priority(q.top(2)[1]) == pytest.approx(0.6 * 2.718281828 ** -2, rel=1e-3)
+
+    def test_sc_pinned(self, clock):
+        q = DanmakuQueue(max_size=1, ttl=5.0, clock=clock)
+        q.append(Danmaku.from_text("SC 50 加油"))
+        q.append(Danmaku.from_text("SC 200 冲"))
+        q.append(make("normal", 5.0))
+        clock.now = 100.0
+        q.admit(keep_priority)
+        assert [d.text for d in q.top(3)] == ["SC 200 冲", "SC 50 加油"]
+        assert q.stats["expired"] == 1
+
+    def test_bounded_evicts_lowest(self, clock):
+        q = DanmakuQueue(max_size=2, clock=clock)
+        q.extend([make("a", 0.3), make("b", 0.1), make("c", 0.5)])
+        dropped = q.admit(keep_priority)
+        assert [d.text for d in dropped] == ["b"]
+        assert q.stats["evicted"] == 1
+        assert len(q) == 2
+
+    def test_ttl_expiry(self, clock):
+        q = DanmakuQueue(ttl=10.0, clock=clock)
+        q.append(make("a", 0.9))
+        q.admit(keep_priority)
+        clock.now = 11.0
+        q.append(make("b", 0.1))
+        dropped = q.admit(keep_priority)
+        assert [d.text for d in dropped] == ["a"]
+        assert q.peek().text == "b"
+
+    def test_remove(self, clock):
+        q = DanmakuQueue(clock=clock)
+        a, b = make("a", 0.9), make("b", 0.1)
+        q.extend([a, b])
+        q.admit(keep_priority)
+        assert q.remove(a)
+        assert not q.remove(a)
+        assert q.peek() is b
+
+    def test_aggregates_near_duplicates(self, clock):
+        q = DanmakuQueue(clock=clock)
+        q.append(make("其他", 0.4))
+        q.append(make("真的假的", 0.3))
+        q.admit(keep_priority)
+        for text in ["真的假的？", "真的假的！！", "真的假的"]:
+            q.append(make(text, 0.3))
+        q.admit(keep_priority)
+
+        assert len(q) == 2
+        assert q.stats["merged"] == 3
+        top = q.peek()
+        assert top.text == "真的假的"
+        assert top.count == 4
+        assert top.priority == pytest.approx(0.5)
+
+
+class TestDanmakuAggregator:
+    """DanmakuAggregator 测试"""
+
+    def test_merge_and_window(self):
+        agg = DanmakuAggregator(window=10.0)
+        first = Danmaku(text="哈哈哈哈")
+        assert agg.add(first, now=0.0) is first
+        assert agg.add(Danmaku(text="哈哈哈哈哈哈哈！"), now=1.0) is first
+        assert agg.add(Danmaku(text="主播今天吃了什么呀"), now=2.0).count == 1
+        assert agg.add(Danmaku(text="主播今天吃什么呀"), now=3.0).text == "主播今天吃了什么呀"
+        assert first.count == 2
+
+        late = Danmaku(text="哈哈")
+        assert agg.add(late, now=20.0) is late
+
+    def test_sc_never_merged(self):
+        agg = DanmakuAggregator()
+        a, b = Danmaku.from_text("SC 50 冲"), Danmaku.from_text("SC 50 冲")
+        assert agg.add(a, now=0.0) is a
+        assert agg.add(b, now=0.0) is b
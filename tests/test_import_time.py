@@ -0,0 +1,75 @@
+"""
+冷启动导入耗时测试（python -X importtime）
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import echuu
+from echuu.live.tts_client import load_backend_module
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+# 这些只应在真正用到时才导入
+HEAVY_MODULES = {"numpy", "anthropic", "dashscope", "dotenv"}
+
+# `import echuu` 的累计耗时上限（微秒），留足 CI 抖动余量；目前约 3ms
+ECHUU_IMPORT_BUDGET_US = 100_000
+
+
+def import_profile(statement: str) -> dict:
+    """在新进程里执行 statement，返回 {模块名: 累计导入耗时（微秒）}。"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        profile[name.strip()] = int(cumulative)
+    return profile
+
+
+class TestImportTime:
+    """导入耗时测试"""
+
+    def test_import_echuu_is_light(self):
+        profile = import_profile("import echuu")
+        assert not HEAVY_MODULES & profile.keys()
+        assert "echuu.live.engine" not in profile
+        assert profile["echuu"] < ECHUU_IMPORT_BUDGET_US
+
+    def test_engine_defers_sdks(self):
+        profile = import_profile("import echuu.live.engine")
+        assert not HEAVY_MODULES & profile.keys()
+
+    def test_lazy_attributes(self):
+        from echuu.live.engine import EchuuLiveEngine
+
+        assert echuu.EchuuLiveEngine is EchuuLiveEngine
+        assert "EchuuLiveEngine" in dir(echuu)
+        with pytest.raises(AttributeError):
+            echuu.NoSuchThing
+
+
+class TestBackendRegistry:
+    """TTS 后端模块缓存测试"""
+
+    def test_module_executed_once(self, tmp_path):
+        counter = tmp_path / "loads.txt"
+        path = tmp_path / "fake_backend.py"
+        path.write_text(f"open({str(counter)!r}, 'a').write('x')\n")
+
+        first = load_backend_module(path, "echuu_test_fake_backend")
+        second = load_backend_module(path, "echuu_test_fake_backend")
+        assert first is second is sys.modules["echuu_test_fake_backend"]
+        assert counter.read_text() == "x"
+        sys.modules.pop("echuu_test_fake_backend", None)
@@ -0,0 +1,75 @@
+"""
+关键词提取单元测试
+"""
+
+from types import SimpleNamespace
+
+from echuu.live.keywords import KeyInfoIndex, KeywordExtractor
+
+
+class TestKeywordExtractor:
+    """KeywordExtractor 测试"""
+
+    def test_chinese_without_spaces(self):
+        extractor = KeywordExtractor()
+        keywords = extractor.extract("主播年会抽到什么了")
+        assert "年会" in keywords
+        assert "主播" in keywords
+        assert all(len(kw) >= 2 for kw in keywords)
+
+    def test_dictionary_terms_first(self):
+        extractor = KeywordExtractor()
+        extractor.add_terms(["上司的八卦"])
+        assert extractor.extract("上司的八卦到底是什么？")[0] == "上司的八卦"
+
+    def test_english_and_japanese(self):
+        extractor = KeywordExtractor()
+        assert extractor.extract("What happened to your BOSS lol") == ["happened", "boss"]
+        assert "ゲーム" in extractor.extract("ゲームもやりたい")
+
+    def test_legacy_import_path(self):
+        from echuu.live import danmaku, keywords
+
+        assert danmaku.extract_keywords is keywords.extract_keywords
+
+    def test_cache_cleared_on_new_terms(self):
+        extractor = KeywordExtractor()
+        before = extractor.extract("上司的八卦")
+        version = extractor.version
+        extractor.add_terms(["上司的八卦"])
+        assert extractor.version == version + 1
+        assert extractor.extract("上司的八卦") != before
+
+    def test_overlay_does_not_leak(self):
+        base = KeywordExtractor()
+        base.add_terms(["腰果"])
+        room_a, room_b = base.overlay(), base.overlay()
+        room_a.add_terms(["上司的八卦"])
+        assert room_a.extract("上司的八卦和腰果")[:2] == ["上司的八卦", "腰果"]
+        assert "上司的八卦" not in room_b and "上司的八卦" not in base
+        assert "腰果" in room_b.extract("腰果真好吃")
+
+    def test_overlay_sees_new_base_terms(self):
+        base = KeywordExtractor()
+        room = base.overlay()
+        version = room.version
+        assert "年会抽奖" not in room.extract("年会抽奖")
+        base.add_terms(["年会抽奖"])
+        assert room.version != version
+        assert room.extract("年会抽奖") == ["年会抽奖"]
+
+
+class TestKeyInfoIndex:
+    """KeyInfoIndex 测试"""
+
+    def test_nearest_line_from_current(self):
+        lines = [
+            SimpleNamespace(key_info=["上司的八卦"]),
+            SimpleNamespace(key_info=["公司年会", "上司辞职"]),
+            SimpleNamespace(key_info=[]),
+        ]
+        index = KeyInfoIndex(lines)
+        assert index.find(["上司"], 0) == (0, "上司的八卦")
+        assert index.find(["上司"], 1) == (1, "上司辞职")
+        assert index.find(["年会", "上司"], 1) == (1, "公司年会")
+        assert index.find(["上司"], 2) is None
@@ -0,0 +1,76 @@
+"""
+流式口型分析单元测试
+"""
+
+import numpy as np
+
+from echuu.live.audio import pcm_to_wav
+from echuu.live.lipsync import VISEMES, VisemeAnalyzer, analyze_audio
+from echuu.live.offline import SyntheticTTS
+from echuu.live.streaming import SpeechStream
+from echuu.vrm.mapper import VRMExpressionMapper, VRMVersion
+
+RATE = 24000
+
+
+def vowel(f1, f2, seconds=0.5, f0=200):
+    """两个共振峰塑形的谐波"元音"（16-bit PCM）"""
+    t = np.arange(int(RATE * seconds)) / RATE
+    wave = np.zeros_like(t)
+    for h in range(1, 15):
+        f = f0 * h
+        gain = np.exp(-(((f - f1) / 120) ** 2)) + 0.7 * np.exp(-(((f - f2) / 200) ** 2)) + 0.02
+        wave += gain * np.sin(2 * np.pi * f * t)
+    return (0.3 * wave / np.abs(wave).max() * 32767).astype("<i2").tobytes()
+
+
+def dominant(pcm):
+    summary = analyze_audio(pcm_to_wav(pcm)).summary()
+    return max(summary, key=summary.get)
+
+
+class TestVisemeAnalyzer:
+    """口型分类、流式一致性与口型轨"""
+
+    def test_vowels(self):
+        assert dominant(vowel(850, 1350)) == "aa"
+        assert dominant(vowel(320, 2500)) == "ih"
+        assert dominant(vowel(500, 2100)) == "ee"
+
+    def test_silence_is_closed(self):
+        track = analyze_audio(pcm_to_wav(b"\0\0" * RATE))
+        assert len(track) == 51
+        assert all(w == 0 for frame in track.frames for w in frame)
+
+    def test_streaming_matches_whole(self):
+        pcm = vowel(850, 1350, 0.3) + b"\0\0" * 2400 + vowel(320, 2500, 0.3)
+        streaming = VisemeAnalyzer()
+        # 故意在奇数字节处切分
+        for pos in range(0, len(pcm), 1001):
+            streaming.feed(pcm[pos : pos + 1001])
+        streaming.flush()
+        whole = analyze_audio(pcm_to_wav(pcm))
+        assert streaming.track.frames == whole.frames
+        # 状态不随音频增长：缓冲始终不足一个窗口
+        assert len(streaming._buffer) < streaming.window
+
+    def test_track_mapping(self):
+        track = analyze_audio(pcm_to_wav(vowel(850, 1350)))
+        data = track.to_dict(VRMExpressionMapper(version=VRMVersion.VRM0))
+        assert data["visemes"] == list(VISEMES)
+        assert data["blendShapes"] == ["A", "I", "U", "E", "O"]
+        assert len(data["frames"]) == len(track) and len(data["frames"][0]) == 5
+
+
+class TestSpeechStreamVisemes:
+    """流式语音分片附带口型帧"""
+
+    def test_chunks_carry_visemes(self):
+        chunks = []
+        stream = SpeechStream(SyntheticTTS(), chunks.append, step=1, line_idx=0, lipsync=True)
+        stream.say("今天来聊一个很离谱的故事，你们绝对想不到。")
+        audio = stream.close()
+        frames = sum(len(c["visemes"]) for c in chunks)
+        assert chunks[-1]["final"]
+        assert frames == len(stream.viseme_track)
+        assert abs(stream.viseme_track.duration - len(audio) / (RATE * 2)) < 0.05
@@ -0,0 +1,151 @@
+"""
+PerformerMemory 单元测试
+"""
+
+import copy
+
+from echuu.live.state import OrderedSet, PerformerMemory, PromiseBook, RingBuffer
+
+
+class TestBoundedContainers:
+    """有界容器测试"""
+
+    def test_ring_buffer(self):
+        buf = RingBuffer(maxlen=3)
+        buf.extend(range(5))
+        assert list(buf) == [2, 3, 4]
+        assert buf[-2:] == [3, 4]
+        assert buf[0] == 2
+        assert buf.total == 5
+
+    def test_ordered_set(self):
+        points = OrderedSet()
+        points.extend(["a", "b", "a", "c"])
+        assert list(points) == ["a", "b", "c"]
+        assert "b" in points
+        assert points[-2:] == ["b", "c"]
+        assert points[1] == "b"
+
+    def test_promise_book(self):
+        book = PromiseBook(maxlen=2)
+        book.append({"content": "x", "fulfilled": False, "answer_at_line": 3})
+        book.append({"content": "y", "fulfilled": False, "answer_at_line": 5})
+        assert book.open_count == 2
+        assert [p["content"] for p in book.fulfill_at(3)] == ["x"]
+        assert book.open_count == 1
+        assert book.fulfilled_count == 1
+        assert [p["content"] for p in book.unfulfilled()] == ["y"]
+
+    def test_deepcopy_keeps_counters(self):
+        book = PromiseBook()
+        book.append({"content": "x", "fulfilled": False, "answer_at_line": 1})
+        clone = copy.deepcopy(book)
+        assert clone.open_count == 1
+        assert clone.fulfill_at(1)
+
+
+class TestPerformerMemory:
+    """PerformerMemory 测试"""
+
+    def test_bounded_danmaku_memory(self):
+        memory = PerformerMemory()
+        received = memory.danmaku_memory["received"]
+        for i in range(received.maxlen + 50):
+            received.append(str(i))
+        assert len(received) == received.maxlen
+        assert received.total == received.maxlen + 50
+
+    def test_display_uses_totals(self):
+        memory = PerformerMemory()
+        responded = memory.danmaku_memory["responded"]
+        for i in range(responded.maxlen + 1):
+            responded.append(str(i))
+        assert f"已回应{responded.maxlen + 1}条" in memory.to_display()
+
+    def test_snapshot_is_independent(self):
+        memory = PerformerMemory()
+        memory.story_points["mentioned"].append("腰果")
+        memory.promises.append({"content": "等下说", "fulfilled": False, "answer_at_line": 3})
+        snap = memory.snapshot()
+        memory.story_points["mentioned"].append("室友")
+        memory.promises.fulfill_at(3)
+        assert list(snap.story_points["mentioned"]) == ["腰果"]
+        assert "待兑现承诺: 等下说" in snap.to_context()
+
+
+def apply_patch(doc, ops):
+    """测试用：把 diff_since 的操作应用到客户端副本上。"""
+    for op in ops:
+        if op["path"] == "":
+            doc = op["value"]
+            continue
+        *parents, last = op["path"].lstrip("/").split("/")
+        target = doc
+        for key in parents:
+            target = target[key]
+        if op["op"] == "add" and last == "-":
+            target.append(op["value"])
+        elif op["op"] == "remove":
+            del target[int(last)]
+        else:
+            target[last] = op["value"]
+    return doc
+
+
+class TestMemoryDelta:
+    """版本与增量测试"""
+
+    def test_version_bumps_only_on_change(self):
+        memory = PerformerMemory()
+        v0 = memory.sync()
+        assert memory.sync() == v0
+        memory.story_points["mentioned"].add("上司")
+        assert memory.sync() == v0 + 1
+        assert memory.diff_since(memory.version) == []
+
+    def test_diff_round_trip(self):
+        memory = PerformerMemory()
+        client = memory.to_dict()
+        base = memory.version
+
+        memory.danmaku_memory["received"].extend(["a", "b"])
+        memory.story_points["mentioned"].add("上司")
+        memory.script_progress["current_line"] = 3
+        memory.promises.append({"content": "x", "fulfilled": False, "answer_at_line": 4})
+        ops = memory.diff_since(base)
+        assert {op["op"] for op in ops} <= {"add", "replace"}
+        client = apply_patch(client, ops)
+
+        base = memory.version
+        memory.promises.fulfill_at(4)
+        memory.emotion_track.append({"level": 1})
+        client = apply_patch(client, memory.diff_since(base))
+
+        expected = memory.to_dict()
+        client["version"] = expected["version"]
+        assert client == expected
+
+    def test_ring_overflow_emits_removes(self):
+        memory = PerformerMemory()
+        received = memory.danmaku_memory["received"]
+        received.extend(str(i) for i in range(received.maxlen))
+        client = memory.to_dict()
+        base = memory.version
+        received.extend(["x", "y"])
+        ops = memory.diff_since(base)
+        assert len(ops) == 4
+        client = apply_patch(client, ops)
+        assert client["danmaku_memory"]["received"] == list(received)
+
+    def test_unknown_version_gets_snapshot(self):
+        memory = PerformerMemory()
+        memory.emotion_track.append({"level": 2})
+        ops = memory.diff_since(-42)
+        assert ops == [{"op": "replace", "path": "", "value": memory.to_dict()}]
+
+    def test_display_cached_by_version(self):
+        memory = PerformerMemory()
+        first = memory.to_display()
+        assert memory.to_display() is first
+        memory.story_points["mentioned"].add("上司的八卦")
+        assert "上司的八卦" in memory.to_display()
@@ -0,0 +1,230 @@
+"""
+离线后端与回放单元测试
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from echuu.live.audio import wav_duration
+from echuu.live.offline import LatencyModel, ScriptedLLM, SyntheticTTS
+from echuu.live.replay import load_danmaku_trace, make_offline_engine, replay
+from echuu.live.streaming import split_clauses
+
+
+@pytest.fixture
+def script_file(tmp_path):
+    path = tmp_path / "script.json"
+    script = [
+        {"id": f"line_{i}", "text": f"第{i}句，讲到上司的八卦。", "stage": "Build-up", "cost": 0.2, "key_info": ["上司"]}
+        for i in range(4)
+    ]
+    path.write_text(
+        json.dumps({"metadata": {"name": "六螺", "topic": "上司 八卦"}, "script": script}, ensure_ascii=False),
+        encoding="utf-8",
+    )
+    return path
+
+
+class TestLatencyModel:
+    """延迟分布测试"""
+
+    def test_fixed_and_speed(self):
+        model = LatencyModel(base=1.0, per_unit=0.5, dist="fixed", speed=10.0)
+        assert model.sample(2) == pytest.approx(2.0)
+        assert model.delay(2) == pytest.approx(0.2)
+
+    def test_lognormal_mean(self):
+        model = LatencyModel(base=1.0, jitter=0.5, seed=0)
+        samples = [model.sample() for _ in range(5000)]
+        assert sum(samples) / len(samples) == pytest.approx(1.0, rel=0.05)
+        assert min(samples) >= 0
+
+    def test_unknown_dist(self):
+        with pytest.raises(ValueError):
+            LatencyModel(dist="uniform")
+
+
+class TestOfflineBackends:
+    """ScriptedLLM / SyntheticTTS 测试"""
+
+    def test_llm_deterministic(self):
+        llm = ScriptedLLM()
+        text = llm.call("主播为什么？")
+        assert text == llm.call("主播为什么？")
+        assert "".join(llm.stream("主播为什么？")) == text
+        assert asyncio.run(llm.acall("主播为什么？")) == text
+        assert json.loads(text)["response"]
+        assert llm.stats.snapshot()["calls"] == 4
+
+    def test_tts_duration(self):
+        tts = SyntheticTTS(chars_per_sec=5.0)
+        audio = tts.synthesize("一二三四五")
+        assert wav_duration(audio) == pytest.approx(1.0)
+
+        clauses = []
+        text = "今天我们来聊一聊上司的八卦。后来他突然辞职了，大家都很惊讶！"
+        audio = tts.synthesize_stream(text, lambda idx, clause, data: clauses.append(clause))
+        assert clauses == split_clauses(text)
+        assert wav_duration(audio) > 0
+
+
+class TestReplay:
+    """离线回放测试"""
+
+    def test_replay_runs_offline(self, script_file, tmp_path):
+        trace_file = tmp_path / "danmaku.json"
+        trace_file.write_text(
+            json.dumps([{"text": "上司后来怎么样了？", "user": "a"}, {"text": "哈哈", "user": "b"}], ensure_ascii=False),
+            encoding="utf-8",
+        )
+        trace = load_danmaku_trace(str(trace_file), every=1)
+        assert [d["step"] for d in trace] == [0, 1]
+
+        engine = make_offline_engine(speed=1000.0)
+        report = replay(engine, str(script_file), danmaku_trace=trace, stream=True, speed=1000.0)
+        assert len(report.steps) == 4
+        assert report.audio_seconds > 0
+        assert report.danmaku == 2
+        assert all(s.first_audio is not None for s in report.steps)
+        assert report.summary()["steps"] == 4
+
+    def test_replay_hits_tts_cache(self, script_file, tmp_path):
+        cache_dir = str(tmp_path / "tts_cache")
+        first = make_offline_engine(speed=1000.0, cache_dir=cache_dir, postprocess=True)
+        report = replay(first, str(script_file), speed=1000.0)
+        assert report.cache_stats["hits"] == 0 and report.cache_stats["writes"] > 0
+        calls = first.tts.stats.snapshot()["calls"]
+        assert calls > 0
+
+        # 同一剧本再回放一次：台词全部命中缓存，不再调用合成后端
+        second = make_offline_engine(speed=1000.0, cache_dir=cache_dir, postprocess=True)
+        report = replay(second, str(script_file), speed=1000.0)
+        assert report.cache_stats["hits"] == calls and report.cache_stats["misses"] == 0
+        assert second.tts.stats.snapshot()["calls"] == 0
+        assert report.audio_seconds > 0
+        assert report.to_dict()["cache"]["hit_rate"] == 1.0
+
+    def test_background_work_not_charged_to_step(self, script_file):
+        engine = make_offline_engine(speed=100.0, jitter=0.0, dist="fixed")
+        report = replay(engine, str(script_file), prefetch_lines=2, speed=100.0)
+        # 第一步之后的台词都由后台预取合成：记在 background，本步的 llm + tts 不超过 total
+        assert all(s.llm + s.tts <= s.total + 1e-3 for s in report.steps)
+        assert sum(s.background for s in report.steps) > 0
+        assert report.steps[1].tts == 0.0
+
+    def test_timed_danmaku_follow_playback(self, script_file):
+        engine = make_offline_engine(speed=1000.0)
+        trace = [{"text": "哈哈", "user": "a", "time": 0.0}, {"text": "太晚了", "user": "b", "time": 1e6}]
+        report = replay(engine, str(script_file), danmaku_trace=trace, speed=1000.0)
+        assert len(report.steps) == 4
+        assert engine.state.danmaku_queue.stats["admitted"] == 1
+        assert report.danmaku == 1
+        assert engine.scheduler.elapsed() == pytest.approx(report.audio_seconds)
+
+
+class TestAsyncEngine:
+    """astep / arun 测试（ScriptedLLM + SyntheticTTS）"""
+
+    def test_astep_advances_line(self, script_file):
+        engine = make_offline_engine(speed=1000.0)
+        state = engine.load_script(str(script_file))
+        result = asyncio.run(engine.performer.astep(state, None))
+        assert result["speech"] == "第0句，讲到上司的八卦。"
+        assert wav_duration(result["audio"]) > 0
+        assert state.current_line_idx == 1
+
+    def test_arun_matches_run(self, script_file):
+        danmaku = [{"step": 1, "text": "上司后来怎么样了？", "user": "a"}]
+
+        engine = make_offline_engine(speed=1000.0)
+        engine.load_script(str(script_file))
+        sync_results = list(engine.run(max_steps=4, danmaku_sim=danmaku))
+
+        engine = make_offline_engine(speed=1000.0)
+        engine.load_script(str(script_file))
+
+        async def collect():
+            return [r async for r in engine.arun(max_steps=4, danmaku_sim=danmaku)]
+
+        async_results = asyncio.run(collect())
+        assert [r["speech"] for r in async_results] == [r["speech"] for r in sync_results]
+        assert all(r.get("audio") for r in async_results)
+        assert engine.state.memory.danmaku_memory["received"]
+
+    def test_arun_rooms_share_loop(self, script_file):
+        engines = [make_offline_engine(speed=1000.0) for _ in range(3)]
+        for engine in engines:
+            engine.load_script(str(script_file))
+        chunks = []
+
+        async def room(engine):
+            return [r async for r in engine.arun(max_steps=4, on_audio_chunk=chunks.append)]
+
+        async def main():
+            return await asyncio.gather(*(room(e) for e in engines))
+
+        results = asyncio.run(main())
+        assert [len(r) for r in results] == [4, 4, 4]
+        # 首个分片时刻只用于播放调度，不出现在结果里
+        assert not any("_first_audio_at" in r for rs in results for r in rs)
+        assert all(r["streamed"] for rs in results for r in rs)
+        assert chunks and all(e.state.current_line_idx == 4 for e in engines)
+
+    def test_early_stop_finishes_run(self, script_file):
+        engine = make_offline_engine(speed=1000.0)
+        engine.load_script(str(script_file))
+        results = engine.run(max_steps=4, prefetch_lines=2)
+        next(results)
+        assert engine.performer.prefetcher._executor is not None
+        results.close()
+        assert engine.performer.prefetcher._executor is None
+
+        engine.load_script(str(script_file))
+
+        async def stop_after_first():
+            results = engine.arun(max_steps=4, prefetch_lines=2)
+            await results.__anext__()
+            assert engine.performer.prefetcher._executor is not None
+            await results.aclose()
+
+        asyncio.run(stop_after_first())
+        assert engine.performer.prefetcher._executor is None
+
+    def test_failed_step_finishes_run(self, script_file):
+        engine = make_offline_engine(speed=1000.0)
+        engine.load_script(str(script_file))
+        finished = []
+        engine._finish_run = finished.append
+
+        def broken_chunk(chunk):
+            raise RuntimeError("下游断开")
+
+        with pytest.raises(RuntimeError):
+            list(engine.run(max_steps=4, save_audio=True, on_audio_chunk=broken_chunk))
+        assert finished == [True]
+
+    def test_failed_step_releases_stream(self, script_file):
+        engine = make_offline_engine(speed=1000.0)
+        state = engine.load_script(str(script_file))
+        performer = engine.performer
+        streams = []
+        open_stream = performer._open_stream
+
+        def recording_open(*args):
+            streams.append(open_stream(*args))
+            streams[-1].say("合成中途出错")
+            return streams[-1]
+
+        def broken_advance(state, line):
+            raise RuntimeError("推进出错")
+
+        performer._open_stream = recording_open
+        performer._advance = broken_advance
+        with pytest.raises(RuntimeError):
+            performer.step(state, None, on_audio_chunk=lambda chunk: None)
+        with pytest.raises(RuntimeError):
+            asyncio.run(performer.astep(state, None, on_audio_chunk=lambda chunk: None))
+        # 没走到 close() 的语音流也要关闭线程池
+        assert len(streams) == 2 and all(s._executor._shutdown for s in streams)
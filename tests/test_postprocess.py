@@ -0,0 +1,85 @@
+"""
+音频后处理单元测试
+"""
+
+import sys
+
+import numpy as np
+
+from echuu.live import postprocess
+from echuu.live.audio import parse_wav, pcm_to_wav, wav_duration
+from echuu.live.postprocess import AudioPostProcessor
+
+RATE = 24000
+
+
+def speech_clip(lead=0.5, body=1.0, tail=0.5, amplitude=0.05):
+    """前后带静音的正弦"语音" WAV"""
+    t = np.arange(int(RATE * body)) / RATE
+    tone = amplitude * np.sin(2 * np.pi * 220 * t)
+    wave = np.concatenate([np.zeros(int(RATE * lead)), tone, np.zeros(int(RATE * tail))])
+    return pcm_to_wav((wave * 32767).astype("<i2").tobytes(), sample_rate=RATE)
+
+
+def lufs_of(wav):
+    pcm = np.frombuffer(parse_wav(wav)[0], dtype="<i2").astype(np.float64) / 32768
+    return -0.691 + 10 * np.log10(np.mean(pcm ** 2))
+
+
+class TestAudioPostProcessor:
+    """静音裁剪、响度归一与淡入淡出"""
+
+    def test_trims_silence_and_reports_duration(self):
+        proc = AudioPostProcessor(pad_ms=60)
+        result = proc.process(speech_clip())
+        assert result.processed
+        assert abs(wav_duration(result.audio) - 1.12) < 0.02
+        assert abs(result.trimmed - 0.88) < 0.02
+
+    def test_normalizes_loudness(self):
+        proc = AudioPostProcessor(target_lufs=-20.0, pad_ms=0, fade_ms=0)
+        quiet = proc.process(speech_clip(amplitude=0.05))
+        loud = proc.process(speech_clip(amplitude=0.5))
+        assert abs(lufs_of(quiet.audio) - (-20.0)) < 0.5
+        assert abs(lufs_of(loud.audio) - (-20.0)) < 0.5
+        assert quiet.gain_db > 0 > loud.gain_db
+
+    def test_peak_limit_and_fades(self):
+        proc = AudioPostProcessor(target_lufs=0.0, max_gain_db=40.0, peak_db=-1.0, pad_ms=0)
+        result = proc.process(speech_clip(lead=0, tail=0, amplitude=0.3))
+        pcm = np.frombuffer(parse_wav(result.audio)[0], dtype="<i2")
+        assert np.abs(pcm).max() <= 32768 * 10 ** (-1 / 20) + 1
+        assert pcm[0] == 0 and abs(int(pcm[-1])) < 200
+
+    def test_passthrough(self):
+        proc = AudioPostProcessor()
+        silence = pcm_to_wav(b"\0\0" * RATE)
+        assert proc.process(silence).audio is silence
+        assert proc.process(b"ID3mp3").audio == b"ID3mp3"
+        stereo = pcm_to_wav(b"\1\0" * 100, channels=2)
+        assert proc.process(stereo).audio is stereo
+
+    def test_vectorized(self):
+        """Python 层执行的行数与音频长度无关（没有逐采样 / 逐帧的 Python 循环）"""
+        proc = AudioPostProcessor()
+
+        def traced_lines(clip):
+            count = [0]
+
+            def tracer(frame, event, arg):
+                if frame.f_code.co_filename != postprocess.__file__:
+                    return None
+                if event == "line":
+                    count[0] += 1
+                return tracer
+
+            sys.settrace(tracer)
+            try:
+                proc.process(clip)
+            finally:
+                sys.settrace(None)
+            return count[0]
+
+        short = traced_lines(speech_clip(lead=0.5, body=1, tail=0.5))
+        long = traced_lines(speech_clip(lead=5, body=60, tail=5))
+        assert short > 0 and long == short
@@ -0,0 +1,79 @@
+"""
+剧本语音预渲染单元测试
+"""
+
+import json
+
+import pytest
+
+from echuu.live.offline import SyntheticTTS
+from echuu.live.prerender import RateLimiter, ScriptPrerenderer
+from echuu.live.replay import make_offline_engine
+
+
+@pytest.fixture
+def script_file(tmp_path):
+    path = tmp_path / "script.json"
+    script = [
+        {"id": f"line_{i}", "text": f"第{i}句，讲到上司的八卦。", "stage": "Build-up", "cost": 0.2}
+        for i in range(6)
+    ]
+    path.write_text(
+        json.dumps({"metadata": {"name": "六螺", "topic": "上司 八卦"}, "script": script}, ensure_ascii=False),
+        encoding="utf-8",
+    )
+    return path
+
+
+class TestRateLimiter:
+    """令牌桶测试"""
+
+    def test_burst_then_wait(self):
+        now = [0.0]
+        limiter = RateLimiter(rate=2.0, burst=2, clock=lambda: now[0])
+        assert limiter.reserve() == 0.0
+        assert limiter.reserve() == 0.0
+        assert limiter.reserve() == pytest.approx(0.5)
+        now[0] = 10.0
+        assert limiter.reserve() == 0.0
+
+    def test_invalid_rate(self):
+        with pytest.raises(ValueError):
+            RateLimiter(rate=0)
+
+
+class TestScriptPrerenderer:
+    """预渲染与取用"""
+
+    def test_render_and_take(self, tmp_path):
+        tts = SyntheticTTS()
+        prerenderer = ScriptPrerenderer(tts, max_workers=3)
+        progress = []
+        lines = [(i, f"第{i}句。", 0.0) for i in range(5)] + [(5, "  ", 0.0)]
+        stats = prerenderer.render(
+            lines, output_dir=tmp_path / "audio", on_progress=lambda d, t: progress.append((d, t))
+        )
+        assert stats["rendered"] == 5 and stats["failed"] == 0
+        assert progress[-1] == (5, 5) and len(progress) == 5
+        assert sorted(p.name for p in (tmp_path / "audio").iterdir())[0] == "line_000.wav"
+
+        assert prerenderer.take(0, "被改写的台词") == (False, None)
+        hit, audio = prerenderer.take(1, "第1句。")
+        assert hit and audio
+        assert 1 not in prerenderer and len(prerenderer) == 3
+
+    def test_engine_plays_prerendered_lines(self, script_file):
+        engine = make_offline_engine(speed=1000.0)
+        engine.load_script(str(script_file))
+        messages = []
+        stats = engine.prerender_audio(max_workers=4, on_phase_callback=messages.append)
+        assert stats["rendered"] == 6
+        assert messages[-1] == "Phase 4: 预渲染台词语音 6/6"
+
+        calls = engine.tts.stats.snapshot()["calls"]
+        results = list(engine.run(max_steps=6, prefetch_lines=2))
+        assert len(results) == 6 and all(r.get("audio") for r in results)
+        # 没有弹幕时所有台词都直接使用预渲染音频，表演期间不再调用 TTS，也不再预取
+        assert engine.tts.stats.snapshot()["calls"] == calls
+        assert engine.performer.prerenderer.stats["hits"] == 6
+        assert engine.performer.prefetcher.stats["hits"] == 0
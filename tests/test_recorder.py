@@ -0,0 +1,89 @@
+"""
+流式录制单元测试
+"""
+
+import wave
+
+from echuu.live.audio import parse_wav, pcm_to_wav
+from echuu.live.offline import SyntheticTTS
+from echuu.live.recorder import StreamingRecorder
+
+
+def clip(seconds: float, value: int = 1, sample_rate: int = 1000) -> bytes:
+    return pcm_to_wav(bytes([value, 0]) * int(seconds * sample_rate), sample_rate=sample_rate)
+
+
+class TestStreamingRecorder:
+    """追加写盘与文件头回填"""
+
+    def test_single_valid_wav(self, tmp_path):
+        path = tmp_path / "live.wav"
+        with StreamingRecorder(path) as recorder:
+            recorder.write(clip(0.5, 1))
+            recorder.write(clip(0.25, 2))
+            # 写入过程中文件已经是合法 WAV
+            assert parse_wav(path.read_bytes())[0] == bytes([1, 0]) * 500 + bytes([2, 0]) * 250
+            recorder.write(clip(0.25, 3))
+        assert recorder.paths == [path]
+        with wave.open(str(path)) as f:
+            assert f.getframerate() == 1000
+            assert f.getnframes() == 1000
+            frames = f.readframes(1000)
+        assert frames == bytes([1, 0]) * 500 + bytes([2, 0]) * 250 + bytes([3, 0]) * 250
+        assert recorder.duration == 1.0
+
+    def test_rolling_segments(self, tmp_path):
+        path = tmp_path / "live.wav"
+        recorder = StreamingRecorder(path, segment_seconds=0.4)
+        for _ in range(3):
+            recorder.write(clip(0.3))
+        paths = recorder.close()
+        assert [p.name for p in paths] == ["live.wav", "live_001.wav", "live_002.wav"]
+        lengths = []
+        for p in paths:
+            with wave.open(str(p)) as f:
+                lengths.append(f.getnframes())
+        assert lengths == [400, 400, 100]
+
+    def test_mismatched_format_skipped(self, tmp_path):
+        recorder = StreamingRecorder(tmp_path / "live.wav")
+        recorder.write(clip(0.1, sample_rate=1000))
+        recorder.write(clip(0.1, sample_rate=2000))
+        recorder.write(b"ID3 mp3 bytes")
+        recorder.close()
+        assert recorder.clips == 1 and recorder.skipped == 2
+
+    def test_encoded_passthrough(self, tmp_path):
+        path = tmp_path / "live.mp3"
+        with StreamingRecorder(path) as recorder:
+            recorder.write(b"frame1")
+            recorder.write(b"frame2")
+        assert path.read_bytes() == b"frame1frame2"
+
+
+class TestTTSClientRecording:
+    """TTSClient 录制接口"""
+
+    def test_streaming_recording(self, tmp_path):
+        tts = SyntheticTTS(sample_rate=8000, chars_per_sec=20)
+        path = tmp_path / "out" / "live.wav"
+        tts.start_recording(str(path))
+        tts.synthesize("你好你好你好")
+        tts.synthesize("再见")
+        assert tts._recording_buffer == []
+        tts.save_recording()
+        pcm, sample_rate, _, _ = parse_wav(path.read_bytes())
+        assert sample_rate == 8000
+        assert len(pcm) == 2 * (int(8000 * 6 / 20) + int(8000 * 2 / 20))
+
+    def test_buffered_recording_joins_clips(self, tmp_path):
+        tts = SyntheticTTS(sample_rate=8000, chars_per_sec=20)
+        tts.start_recording()
+        tts.synthesize("你好")
+        tts.synthesize("再见")
+        path = tmp_path / "live.wav"
+        tts.save_recording(str(path))
+        data = path.read_bytes()
+        # 只有一个文件头
+        assert data.count(b"RIFF") == 1
+        assert len(parse_wav(data)[0]) == 2 * 2 * int(8000 * 2 / 20)
@@ -0,0 +1,58 @@
+"""
+共享资源注册表单元测试
+"""
+
+import json
+
+import pytest
+
+from echuu.live.offline import ScriptedLLM, SyntheticTTS
+from echuu.live.resources import clear_resources, get_resources
+
+
+@pytest.fixture
+def project(tmp_path):
+    data = tmp_path / "data"
+    data.mkdir()
+    clips = [
+        {"language": "zh", "catchphrases": ["我跟你们说", "对吧"], "segments": []},
+        {"language": "zh", "catchphrases": ["对吧"], "segments": []},
+        {"language": "en", "catchphrases": ["you know"], "segments": []},
+    ]
+    (data / "annotated_clips.json").write_text(json.dumps(clips, ensure_ascii=False), encoding="utf-8")
+    (data / "vtuber_raw_clips_for_notebook_full_30_cleaned.jsonl").write_text(
+        "\n".join(
+            json.dumps({"language": lang, "title": f"clip{i}", "notes": {}, "transcript": []})
+            for i, lang in enumerate(["zh", "zh", "en"])
+        ),
+        encoding="utf-8",
+    )
+    yield tmp_path
+    clear_resources()
+
+
+class TestSharedResources:
+    """共享资源测试"""
+
+    def test_loaded_once(self, project):
+        first = get_resources(project_root=project)
+        assert get_resources(project_root=project) is first
+        assert len(first.clips) == 3
+        assert first.catchphrases("zh") == ["对吧", "我跟你们说"]
+        assert first.catchphrases("en") == ["you know"]
+        assert len(first.example_sampler.by_language["zh"]) == 2
+
+    def test_engines_share_corpus(self, project):
+        from echuu.live.engine import EchuuLiveEngine
+
+        resources = get_resources(project_root=project)
+        a = EchuuLiveEngine(llm=ScriptedLLM(), tts=SyntheticTTS(), resources=resources)
+        b = EchuuLiveEngine(llm=ScriptedLLM(), tts=SyntheticTTS(), resources=resources)
+        assert a.analyzer is b.analyzer is resources.analyzer
+        assert a.example_sampler is b.example_sampler
+        assert a.performer is not b.performer
+
+    def test_clear(self, project):
+        first = get_resources(project_root=project)
+        clear_resources()
+        assert get_resources(project_root=project) is not first
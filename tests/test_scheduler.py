@@ -0,0 +1,106 @@
+"""
+PlaybackScheduler 单元测试
+"""
+
+import pytest
+
+from echuu.live.audio import pcm_to_wav
+from echuu.live.scheduler import PlaybackScheduler, audio_duration
+from echuu.live.state import Danmaku, DanmakuQueue
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestAudioDuration:
+    """音频时长测试"""
+
+    def test_wav_and_pcm(self):
+        pcm = b"\x00\x00" * 24000
+        assert audio_duration(pcm_to_wav(pcm, sample_rate=24000)) == pytest.approx(1.0)
+        assert audio_duration(pcm, fmt="pcm", sample_rate=16000) == pytest.approx(1.5)
+
+    def test_estimate_from_text(self):
+        assert audio_duration(b"\xff\xfb", fmt="mp3", text="一二三四五", chars_per_sec=5.0) == pytest.approx(1.0)
+        assert audio_duration(None) == 0.0
+
+
+class TestPlaybackScheduler:
+    """播放时间线测试"""
+
+    def test_next_step_starts_before_audio_ends(self):
+        clock = FakeClock()
+        scheduler = PlaybackScheduler(lead=0.5, clock=clock)
+        assert scheduler.schedule(3.0) == pytest.approx(102.5)
+        assert scheduler.delay() == pytest.approx(2.5)
+
+        # 提前生成好下一步：排在上一段后面，不重叠
+        clock.now = 102.5
+        scheduler.schedule(2.0)
+        assert scheduler.playhead_end == pytest.approx(105.0)
+        assert scheduler.delay() == pytest.approx(2.0)
+        assert scheduler.elapsed() == pytest.approx(2.5)
+
+    def test_starvation_restarts_from_now(self):
+        clock = FakeClock()
+        scheduler = PlaybackScheduler(lead=0.0, clock=clock)
+        scheduler.schedule(1.0)
+        clock.now = 104.0
+        scheduler.schedule(1.0)
+        assert scheduler.playhead_end == pytest.approx(105.0)
+        assert scheduler.stats["starved"] == pytest.approx(3.0)
+
+    def test_stream_starts_at_first_audio(self):
+        clock = FakeClock()
+        scheduler = PlaybackScheduler(lead=0.5, clock=clock)
+        # 首个分片在 100.2 送出，整段在 101.0 才合成完：客户端从 100.2 开始播
+        clock.now = 101.0
+        assert scheduler.schedule(3.0, started_at=100.2) == pytest.approx(102.7)
+        assert scheduler.delay() == pytest.approx(1.7)
+
+        # 上一段还没播完：仍排在其后
+        clock.now = 102.7
+        scheduler.schedule(2.0, started_at=102.6)
+        assert scheduler.playhead_end == pytest.approx(105.2)
+
+        # 生成太慢断档：从首个分片的时刻重新开始，断档只计到该时刻
+        clock.now = 107.0
+        scheduler.schedule(1.0, started_at=106.0)
+        assert scheduler.playhead_end == pytest.approx(107.0)
+        assert scheduler.stats["starved"] == pytest.approx(0.8)
+
+    def test_virtual_timeline(self):
+        scheduler = PlaybackScheduler(realtime=False, clock=FakeClock())
+        scheduler.schedule(2.0)
+        scheduler.schedule(1.5)
+        assert scheduler.elapsed() == pytest.approx(3.5)
+        assert scheduler.delay() == 0.0
+
+
+class TestArrivalTime:
+    """弹幕到达时间测试"""
+
+    def test_queue_uses_received_at(self):
+        clock = FakeClock()
+        queue = DanmakuQueue(decay=10.0, clock=clock)
+        old = Danmaku(text="早到的", received_at=90.0)
+        new = Danmaku(text="刚到的")
+        queue.extend([old, new])
+        for dm in (old, new):
+            dm.priority = 0.5
+        queue.admit(lambda dm: dm)
+        assert new.received_at == 100.0
+        assert queue.peek() is new
+        assert queue.effective_priority(old) == pytest.approx(0.5 * 2.718281828 ** -1, rel=1e-3)
+
+    def test_future_timestamp_clamped(self):
+        clock = FakeClock()
+        queue = DanmakuQueue(clock=clock)
+        dm = Danmaku(text="未来", received_at=500.0)
+        queue.append(dm)
+        assert dm.received_at == 100.0
@@ -0,0 +1,133 @@
+"""
+弹幕回应预生成单元测试
+"""
+
+import asyncio
+import json
+import threading
+
+from echuu.live.replay import make_offline_engine
+from echuu.live.speculative import SpeculativeResponder
+from echuu.live.state import Danmaku, PerformerMemory
+
+
+class Line:
+    stage = "Hook"
+    text = "今天说一个很离谱的故事"
+
+
+class SlowGenerator:
+    """等待 release 事件后才返回的回应生成器"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.prompts = []
+
+    def generate_response(self, danmaku, current_line, next_line, memory, name):
+        self.prompts.append(list(memory.story_points["mentioned"]))
+        self.release.wait(5)
+        return {"response": f"回应{danmaku.text}", "action": "continue", "next_content": ""}
+
+
+class NoTTS:
+    enabled = False
+
+
+def make_responder():
+    generator = SlowGenerator()
+    return generator, SpeculativeResponder(generator, NoTTS(), top_k=2)
+
+
+class TestSpeculativeResponder:
+    """取用、异步等待与超时"""
+
+    def test_take_hit(self):
+        generator, responder = make_responder()
+        dm = Danmaku.from_text("真的假的？")
+        generator.release.set()
+        responder.schedule(0, [dm], Line(), None, PerformerMemory(), "六螺")
+        llm_result, audio, boost = responder.take(dm, 0)
+        assert llm_result["response"] == "回应真的假的？" and audio is None
+        assert responder.take(dm, 0) is None
+        assert responder.stats["hits"] == 1 and responder.stats["misses"] == 1
+        responder.shutdown()
+
+    def test_atake_does_not_block_loop(self):
+        generator, responder = make_responder()
+        dm = Danmaku.from_text("主播快说！")
+        responder.schedule(0, [dm], Line(), None, PerformerMemory(), "六螺")
+        ticks = []
+
+        async def ticker():
+            for _ in range(5):
+                ticks.append(1)
+                await asyncio.sleep(0.01)
+            generator.release.set()
+
+        async def main():
+            result, _ = await asyncio.gather(responder.atake(dm, 0), ticker())
+            return result
+
+        result = asyncio.run(main())
+        assert result[0]["response"] == "回应主播快说！"
+        assert len(ticks) == 5
+        responder.shutdown()
+
+    def test_atake_timeout_is_miss(self):
+        generator, responder = make_responder()
+        dm = Danmaku.from_text("这也太离谱了")
+        responder.schedule(0, [dm], Line(), None, PerformerMemory(), "六螺")
+        assert asyncio.run(responder.atake(dm, 0, timeout=0.05)) is None
+        assert responder.stats["misses"] == 1
+        generator.release.set()
+        responder.shutdown()
+
+    def test_worker_sees_snapshot(self):
+        generator, responder = make_responder()
+        memory = PerformerMemory()
+        memory.story_points["mentioned"].append("腰果")
+        dm = Danmaku.from_text("然后呢？")
+        responder.schedule(0, [dm], Line(), None, memory, "六螺")
+        # 表演步继续修改记忆，不影响已提交的预生成任务
+        memory.story_points["mentioned"].append("室友")
+        generator.release.set()
+        assert responder.take(dm, 0) is not None
+        assert generator.prompts == [["腰果"]]
+        responder.shutdown()
+
+
+class TestRequestSpeculation:
+    """表演步执行中到达的弹幕不在事件循环里直接调度预生成"""
+
+    def test_deferred_during_step(self, tmp_path):
+        path = tmp_path / "script.json"
+        script = [{"id": f"line_{i}", "text": f"第{i}句。", "stage": "Build-up"} for i in range(3)]
+        path.write_text(
+            json.dumps({"metadata": {"name": "六螺", "topic": "腰果"}, "script": script}, ensure_ascii=False),
+            encoding="utf-8",
+        )
+        engine = make_offline_engine(speed=1000.0)
+        state = engine.load_script(str(path))
+        performer = engine.performer
+        calls = []
+        performer.schedule_speculation = lambda s: calls.append(s.current_line_idx)
+        requested = []
+
+        def request():
+            requested.append(performer._in_step)
+            performer.request_speculation(state)
+
+        async def run():
+            loop = asyncio.get_running_loop()
+            # 语音合成期间有新弹幕到达：和后端一样在事件循环里请求，而不是在工作线程里
+            await performer.astep(
+                state, None, on_audio_chunk=lambda chunk: loop.call_soon_threadsafe(request)
+            )
+            return list(requested), list(calls)
+
+        during, scheduled = asyncio.run(run())
+        assert during and all(during)
+        # 步内的请求都被推迟，只有该步结束时的一次调度，且针对已推进后的台词
+        assert scheduled == [1]
+        performer.request_speculation(state)
+        assert calls == [1, 1]
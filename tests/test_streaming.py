@@ -0,0 +1,78 @@
+"""
+流式分句与 JSON 字段增量提取单元测试
+"""
+
+import json
+
+from echuu.live.streaming import ClauseSplitter, JSONFieldStreamer, split_clauses
+
+
+def feed_all(streamer, chunks):
+    return "".join(streamer.feed(c) for c in chunks)
+
+
+class TestClauseSplitter:
+    """分句测试"""
+
+    def test_sentence_endings_and_closing_marks(self):
+        assert split_clauses("今天说一个很离谱的故事！真的假的？“太离谱了！”然后呢") == [
+            "今天说一个很离谱的故事！",
+            "真的假的？",
+            "“太离谱了！”",
+            "然后呢",
+        ]
+        # 连续的句末标点留在同一句
+        assert split_clauses("啊？！不会吧……") == ["啊？！", "不会吧……"]
+
+    def test_clause_break_min_chars(self):
+        # 片段不足 min_chars 时逗号不切分
+        assert split_clauses("好，我们开始讲，这个故事发生在去年冬天") == [
+            "好，我们开始讲，",
+            "这个故事发生在去年冬天",
+        ]
+        assert split_clauses("好，我们开始讲，", min_chars=1) == ["好，", "我们开始讲，"]
+
+    def test_english_period_needs_space(self):
+        assert split_clauses("It costs 3.5 dollars. Really?") == ["It costs 3.5 dollars.", "Really?"]
+
+    def test_incremental_feed_and_flush(self):
+        splitter = ClauseSplitter()
+        # 句末标点之后还可能跟着后引号，要等下一个字符才能确认切分
+        assert splitter.feed("你知道吗？") == []
+        assert splitter.feed("我") == ["你知道吗？"]
+        assert splitter.feed("室友") == []
+        assert splitter.flush() == ["我室友"]
+        assert splitter.flush() == []
+
+
+class TestJSONFieldStreamer:
+    """JSON 字段增量提取测试"""
+
+    def test_escapes(self):
+        raw = json.dumps({"action": "continue", "response": '他说："真的\\假的"\n/\t好'}, ensure_ascii=False)
+        streamer = JSONFieldStreamer("response")
+        assert feed_all(streamer, [raw]) == '他说："真的\\假的"\n/\t好'
+        assert streamer.done
+
+    def test_key_split_across_chunks(self):
+        streamer = JSONFieldStreamer("response")
+        chunks = ['{"action": "continue", "resp', 'onse"', ' :  "哈', '哈哈"', ', "next": "x"}']
+        pieces = [streamer.feed(c) for c in chunks]
+        assert pieces == ["", "", "哈", "哈哈", ""]
+        assert streamer.value == "哈哈哈" and streamer.done
+
+    def test_unicode_escape_split_across_chunks(self):
+        raw = json.dumps({"response": "腰果好吃"})  # 非 ASCII 字符转义为 \uXXXX
+        for size in (1, 3, 5):
+            streamer = JSONFieldStreamer("response")
+            chunks = [raw[i : i + size] for i in range(0, len(raw), size)]
+            assert feed_all(streamer, chunks) == "腰果好吃"
+        # 转义反斜杠恰好是分片的最后一个字符
+        streamer = JSONFieldStreamer("response")
+        assert streamer.feed('{"response": "a\\') == "a"
+        assert streamer.feed('u4e2d"}') == "中"
+
+    def test_non_string_value(self):
+        streamer = JSONFieldStreamer("response")
+        assert streamer.feed('{"response": null}') == ""
+        assert streamer.done and streamer.value == ""
@@ -0,0 +1,91 @@
+"""
+二进制音频传输单元测试
+"""
+
+import struct
+
+import pytest
+
+from echuu.live.audio import pcm_to_wav
+from echuu.live.transport import (
+    CODEC_MP3,
+    CODEC_OPUS,
+    CODEC_PCM16,
+    AudioFrame,
+    AudioTransport,
+    OpusStreamEncoder,
+    split_opus_packets,
+)
+
+
+class FakeOpus:
+    """把每帧 PCM 编码为 (帧长, 首字节) 的假 Opus 编码器"""
+
+    def __init__(self):
+        self.frames = []
+
+    def encode(self, pcm, frame_size):
+        self.frames.append(bytes(pcm))
+        return struct.pack("<HB", frame_size, pcm[0])
+
+
+class TestAudioFrame:
+    """帧头打包与解析"""
+
+    def test_round_trip(self):
+        frame = AudioFrame(room="房间1", step=7, seq=42, codec=CODEC_OPUS,
+                           sample_rate=24000, payload=b"xyz", chunk=3, final=False)
+        parsed = AudioFrame.unpack(frame.pack())
+        assert parsed == frame
+        assert parsed.codec_name == "opus"
+
+    def test_rejects_garbage(self):
+        with pytest.raises(ValueError):
+            AudioFrame.unpack(b"RIFF" + b"\0" * 40)
+
+
+class TestOpusStreamEncoder:
+    """20ms 分帧、尾部延续与 final 补齐"""
+
+    def test_remainder_carried_to_next_chunk(self):
+        fake = FakeOpus()
+        enc = OpusStreamEncoder(24000, encoder=fake)
+        frame_bytes = 480 * 2
+        first = enc.encode(b"\1" * (frame_bytes + 100))
+        assert len(split_opus_packets(first)) == 1
+        second = enc.encode(b"\2" * (frame_bytes - 100))
+        assert len(split_opus_packets(second)) == 1
+        # 第二包以上一段剩下的 100 字节开头
+        assert fake.frames[1][:100] == b"\1" * 100
+        assert enc.encode(b"", final=True) == b""
+
+    def test_final_pads_last_frame(self):
+        fake = FakeOpus()
+        enc = OpusStreamEncoder(24000, encoder=fake)
+        packets = split_opus_packets(enc.encode(b"\3" * 10, final=True))
+        assert len(packets) == 1
+        assert len(fake.frames[0]) == 960 and fake.frames[0].endswith(b"\0" * 950)
+
+
+class TestAudioTransport:
+    """编码选择与序号"""
+
+    def test_opus_from_wav(self):
+        transport = AudioTransport("r", encoder_factory=lambda rate: OpusStreamEncoder(rate, encoder=FakeOpus()))
+        wav = pcm_to_wav(b"\5" * 960 * 3, sample_rate=24000)
+        frame = transport.encode(wav, "pcm", 24000, step=1)
+        assert frame.codec == CODEC_OPUS
+        assert len(split_opus_packets(frame.payload)) == 3
+        assert transport.encode(wav, "pcm", 24000, step=2).seq == frame.seq + 1
+
+    def test_pcm16_fallback(self):
+        transport = AudioTransport("r", codec="pcm16")
+        pcm = b"\1\2" * 100
+        frame = transport.encode(pcm_to_wav(pcm, sample_rate=16000), "pcm", 24000)
+        assert frame.codec == CODEC_PCM16
+        assert frame.payload == pcm and frame.sample_rate == 16000
+
+    def test_compressed_passthrough(self):
+        transport = AudioTransport("r", encoder_factory=lambda rate: OpusStreamEncoder(rate, encoder=FakeOpus()))
+        frame = transport.encode(b"ID3mp3data", "mp3", 24000)
+        assert frame.codec == CODEC_MP3 and frame.payload == b"ID3mp3data"
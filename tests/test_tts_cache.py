@@ -0,0 +1,124 @@
+"""
+TTS 磁盘缓存单元测试
+"""
+
+import os
+
+from echuu.live.tts_cache import TTSCache
+from echuu.live.tts_client import TTSClient
+
+
+class FakeBackend:
+    """记录调用次数的 CosyVoiceTTS 替身"""
+
+    model = "fake-realtime"
+    voice = "Cherry"
+    speech_rate = 1.0
+    pitch_rate = 1.0
+    volume = 50
+    sample_rate = 24000
+    response_format = "mp3"
+
+    def __init__(self):
+        self.calls = []
+
+    def _is_realtime_model(self):
+        return True
+
+    def synthesize(self, text):
+        self.calls.append(text)
+        return f"audio:{text}".encode()
+
+    def synthesize_with_callback(self, text, on_audio=None):
+        self.calls.append(text)
+        for ch in text:
+            on_audio(ch.encode())
+
+
+def make_client(tmp_path, monkeypatch):
+    monkeypatch.delenv("DASHSCOPE_API_KEY", raising=False)
+    client = TTSClient()
+    client.tts = FakeBackend()
+    client.enabled = True
+    client.cache = TTSCache(tmp_path / "cache")
+    return client
+
+
+class TestTTSCache:
+    """缓存存取与 LRU 淘汰"""
+
+    def test_key_depends_on_params(self):
+        base = TTSCache.key("好了不说了", model="m", voice="Cherry", speech_rate=1.0)
+        assert base == TTSCache.key("好了不说了", voice="Cherry", model="m", speech_rate=1.0)
+        assert base != TTSCache.key("好了不说了", model="m", voice="Ethan", speech_rate=1.0)
+        assert base != TTSCache.key("好了不说了", model="m", voice="Cherry", speech_rate=1.2)
+        assert base != TTSCache.key("好了不说了。", model="m", voice="Cherry", speech_rate=1.0)
+
+    def test_put_get_and_hit_rate(self, tmp_path):
+        cache = TTSCache(tmp_path)
+        key = TTSCache.key("你好")
+        assert cache.get(key) is None
+        cache.put(key, b"abc")
+        assert cache.get(key) == b"abc"
+        assert (tmp_path / key[:2] / f"{key}.bin").exists()
+        stats = cache.stats()
+        assert stats["hits"] == 1 and stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    def test_lru_eviction(self, tmp_path):
+        cache = TTSCache(tmp_path, max_bytes=10)
+        a, b, c = (TTSCache.key(t) for t in "abc")
+        cache.put(a, b"1234")
+        cache.put(b, b"1234")
+        cache.get(a)  # a 变为最近使用
+        cache.put(c, b"1234")
+        assert a in cache and c in cache and b not in cache
+        assert cache.size == 8 and cache.evictions == 1
+
+    def test_index_survives_restart(self, tmp_path):
+        cache = TTSCache(tmp_path, max_bytes=10)
+        a, b = TTSCache.key("a"), TTSCache.key("b")
+        cache.put(a, b"1234")
+        cache.put(b, b"1234")
+        # a 更早被使用
+        os.utime(cache._path(a), (1, 1))
+        reopened = TTSCache(tmp_path, max_bytes=10)
+        assert len(reopened) == 2 and reopened.size == 8
+        reopened.put(TTSCache.key("c"), b"1234")
+        assert a not in reopened and b in reopened
+
+    def test_missing_file_is_miss(self, tmp_path):
+        cache = TTSCache(tmp_path)
+        key = TTSCache.key("x")
+        cache.put(key, b"data")
+        cache._path(key).unlink()
+        assert cache.get(key) is None
+        assert len(cache) == 0 and cache.size == 0
+
+
+class TestTTSClientCache:
+    """TTSClient 合成前查询缓存"""
+
+    def test_synthesize_uses_cache(self, tmp_path, monkeypatch):
+        client = make_client(tmp_path, monkeypatch)
+        first = client.synthesize("好了不说了")
+        second = client.synthesize("好了不说了")
+        assert first == second == "audio:好了不说了".encode()
+        assert client.tts.calls == ["好了不说了"]
+        assert client.cache_stats()["hits"] == 1
+
+        client.tts.voice = "Ethan"
+        client.synthesize("好了不说了")
+        assert len(client.tts.calls) == 2
+
+    def test_stream_caches_clauses(self, tmp_path, monkeypatch):
+        client = make_client(tmp_path, monkeypatch)
+        text = "今天就先到这里吧，好了不说了，大家晚安。"
+        received = []
+        first = client.synthesize_stream(text, lambda i, c, d: received.append(d))
+        calls = len(client.tts.calls)
+        received.clear()
+        second = client.synthesize_stream(text, lambda i, c, d: received.append(d))
+        assert first == second
+        assert len(client.tts.calls) == calls
+        assert b"".join(received) == second
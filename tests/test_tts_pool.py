@@ -0,0 +1,247 @@
+"""Realtime TTS 会话池：对本地假 websocket 服务端测试连接复用、健康检查与重连。"""
+
+import base64
+import hashlib
+import json
+import socket
+import struct
+import threading
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("dashscope")
+pytest.importorskip("websocket")
+
+from echuu.live.tts_client import load_backend_module  # noqa: E402
+
+ROOT = Path(__file__).resolve().parents[1]
+backend = load_backend_module(ROOT / "workflow" / "backend" / "tts_client.py", "workflow_backend_tts_client")
+
+if not backend.REALTIME_AVAILABLE:
+    pytest.skip("dashscope 不支持 QwenTtsRealtime", allow_module_level=True)
+
+WS_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+class FakeRealtimeServer:
+    """
+    最小的 Qwen TTS Realtime 假服务端（RFC 6455 文本帧）。
+
+    每次 commit 回一个 response：音频为每个字 2 字节的 PCM。
+    """
+
+    def __init__(self):
+        self.sock = socket.socket()
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen()
+        self.url = f"ws://127.0.0.1:{self.sock.getsockname()[1]}/realtime"
+        self.connections = 0
+        self.session_updates = []
+        self.clients = []
+        self._closed = False
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while not self._closed:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            self.connections += 1
+            self.clients.append(conn)
+            threading.Thread(target=self._serve, args=(conn, self.connections), daemon=True).start()
+
+    @staticmethod
+    def _recv_exact(conn, n):
+        data = b""
+        while len(data) < n:
+            chunk = conn.recv(n - len(data))
+            if not chunk:
+                raise ConnectionError
+            data += chunk
+        return data
+
+    def _handshake(self, conn):
+        request = b""
+        while b"\r\n\r\n" not in request:
+            request += conn.recv(1024)
+        key = next(
+            line.split(b":", 1)[1].strip()
+            for line in request.split(b"\r\n")
+            if line.lower().startswith(b"sec-websocket-key")
+        )
+        accept = base64.b64encode(hashlib.sha1(key + WS_GUID).digest())
+        conn.sendall(
+            b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\n"
+            b"Connection: Upgrade\r\nSec-WebSocket-Accept: " + accept + b"\r\n\r\n"
+        )
+
+    def _recv_frame(self, conn):
+        b1, b2 = self._recv_exact(conn, 2)
+        opcode, length = b1 & 0x0F, b2 & 0x7F
+        if length == 126:
+            length = struct.unpack(">H", self._recv_exact(conn, 2))[0]
+        elif length == 127:
+            length = struct.unpack(">Q", self._recv_exact(conn, 8))[0]
+        mask = self._recv_exact(conn, 4) if b2 & 0x80 else b"\0\0\0\0"
+        payload = self._recv_exact(conn, length)
+        return opcode, bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+
+    @staticmethod
+    def _send(conn, event, opcode=0x1):
+        payload = json.dumps(event).encode() if opcode == 0x1 else event
+        header = bytes([0x80 | opcode])
+        if len(payload) < 126:
+            header += bytes([len(payload)])
+        else:
+            header += bytes([126]) + struct.pack(">H", len(payload))
+        conn.sendall(header + payload)
+
+    def _serve(self, conn, conn_id):
+        try:
+            self._handshake(conn)
+            self._send(conn, {"type": "session.created", "session": {"id": f"sess_{conn_id}"}})
+            buffer = ""
+            while True:
+                opcode, payload = self._recv_frame(conn)
+                if opcode == 0x8:
+                    self._send(conn, payload, opcode=0x8)
+                    break
+                if opcode == 0x9:
+                    self._send(conn, payload, opcode=0xA)
+                    continue
+                event = json.loads(payload)
+                kind = event["type"]
+                if kind == "session.update":
+                    self.session_updates.append(event["session"])
+                    self._send(conn, {"type": "session.updated", "session": event["session"]})
+                elif kind == "input_text_buffer.append":
+                    buffer += event["text"]
+                elif kind == "input_text_buffer.commit":
+                    audio = b"\x01\x00" * len(buffer)
+                    buffer = ""
+                    self._send(conn, {"type": "response.created", "response": {"id": "resp"}})
+                    self._send(conn, {"type": "response.audio.delta",
+                                      "delta": base64.b64encode(audio).decode()})
+                    self._send(conn, {"type": "response.done"})
+                elif kind == "session.finish":
+                    self._send(conn, {"type": "session.finished"})
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            conn.close()
+
+    def drop_all(self):
+        """模拟服务端断开所有连接。"""
+        for conn in self.clients:
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def close(self):
+        self._closed = True
+        self.drop_all()
+        self.sock.close()
+
+
+@pytest.fixture
+def server():
+    srv = FakeRealtimeServer()
+    yield srv
+    srv.close()
+
+
+def make_tts(server, monkeypatch, pool):
+    monkeypatch.setenv("TTS_WS_URL", server.url)
+    monkeypatch.setenv("TTS_RESPONSE_FORMAT", "pcm")
+    return backend.CosyVoiceTTS(api_key="test-key", model="qwen3-tts-flash-realtime", pool=pool)
+
+
+def pcm_len(wav: bytes) -> int:
+    return len(wav) - 44
+
+
+class TestRealtimeSessionPool:
+    """连接复用与故障恢复"""
+
+    def test_reuses_connection_across_utterances(self, server, monkeypatch):
+        pool = backend.RealtimeSessionPool()
+        tts = make_tts(server, monkeypatch, pool)
+        try:
+            for text in ["你好", "今天天气不错", "再见"]:
+                assert pcm_len(tts.synthesize(text)) == 2 * len(text)
+            assert server.connections == 1
+            assert len(server.session_updates) == 1
+            assert server.session_updates[0]["mode"] == "commit"
+            assert pool.stats["created"] == 1 and pool.stats["reused"] == 2
+        finally:
+            pool.close_all()
+
+    def test_separate_sessions_per_voice(self, server, monkeypatch):
+        pool = backend.RealtimeSessionPool()
+        tts = make_tts(server, monkeypatch, pool)
+        try:
+            tts.synthesize("一")
+            tts.voice = "Ethan"
+            tts.synthesize("二")
+            tts.voice = "Cherry"
+            tts.synthesize("三")
+            assert server.connections == 2
+            assert [u["voice"] for u in server.session_updates] == ["Cherry", "Ethan"]
+        finally:
+            pool.close_all()
+
+    def test_warmup_preconnects(self, server, monkeypatch):
+        pool = backend.RealtimeSessionPool()
+        tts = make_tts(server, monkeypatch, pool)
+        try:
+            tts.warmup()
+            assert pool.idle_count() == 1 and server.connections == 1
+            tts.synthesize("你好")
+            assert server.connections == 1
+        finally:
+            pool.close_all()
+
+    def test_reconnects_after_server_drop(self, server, monkeypatch):
+        pool = backend.RealtimeSessionPool()
+        tts = make_tts(server, monkeypatch, pool)
+        try:
+            tts.synthesize("第一句")
+            server.drop_all()
+            assert pcm_len(tts.synthesize("第二句")) == 6
+            assert server.connections == 2
+        finally:
+            pool.close_all()
+
+    def test_idle_timeout_expires_session(self, server, monkeypatch):
+        now = [0.0]
+        pool = backend.RealtimeSessionPool(idle_timeout=30.0, clock=lambda: now[0])
+        tts = make_tts(server, monkeypatch, pool)
+        monkeypatch.setattr(
+            tts, "_open_session",
+            lambda: backend.RealtimeSession(tts.model, tts.ws_url,
+                                            tts._realtime_session_kwargs(), clock=lambda: now[0]),
+        )
+        try:
+            tts.synthesize("你好")
+            now[0] = 10.0
+            tts.synthesize("你好")
+            assert server.connections == 1
+            now[0] = 100.0
+            tts.synthesize("你好")
+            assert server.connections == 2
+            assert pool.stats["expired"] == 1
+        finally:
+            pool.close_all()
+
+    def test_pool_disabled_uses_oneshot(self, server, monkeypatch):
+        monkeypatch.setenv("TTS_POOL_SIZE", "0")
+        tts = make_tts(server, monkeypatch, None)
+        assert tts.pool is None
+        tts.mode = "commit"
+        assert pcm_len(tts.synthesize("你好")) == 4
+        assert pcm_len(tts.synthesize("你好")) == 4
+        assert server.connections == 2
@@ -0,0 +1,83 @@
+"""
+TTS 预取单元测试
+"""
+
+import threading
+
+from echuu.live.tts_prefetch import TTSPrefetcher
+
+
+def audio(text):
+    return f"audio:{text}".encode()
+
+
+class GatedTTS:
+    """等待 release 事件后才返回的 TTS"""
+
+    enabled = True
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.calls = []
+
+    def synthesize(self, text, emotion_boost=0.0, record=True):
+        self.calls.append(text)
+        self.release.wait(5)
+        return audio(text)
+
+
+class TestTTSPrefetcher:
+    """命中、文本不一致、跳行取消与线程池关闭"""
+
+    def test_hit(self):
+        tts = GatedTTS()
+        tts.release.set()
+        prefetcher = TTSPrefetcher(tts, lookahead=2)
+        prefetcher.schedule(0, [(0, "第一句", 0.0), (1, "第二句", 0.0), (2, "第三句", 0.0)])
+        assert prefetcher.take(1, "第二句") == (True, audio("第二句"))
+        assert prefetcher.take(1, "第二句") == (False, None)
+        # 只预取 lookahead 行
+        assert prefetcher.take(2, "第三句") == (False, None)
+        assert sorted(tts.calls) == ["第一句", "第二句"]
+        assert prefetcher.stats["hits"] == 1 and prefetcher.stats["misses"] == 2
+        prefetcher.shutdown()
+
+    def test_text_mismatch_discarded(self):
+        tts = GatedTTS()
+        tts.release.set()
+        prefetcher = TTSPrefetcher(tts, lookahead=1)
+        prefetcher.schedule(0, [(0, "原台词", 0.0)])
+        # 台词被弹幕回应改写，预取结果不能用
+        assert prefetcher.take(0, "被改写的台词") == (False, None)
+        assert prefetcher.stats["cancelled"] == 1 and prefetcher.stats["hits"] == 0
+        prefetcher.shutdown()
+
+    def test_cancel_on_skip(self):
+        tts = GatedTTS()
+        prefetcher = TTSPrefetcher(tts, lookahead=2, max_workers=1)
+        prefetcher.schedule(0, [(0, "第一句", 0.0), (1, "第二句", 0.0)])
+        # 跳到第 3 行：更早的预取全部作废，排队中的任务不再执行
+        prefetcher.schedule(3, [(3, "第四句", 0.0)])
+        assert prefetcher.stats["cancelled"] == 2
+        tts.release.set()
+        assert prefetcher.take(1, "第二句") == (False, None)
+        assert prefetcher.take(3, "第四句") == (True, audio("第四句"))
+        assert "第二句" not in tts.calls
+        prefetcher.cancel(3)  # 已取出，无操作
+        assert prefetcher.stats["cancelled"] == 2
+        prefetcher.shutdown()
+
+    def test_shutdown(self):
+        tts = GatedTTS()
+        prefetcher = TTSPrefetcher(tts, lookahead=2, max_workers=1)
+        prefetcher.schedule(0, [(0, "第一句", 0.0), (1, "第二句", 0.0)])
+        executor = prefetcher._executor
+        prefetcher.shutdown()
+        tts.release.set()
+        assert prefetcher._executor is None and executor._shutdown
+        assert prefetcher.take(0, "第一句") == (False, None)
+        assert "第二句" not in tts.calls
+        # 关闭后再次预取会新建线程池
+        prefetcher.schedule(0, [(0, "第一句", 0.0)])
+        assert prefetcher.take(0, "第一句") == (True, audio("第一句"))
+        prefetcher.shutdown()
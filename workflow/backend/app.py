@@ -4,13 +4,13 @@ import json
 import base64
 import asyncio
 import traceback
+import time
 import uuid
 import secrets
 from typing import List, Optional, Dict
 from datetime import datetime
 from fastapi import FastAPI, HTTPException, BackgroundTasks, WebSocket, WebSocketDisconnect, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 from pathlib import Path
 
@@ -19,9 +19,18 @@ PROJECT_ROOT = Path(__file__).resolve().parents[2]
 sys.path.insert(0, str(PROJECT_ROOT))
 
 from echuu.live.engine import EchuuLiveEngine
+from echuu.live.resources import get_resources
+from echuu.live.transport import AudioTransport
+from echuu.live.audio_store import AudioStore, audio_static_files
 
 app = FastAPI(title="ECHUU Agent Control Panel")
 
+
+@app.on_event("startup")
+async def preload_resources():
+    """启动时加载共享语料，之后每个直播间构造引擎都不再读文件。"""
+    await asyncio.to_thread(get_resources)
+
 # 允许跨域
 app.add_middleware(
     CORSMiddleware,
@@ -34,7 +43,8 @@ app.add_middleware(
 # 挂载静态文件目录
 SCRIPTS_DIR = PROJECT_ROOT / "output" / "scripts"
 SCRIPTS_DIR.mkdir(parents=True, exist_ok=True)
-app.mount("/audio", StaticFiles(directory=str(SCRIPTS_DIR)), name="audio")
+app.mount("/audio", audio_static_files(SCRIPTS_DIR), name="audio")
+AUDIO_STORE = AudioStore(SCRIPTS_DIR)
 
 # 数据模型
 class LiveRequest(BaseModel):
@@ -45,6 +55,10 @@ class LiveRequest(BaseModel):
     danmaku: List[str] = ["主播快说！", "真的假的？", "这也太离谱了"]
     voice: str = "Cherry"  # TTS 音色，与前端侧栏「声音」一致
     language: str = ""  # 留空则从 topic/persona 检测；"en"/"zh"/"ja" 则强制该语言
+    stream_audio: bool = False  # True 时按分句推送 audio_chunk，不再在 step 里附带整段音频
+    prerender_workers: int = 0  # >0 时开播前用这么多线程预渲染全部台词语音
+    audio_mode: str = ""  # "inline" 推送音频 / "ref" 只广播 audio_url；留空用 AUDIO_BROADCAST_MODE
+    speculate_danmaku: Optional[int] = None  # 弹幕回应预生成候选数；留空用 SPECULATE_DANMAKU（默认 0 关闭）
 
 class DanmakuRequest(BaseModel):
     text: str
@@ -65,41 +79,172 @@ class RoomState:
         self.error_message = ""
         self.active_connections: List[WebSocket] = []
         self.connection_ids: dict = {}  # WebSocket -> viewer_id (用于 cursor 广播)
+        self.binary_connections: set = set()  # 以二进制帧接收音频的连接（/ws?audio=binary）
+        self.transport = AudioTransport(room_id, codec=os.getenv("AUDIO_TRANSPORT_CODEC", "opus"))
+        self.audio_mode = "inline"  # 本场直播的音频广播方式（见 LiveRequest.audio_mode）
+        self.session_id = ""  # 引用模式下音频写入 output/scripts/<session_id>/
         self.live_danmaku: List[dict] = []
+        self.memory = None  # 当前表演的 PerformerMemory
+        self.memory_version = 0  # 已广播给客户端的记忆版本
+
+    async def broadcast_memory(self):
+        """广播记忆变化：只发自上次广播以来的增量（memory_patch）。"""
+        memory = self.memory
+        if memory is None:
+            return
+        base = self.memory_version
+        ops = memory.diff_since(base)
+        if not ops:
+            return
+        self.memory_version = memory.version
+        await self.broadcast({
+            "type": "memory_patch",
+            "base": base,
+            "version": memory.version,
+            "ops": ops,
+        })
+
+    def _drop_connections(self, dead: List[WebSocket]):
+        for c in dead:
+            if c in self.active_connections:
+                self.active_connections.remove(c)
+            self.connection_ids.pop(c, None)
+            self.binary_connections.discard(c)
 
     async def broadcast(self, data: dict):
-        clean_data = json.loads(json.dumps(data, default=str))
+        # 只序列化一次，所有连接共用同一份文本
+        text = json.dumps(data, default=str)
         dead = []
         for connection in self.active_connections:
             try:
-                await connection.send_json(clean_data)
+                await connection.send_text(text)
             except Exception:
                 dead.append(connection)
-        for c in dead:
-            if c in self.active_connections:
-                self.active_connections.remove(c)
-            self.connection_ids.pop(c, None)
+        self._drop_connections(dead)
 
     async def broadcast_to_others(self, exclude: WebSocket, data: dict):
         """向房间内除 exclude 外的所有连接广播（用于 cursor，避免发给自己）。"""
-        clean_data = json.loads(json.dumps(data, default=str))
+        text = json.dumps(data, default=str)
         dead = []
         for connection in self.active_connections:
             if connection is exclude:
                 continue
             try:
-                await connection.send_json(clean_data)
+                await connection.send_text(text)
             except Exception:
                 dead.append(connection)
-        for c in dead:
-            if c in self.active_connections:
-                self.active_connections.remove(c)
-            self.connection_ids.pop(c, None)
+        self._drop_connections(dead)
+
+    async def broadcast_audio(
+        self,
+        data: dict,
+        audio: Optional[bytes],
+        fmt: str = "pcm",
+        sample_rate: int = 24000,
+        step: int = 0,
+        chunk: int = 0,
+        final: bool = True,
+    ):
+        """
+        广播带音频的消息（step / audio_chunk）。
+
+        - 二进制连接：JSON 消息（audio_seq / audio_codec 指向音频帧）+ 一个二进制音频帧，
+          音频在房间内只编码一次（默认 Opus，见 echuu.live.transport）
+        - 其他连接：沿用 audio_b64 内嵌在 JSON 中的旧格式，base64 也只做一次
+        """
+        binary = [c for c in self.active_connections if c in self.binary_connections]
+        legacy = [c for c in self.active_connections if c not in self.binary_connections]
+        dead = []
+
+        if legacy:
+            text = json.dumps(
+                {**data, "audio_b64": base64.b64encode(audio).decode("ascii") if audio else None},
+                default=str,
+            )
+            for connection in legacy:
+                try:
+                    await connection.send_text(text)
+                except Exception:
+                    dead.append(connection)
+
+        if binary:
+            frame = None
+            if audio or final:
+                # final 时即使没有数据也要编码：Opus 编码器在此补齐并送出最后一帧
+                frame = await asyncio.to_thread(
+                    self.transport.encode, audio or b"", fmt, sample_rate, step, chunk, final
+                )
+            meta = {**data, "audio_b64": None}
+            if frame is not None:
+                meta.update({"audio_seq": frame.seq, "audio_codec": frame.codec_name})
+            text = json.dumps(meta, default=str)
+            packed = frame.pack() if frame is not None else None
+            for connection in binary:
+                try:
+                    await connection.send_text(text)
+                    if packed is not None:
+                        await connection.send_bytes(packed)
+                except Exception:
+                    dead.append(connection)
+
+        self._drop_connections(dead)
 
     async def broadcast_user_count(self):
         await self.broadcast({"type": "user_count", "count": len(self.active_connections)})
 
 
+class AudioChunkRelay:
+    """
+    把引擎工作线程中产生的音频分片按到达顺序转发给房间内所有连接。
+
+    每个分片广播为一条 audio_chunk 消息：seq 为本场直播内全局递增序号，
+    chunk 为该步内的分片序号，final=True 表示该步音频结束。
+    """
+
+    def __init__(self, room: "RoomState"):
+        self.room = room
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.seq = 0
+        self.task = asyncio.create_task(self._run())
+
+    def on_audio_chunk(self, chunk: dict):
+        """引擎回调（可能在工作线程中）。"""
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, chunk)
+
+    async def _run(self):
+        while True:
+            chunk = await self.queue.get()
+            if chunk is None:
+                break
+            data = chunk.get("data") or b""
+            await self.room.broadcast_audio(
+                {
+                    "type": "audio_chunk",
+                    "seq": self.seq,
+                    "step": chunk.get("step"),
+                    "chunk": chunk.get("seq"),
+                    "clause": chunk.get("clause"),
+                    "text": chunk.get("text", ""),
+                    "format": chunk.get("format"),
+                    "sample_rate": chunk.get("sample_rate"),
+                    "final": chunk.get("final", False),
+                    "visemes": chunk.get("visemes"),
+                },
+                data,
+                fmt=chunk.get("format") or "pcm",
+                sample_rate=chunk.get("sample_rate") or 24000,
+                step=chunk.get("step") or 0,
+                chunk=chunk.get("seq") or 0,
+                final=chunk.get("final", False),
+            )
+            self.seq += 1
+
+    async def close(self):
+        self.queue.put_nowait(None)
+        await self.task
+
+
 # 所有直播间：room_id -> RoomState
 rooms: Dict[str, RoomState] = {}
 LOBBY_ROOM_ID = "lobby"
@@ -128,6 +273,7 @@ async def create_room():
 async def websocket_endpoint(
     websocket: WebSocket,
     room_id: Optional[str] = Query(None),
+    audio: Optional[str] = Query(None),
 ):
     if not room_id:
         await websocket.close(code=4000)
@@ -140,7 +286,18 @@ async def websocket_endpoint(
     room.active_connections.append(websocket)
     viewer_id = f"v_{id(websocket)}"
     room.connection_ids[websocket] = viewer_id
-    await websocket.send_json({"type": "system", "message": "Connected", "room_id": room_id})
+    if audio == "binary":
+        room.binary_connections.add(websocket)
+    await websocket.send_json({
+        "type": "system",
+        "message": "Connected",
+        "room_id": room_id,
+        "audio_transport": "binary" if audio == "binary" else "json",
+    })
+    if room.memory is not None:
+        # 中途加入的观众先拿一份完整快照，之后跟随 memory_patch 增量
+        snapshot = room.memory.to_dict()
+        await websocket.send_text(json.dumps({"type": "memory", "memory": snapshot}, default=str))
     await room.broadcast_user_count()
     try:
         while True:
@@ -152,6 +309,7 @@ async def websocket_endpoint(
                         "text": msg.get("text", ""),
                         "user": msg.get("user", "观众"),
                         "timestamp": datetime.now().isoformat(),
+                        "received_at": time.monotonic(),
                     })
                     await room.broadcast({
                         "type": "danmaku",
@@ -170,9 +328,7 @@ async def websocket_endpoint(
             except json.JSONDecodeError:
                 pass
     except WebSocketDisconnect:
-        if websocket in room.active_connections:
-            room.active_connections.remove(websocket)
-        room.connection_ids.pop(websocket, None)
+        room._drop_connections([websocket])
         await room.broadcast_user_count()
 
 
@@ -220,6 +376,7 @@ async def post_danmaku(req: DanmakuRequestWithRoom):
         "text": req.text,
         "user": req.user,
         "timestamp": datetime.now().isoformat(),
+        "received_at": time.monotonic(),
     })
     await room.broadcast({"type": "danmaku", "text": req.text, "user": req.user})
     return {"ok": True}
@@ -273,6 +430,13 @@ async def run_engine_task(room: RoomState, req: StartLiveRequest):
     room.is_running = True
     room.current_step = 0
     room.current_stage = "initializing"
+    room.audio_mode = (req.audio_mode or os.getenv("AUDIO_BROADCAST_MODE", "inline")).strip().lower()
+    speculate_danmaku = (
+        req.speculate_danmaku
+        if req.speculate_danmaku is not None
+        else int(os.getenv("SPECULATE_DANMAKU", "0"))
+    )
+    room.session_id = f"{room.room_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
     try:
         voice = getattr(req, "voice", None) or "Cherry"
         os.environ["TTS_VOICE"] = voice
@@ -282,7 +446,8 @@ async def run_engine_task(room: RoomState, req: StartLiveRequest):
         room.info_message = "正在初始化直播引擎..."
         await room.broadcast({"type": "info", "content": room.info_message})
 
-        engine = EchuuLiveEngine()
+        # 引擎构造会读取语料文件，放到线程池避免阻塞其他直播间
+        engine = await asyncio.to_thread(EchuuLiveEngine)
 
         # 语言：请求里指定 > 从 topic/persona 检测，否则默认 zh
         from echuu.live.language import detect_language
@@ -304,7 +469,7 @@ async def run_engine_task(room: RoomState, req: StartLiveRequest):
         room.current_stage = "generating_script"
         room.stream_state = "generating_script"
 
-        state = engine.setup(
+        state = await engine.asetup(
             name=req.character_name,
             persona=req.persona,
             background=req.background,
@@ -313,6 +478,10 @@ async def run_engine_task(room: RoomState, req: StartLiveRequest):
         )
 
         room.total_steps = len(state.script_lines)
+        room.memory = state.memory
+        snapshot = state.memory.to_dict()
+        room.memory_version = snapshot["version"]
+        await room.broadcast({"type": "memory", "memory": snapshot})
 
         await room.broadcast({
             "type": "script_ready",
@@ -321,6 +490,20 @@ async def run_engine_task(room: RoomState, req: StartLiveRequest):
             "script_preview": [line.text[:50] for line in state.script_lines[:3]]
         })
 
+        if req.prerender_workers > 0:
+            room.current_stage = "prerendering"
+            loop = asyncio.get_running_loop()
+
+            def on_prerender(msg: str):
+                """预渲染进度（在工作线程中调用）"""
+                asyncio.run_coroutine_threadsafe(
+                    room.broadcast({"type": "info", "content": msg}), loop
+                )
+
+            await engine.aprerender_audio(
+                max_workers=req.prerender_workers, on_phase_callback=on_prerender
+            )
+
         room.info_message = "开始表演..."
         await room.broadcast({"type": "info", "content": room.info_message})
         room.current_stage = "performing"
@@ -334,58 +517,31 @@ async def run_engine_task(room: RoomState, req: StartLiveRequest):
             """每步取出并清空当前房间的实时弹幕，注入引擎供 AI 回应。"""
             items = room.live_danmaku.copy()
             room.live_danmaku.clear()
-            return [{"text": x.get("text", ""), "user": x.get("user", "观众")} for x in items]
-
-        for step_result in engine.run(
-            danmaku_sim=simulated_danmaku,
-            play_audio=False,
-            save_audio=True,
-            live_danmaku_getter=live_danmaku_getter,
-        ):
-            step_num = step_result.get("step", 0)
-            room.current_step = step_num
-            room.current_stage = step_result.get("stage", "")
-
-            audio_data = step_result.get("audio")
-            audio_b64 = None
-            if audio_data and isinstance(audio_data, bytes):
-                audio_b64 = base64.b64encode(audio_data).decode("ascii")
-            elif step_result.get("speech") and not audio_data:
-                print(f"[warn] Step {step_num} has speech but no audio (TTS may have failed)")
-
-            cue = step_result.get("cue")
-            cue_dict = None
-            if cue is not None:
-                if hasattr(cue, "to_dict"):
-                    cue_dict = cue.to_dict()
-                elif isinstance(cue, dict):
-                    cue_dict = cue
-
-            broadcast_data = {
-                "type": "step",
-                "step": step_num,
-                "stage": step_result.get("stage", ""),
-                "speech": step_result.get("speech", ""),
-                "action": step_result.get("action", "continue"),
-                "cue": cue_dict,
-                "audio_b64": audio_b64,
-                "danmaku": step_result.get("danmaku"),
-                "emotion_break": step_result.get("emotion_break"),
-            }
-
-            await room.broadcast(broadcast_data)
-            try:
-                if engine.state and hasattr(engine.state, "memory") and hasattr(engine.state.memory, "to_dict"):
-                    await room.broadcast({"type": "memory", "memory": engine.state.memory.to_dict()})
-            except Exception as e:
-                print(f"[memory] broadcast error: {e}")
-            await asyncio.sleep(0.1)
+            return [
+                {"text": x.get("text", ""), "user": x.get("user", "观众"), "received_at": x.get("received_at")}
+                for x in items
+            ]
+
+        relay = AudioChunkRelay(room) if req.stream_audio else None
+        try:
+            async for step_result in engine.arun(
+                danmaku_sim=simulated_danmaku,
+                play_audio=False,
+                save_audio=True,
+                live_danmaku_getter=live_danmaku_getter,
+                on_audio_chunk=relay.on_audio_chunk if relay else None,
+                speculate_danmaku=speculate_danmaku,
+                realtime=True,
+            ):
+                await broadcast_step(room, engine, step_result)
+        finally:
+            if relay:
+                await relay.close()
 
         room.current_stage = "finished"
         room.stream_state = "finished"
         try:
-            if engine.state and hasattr(engine.state, "memory") and hasattr(engine.state.memory, "to_dict"):
-                await room.broadcast({"type": "memory", "memory": engine.state.memory.to_dict()})
+            await room.broadcast_memory()
         except Exception as e:
             print(f"[memory] final broadcast error: {e}")
         await room.broadcast({"type": "success", "content": "直播表演圆满结束！"})
@@ -402,6 +558,60 @@ async def run_engine_task(room: RoomState, req: StartLiveRequest):
         if room.stream_state not in ["finished", "error"]:
             room.stream_state = "idle"
 
+
+async def broadcast_step(room: RoomState, engine: EchuuLiveEngine, step_result: dict):
+    """广播单步表演结果（流式模式下音频已通过 audio_chunk 下发，不再重复附带）。"""
+    step_num = step_result.get("step", 0)
+    room.current_step = step_num
+    room.current_stage = step_result.get("stage", "")
+
+    audio_data = step_result.get("audio")
+    if step_result.get("streamed") or not isinstance(audio_data, bytes):
+        audio_data = None
+    if step_result.get("speech") and not step_result.get("audio"):
+        print(f"[warn] Step {step_num} has speech but no audio (TTS may have failed)")
+
+    cue = step_result.get("cue")
+    cue_dict = None
+    if cue is not None:
+        if hasattr(cue, "to_dict"):
+            cue_dict = cue.to_dict()
+        elif isinstance(cue, dict):
+            cue_dict = cue
+
+    broadcast_data = {
+        "type": "step",
+        "step": step_num,
+        "stage": step_result.get("stage", ""),
+        "speech": step_result.get("speech", ""),
+        "action": step_result.get("action", "continue"),
+        "cue": cue_dict,
+        "streamed": bool(step_result.get("streamed")),
+        "danmaku": step_result.get("danmaku"),
+        "emotion_break": step_result.get("emotion_break"),
+    }
+
+    if audio_data and room.audio_mode == "ref":
+        # 引用模式：音频只写一次盘，广播 URL 与哈希，由观众经 /audio 拉取（可被 HTTP 缓存）
+        ref = await asyncio.to_thread(
+            AUDIO_STORE.put, room.session_id, audio_data, engine.tts.stream_format
+        )
+        await room.broadcast({**broadcast_data, "audio_b64": None, **ref.to_dict()})
+    elif audio_data:
+        await room.broadcast_audio(
+            broadcast_data,
+            audio_data,
+            fmt=engine.tts.stream_format,
+            sample_rate=engine.tts.sample_rate,
+            step=step_num,
+        )
+    else:
+        await room.broadcast({**broadcast_data, "audio_b64": None})
+    try:
+        await room.broadcast_memory()
+    except Exception as e:
+        print(f"[memory] broadcast error: {e}")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -5,11 +5,13 @@
 
 import base64
 import io
+import json
 import os
 import struct
 import threading
+import time
 from datetime import datetime
-from typing import Callable, List, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 
 # 尝试导入 dashscope
 try:
@@ -145,11 +147,17 @@ class QwenRealtimeCallback(QwenTtsRealtimeCallback):
             else:
                 self.file = open(save_path, "wb")
         self.complete_event = threading.Event()
+        self.error = None
+        self._finalized = False
 
     def on_open(self) -> None:
         print("[TTS] Realtime 连接建立")
 
-    def on_close(self, close_status_code, close_msg) -> None:
+    def finalize(self) -> None:
+        """一次合成结束：保存文件（复用连接时连接不会关闭，由调用方直接调用）"""
+        if self._finalized:
+            return
+        self._finalized = True
         # 如果是PCM格式，需要转换为WAV再保存
         if self.save_path and self.response_format == "pcm" and self.audio_buffer.tell() > 0:
             pcm_data = self.audio_buffer.getvalue()
@@ -159,6 +167,9 @@ class QwenRealtimeCallback(QwenTtsRealtimeCallback):
             print(f"[TTS] PCM已转换为WAV并保存: {self.save_path} ({len(wav_data)} bytes)")
         elif self.file:
             self.file.close()
+
+    def on_close(self, close_status_code, close_msg) -> None:
+        self.finalize()
         print(f"[TTS] Realtime 连接关闭: {close_status_code}, {close_msg}")
 
     def on_event(self, response) -> None:
@@ -190,6 +201,7 @@ class QwenRealtimeCallback(QwenTtsRealtimeCallback):
             
             if event_type == "error":
                 print(f"[TTS] 收到错误事件: {response}")
+                self.error = response
                 self.complete_event.set()
                 
         except Exception as exc:
@@ -202,6 +214,199 @@ class QwenRealtimeCallback(QwenTtsRealtimeCallback):
         return self.audio_buffer.getvalue()
 
 
+class _SessionRouter(QwenTtsRealtimeCallback):
+    """
+    长连接会话的回调：连接上的事件转发给当前这次合成的 QwenRealtimeCallback，
+    同时记录连接是否已关闭 / 出错，供连接池做健康检查。
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.target: Optional[QwenRealtimeCallback] = None
+        self.closed = False
+        self.error = None
+
+    def on_open(self) -> None:
+        print("[TTS] Realtime 长连接建立")
+
+    def on_close(self, close_status_code, close_msg) -> None:
+        self.closed = True
+        target = self.target
+        if target:
+            # 合成中途断线：立即唤醒等待方，由调用方决定是否重连重试
+            target.complete_event.set()
+        print(f"[TTS] Realtime 长连接关闭: {close_status_code}, {close_msg}")
+
+    def on_event(self, response) -> None:
+        if isinstance(response, str):
+            try:
+                response = json.loads(response)
+            except ValueError:
+                return
+        if response.get("type") == "error":
+            self.error = response
+        target = self.target
+        if target:
+            target.on_event(response)
+
+
+class RealtimeSession:
+    """
+    一条已连接并完成 session.update 的 Qwen Realtime 会话，可连续合成多段文本。
+
+    每段文本用 append_text + commit 触发一次 response，收到 response.done 即完成，
+    不发送 session.finish（那会让服务端关闭连接）。因此会话固定使用 commit 模式。
+    """
+
+    def __init__(self, model: str, url: str, session_kwargs: dict, clock: Callable[[], float] = time.monotonic):
+        self.router = _SessionRouter()
+        self.client = QwenTtsRealtime(model=model, callback=self.router, url=url)
+        self.session_kwargs = dict(session_kwargs, mode="commit")
+        self.clock = clock
+        self.created_at = clock()
+        self.last_used = self.created_at
+        self.uses = 0
+
+    def connect(self) -> "RealtimeSession":
+        self.client.connect()
+        self.client.update_session(**self.session_kwargs)
+        return self
+
+    @property
+    def connected(self) -> bool:
+        ws = getattr(self.client, "ws", None)
+        sock = getattr(ws, "sock", None) if ws else None
+        return bool(sock and sock.connected) and not self.router.closed
+
+    def is_healthy(self, idle_timeout: Optional[float] = None) -> bool:
+        """连接仍在、没有收到过错误事件、且空闲时间未超过 idle_timeout。"""
+        if not self.connected or self.router.error is not None:
+            return False
+        if idle_timeout is not None and self.clock() - self.last_used > idle_timeout:
+            return False
+        return True
+
+    def synthesize(self, text: str, callback: QwenRealtimeCallback, timeout: Optional[float]) -> bool:
+        """在这条连接上合成一段文本；返回是否在超时前完成。"""
+        self.router.target = callback
+        try:
+            self.client.append_text(text)
+            self.client.commit()
+            return callback.wait_for_complete(timeout)
+        finally:
+            self.router.target = None
+            self.uses += 1
+            self.last_used = self.clock()
+
+    def close(self):
+        try:
+            self.client.close()
+        except Exception:
+            pass
+
+
+class RealtimeSessionPool:
+    """
+    Qwen Realtime 会话池：按会话参数（模型、音色、音频格式等）缓存已预热的连接，
+    每段台词直接复用，省去 websocket 握手和 session.update。
+
+    - acquire 时做健康检查：已断开、收到过错误或空闲超过 idle_timeout 的连接直接关闭，
+      不会交给调用方（服务端会主动断开长时间空闲的连接）
+    - 调用方合成失败（超时、错误事件、断线）时 discard，不放回池中
+    - 每组参数最多保留 max_idle 条空闲连接，超出的归还时关闭
+    """
+
+    def __init__(self, max_idle: int = 2, idle_timeout: Optional[float] = 60.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_idle = max_idle
+        self.idle_timeout = idle_timeout
+        self.clock = clock
+        self._idle: Dict[Tuple, List[RealtimeSession]] = {}
+        self._lock = threading.Lock()
+        self.stats = {"created": 0, "reused": 0, "discarded": 0, "expired": 0}
+
+    def acquire(self, key: Tuple, factory: Callable[[], RealtimeSession]) -> RealtimeSession:
+        """取一条健康的空闲连接，没有时用 factory 新建并连接。"""
+        stale = []
+        session = None
+        with self._lock:
+            idle = self._idle.get(key, [])
+            while idle:
+                candidate = idle.pop()
+                if candidate.is_healthy(self.idle_timeout):
+                    session = candidate
+                    self.stats["reused"] += 1
+                    break
+                stale.append(candidate)
+            self.stats["expired"] += len(stale)
+        for candidate in stale:
+            candidate.close()
+        if session is not None:
+            return session
+
+        session = factory()
+        try:
+            session.connect()
+        except Exception:
+            session.close()
+            raise
+        with self._lock:
+            self.stats["created"] += 1
+        return session
+
+    def release(self, key: Tuple, session: RealtimeSession):
+        """合成成功后归还连接。"""
+        if session.is_healthy():
+            with self._lock:
+                idle = self._idle.setdefault(key, [])
+                if len(idle) < self.max_idle:
+                    idle.append(session)
+                    return
+        session.close()
+
+    def discard(self, session: RealtimeSession):
+        """关闭出错的连接。"""
+        with self._lock:
+            self.stats["discarded"] += 1
+        session.close()
+
+    def warmup(self, key: Tuple, factory: Callable[[], RealtimeSession], count: int = 1):
+        """预先建立 count 条连接放入池中。"""
+        with self._lock:
+            missing = min(count, self.max_idle) - len(self._idle.get(key, []))
+        for _ in range(max(0, missing)):
+            self.release(key, self.acquire(key, factory))
+
+    def idle_count(self, key: Optional[Tuple] = None) -> int:
+        with self._lock:
+            if key is not None:
+                return len(self._idle.get(key, []))
+            return sum(len(v) for v in self._idle.values())
+
+    def close_all(self):
+        with self._lock:
+            sessions = [s for idle in self._idle.values() for s in idle]
+            self._idle.clear()
+        for session in sessions:
+            session.close()
+
+
+_default_pool: Optional[RealtimeSessionPool] = None
+_default_pool_lock = threading.Lock()
+
+
+def default_session_pool() -> RealtimeSessionPool:
+    """进程内共享的会话池（所有 CosyVoiceTTS 实例共用，参数见 TTS_POOL_*）"""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = RealtimeSessionPool(
+                max_idle=int(os.getenv("TTS_POOL_SIZE", "2")),
+                idle_timeout=float(os.getenv("TTS_POOL_IDLE_TIMEOUT", "60")),
+            )
+        return _default_pool
+
+
 class CosyVoiceTTS:
     """
     通义千问 TTS 客户端
@@ -224,6 +429,7 @@ class CosyVoiceTTS:
         model: str = None,
         voice: str = None,
         audio_format: str = "mp3",
+        pool: Optional[RealtimeSessionPool] = None,
     ):
         """
         初始化 TTS 客户端
@@ -233,6 +439,7 @@ class CosyVoiceTTS:
             model: TTS 模型 (默认 qwen3-tts-flash-realtime)
             voice: 音色 (默认 Cherry)
             audio_format: 音频格式 mp3/wav/pcm
+            pool: Realtime 会话池 (默认使用进程内共享池，TTS_POOL_SIZE=0 时每句单独连接)
         """
         if not DASHSCOPE_AVAILABLE:
             raise ImportError("dashscope 未安装，请运行: pip install dashscope")
@@ -270,6 +477,10 @@ class CosyVoiceTTS:
         if realtime and not REALTIME_AVAILABLE:
             raise ImportError("dashscope 版本过低，需 >= 1.25.2 才能使用 QwenTTS Realtime")
 
+        if pool is None and int(os.getenv("TTS_POOL_SIZE", "2")) > 0:
+            pool = default_session_pool()
+        self.pool = pool if realtime else None
+
         print(f"✅ TTS Client 初始化: model={self.model}, voice={self.voice}, mode={self.mode}")
     
     def _is_realtime_model(self) -> bool:
@@ -304,23 +515,10 @@ class CosyVoiceTTS:
             return getattr(RealtimeAudioFormat, name, RealtimeAudioFormat.PCM_24000HZ_MONO_16BIT)
         return RealtimeAudioFormat.PCM_24000HZ_MONO_16BIT
 
-    def _synthesize_realtime(self, text: str, save_path: str = None) -> bytes:
-        callback = QwenRealtimeCallback(
-            save_path=save_path,
-            response_format=self.response_format,
-            sample_rate=self.sample_rate
-        )
-        qwen_tts_realtime = QwenTtsRealtime(
-            model=self.model,
-            callback=callback,
-            url=self.ws_url,
-        )
-        qwen_tts_realtime.connect()
-
-        response_format = self._resolve_realtime_audio_format()
+    def _realtime_session_kwargs(self) -> dict:
         kwargs = {
             "voice": self.voice,
-            "response_format": response_format,
+            "response_format": self._resolve_realtime_audio_format(),
             "mode": self.mode,
             "language_type": self.language_type,
         }
@@ -333,8 +531,74 @@ class CosyVoiceTTS:
             })
         if self.response_format.lower() == "opus":
             kwargs["bit_rate"] = self.bit_rate
+        return kwargs
+
+    def _session_key(self) -> Tuple:
+        """会话池的键：连接地址、模型和全部会话参数（音色、格式、语速等）"""
+        kwargs = self._realtime_session_kwargs()
+        return (self.ws_url, self.model) + tuple(sorted((k, str(v)) for k, v in kwargs.items()))
+
+    def _open_session(self) -> RealtimeSession:
+        return RealtimeSession(self.model, self.ws_url, self._realtime_session_kwargs())
+
+    def warmup(self, count: int = 1):
+        """预先建立 realtime 连接（首句合成时不再需要握手）"""
+        if self.pool is not None:
+            self.pool.warmup(self._session_key(), self._open_session, count)
+
+    def _new_realtime_callback(self, save_path: str = None,
+                               on_audio: Callable[[bytes], None] = None) -> QwenRealtimeCallback:
+        return QwenRealtimeCallback(
+            on_audio=on_audio,
+            save_path=save_path,
+            response_format=self.response_format,
+            sample_rate=self.sample_rate
+        )
 
-        qwen_tts_realtime.update_session(**kwargs)
+    def _synthesize_pooled(self, text: str, save_path: str = None,
+                           on_audio: Callable[[bytes], None] = None) -> bytes:
+        """
+        在池中的长连接上合成；连接在发送前或合成中途断开、且尚未收到任何音频时，
+        换一条新连接重试一次。
+        """
+        key = self._session_key()
+        for attempt in range(2):
+            callback = self._new_realtime_callback(save_path, on_audio)
+            session = self.pool.acquire(key, self._open_session)
+            try:
+                done = session.synthesize(text, callback, self.timeout)
+            except Exception as exc:
+                self.pool.discard(session)
+                if attempt == 0 and not callback.get_audio():
+                    print(f"[TTS] Realtime 连接不可用，重新连接: {exc}")
+                    continue
+                raise
+
+            if done and callback.error is None and session.is_healthy():
+                self.pool.release(key, session)
+            else:
+                self.pool.discard(session)
+                if attempt == 0 and session.router.closed and not callback.get_audio():
+                    print("[TTS] Realtime 连接中途断开，重新连接")
+                    continue
+                if not done:
+                    print(f"[TTS] Realtime 合成超时 ({self.timeout}s)")
+
+            callback.finalize()
+            return callback.get_audio()
+        return b""
+
+    def _synthesize_oneshot(self, text: str, save_path: str = None,
+                            on_audio: Callable[[bytes], None] = None) -> bytes:
+        """每段文本单独建立一次连接（不使用会话池时）"""
+        callback = self._new_realtime_callback(save_path, on_audio)
+        qwen_tts_realtime = QwenTtsRealtime(
+            model=self.model,
+            callback=callback,
+            url=self.ws_url,
+        )
+        qwen_tts_realtime.connect()
+        qwen_tts_realtime.update_session(**self._realtime_session_kwargs())
         qwen_tts_realtime.append_text(text)
         if self.mode == "commit":
             qwen_tts_realtime.commit()
@@ -342,8 +606,15 @@ class CosyVoiceTTS:
 
         callback.wait_for_complete(self.timeout)
         qwen_tts_realtime.close()
-        
-        audio_data = callback.get_audio()
+        return callback.get_audio()
+
+    def _synthesize_realtime(self, text: str, save_path: str = None,
+                             on_audio: Callable[[bytes], None] = None) -> bytes:
+        if self.pool is not None:
+            audio_data = self._synthesize_pooled(text, save_path, on_audio)
+        else:
+            audio_data = self._synthesize_oneshot(text, save_path, on_audio)
+
         # 如果返回的是PCM，转换为WAV
         if self.response_format.lower() == "pcm" and audio_data:
             audio_data = pcm_to_wav(audio_data, sample_rate=self.sample_rate)
@@ -395,7 +666,7 @@ class CosyVoiceTTS:
         """
         if self._is_realtime_model():
             joined = "".join(texts)
-            return self._synthesize_realtime(joined, save_path)
+            return self._synthesize_realtime(joined, save_path, on_audio=on_audio)
 
         callback = TTSCallback(on_audio=on_audio, save_path=save_path)
 
@@ -432,7 +703,7 @@ class CosyVoiceTTS:
             完整音频二进制数据
         """
         if self._is_realtime_model():
-            return self._synthesize_realtime(text, save_path)
+            return self._synthesize_realtime(text, save_path, on_audio=on_audio)
 
         callback = TTSCallback(on_audio=on_audio, save_path=save_path)
 